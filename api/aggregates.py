@@ -0,0 +1,114 @@
+# api/aggregates.py
+"""
+Maintenance of api_customer_credit_aggregate, one row per customer with the
+loan totals calculate_credit_score needs.
+"""
+from datetime import date
+
+from django.db import connection
+
+from .models import CustomerCreditAggregate
+
+# Aggregates computed from api_loan as of %(today)s
+FRESH_SELECT = """
+    SELECT c.customer_id,
+           COUNT(l.loan_id) AS loan_count,
+           COALESCE(SUM(l.tenure), 0) AS total_emis,
+           COALESCE(SUM(l."emIs_paid_on_time"), 0) AS emis_paid_on_time,
+           COALESCE(SUM(l.loan_amount), 0) AS total_volume,
+           COUNT(l.loan_id) FILTER (
+               WHERE l.start_date BETWEEN %(year_start)s AND %(year_end)s
+           ) AS current_year_loans,
+           COALESCE(SUM(l.loan_amount) FILTER (WHERE l.end_date >= %(today)s), 0) AS active_loan_amount,
+           COALESCE(SUM(l.monthly_repayment) FILTER (WHERE l.end_date >= %(today)s), 0) AS active_emi_sum,
+           %(today)s::date AS computed_on,
+           LEAST(MIN(l.end_date) FILTER (WHERE l.end_date >= %(today)s), %(year_end)s::date) AS valid_until
+    FROM api_customer c
+    LEFT JOIN api_loan l ON l.customer_id = c.customer_id
+    {where}
+    GROUP BY c.customer_id
+"""
+
+VALUE_COLUMNS = ['loan_count', 'total_emis', 'emis_paid_on_time', 'total_volume']
+DATED_COLUMNS = ['current_year_loans', 'active_loan_amount', 'active_emi_sum']
+COLUMNS = VALUE_COLUMNS + DATED_COLUMNS + ['computed_on', 'valid_until']
+
+
+def _params(today, customer_ids=None):
+    today = today or date.today()
+    return {
+        'today': today,
+        'year_start': date(today.year, 1, 1),
+        'year_end': date(today.year, 12, 31),
+        'ids': list(customer_ids) if customer_ids is not None else None,
+    }
+
+
+def _upsert(cursor, where, params):
+    updates = ',\n'.join(f'{c} = EXCLUDED.{c}' for c in COLUMNS)
+    cursor.execute(f"""
+        INSERT INTO api_customer_credit_aggregate (customer_id, {', '.join(COLUMNS)})
+        {FRESH_SELECT.format(where=where)}
+        ON CONFLICT (customer_id) DO UPDATE SET {updates}
+    """, params)
+    return cursor.rowcount
+
+
+def refresh_aggregates(cursor, customer_ids, today=None):
+    """Recompute the aggregate rows of the given customers."""
+    if not customer_ids:
+        return 0
+    return _upsert(cursor, 'WHERE c.customer_id = ANY(%(ids)s)', _params(today, customer_ids))
+
+
+def rebuild_aggregates(cursor, today=None):
+    """Recompute the aggregate row of every customer."""
+    return _upsert(cursor, '', _params(today))
+
+
+def find_drift(cursor, today=None):
+    """
+    customer_ids whose stored aggregate disagrees with api_loan. Date-dependent
+    columns are only compared while the stored row is still current.
+    Customers without a row are not reported; they are filled in on first use.
+    """
+    values = ', '.join(f'a.{c}' for c in VALUE_COLUMNS), ', '.join(f'f.{c}' for c in VALUE_COLUMNS)
+    dated = ', '.join(f'a.{c}' for c in DATED_COLUMNS), ', '.join(f'f.{c}' for c in DATED_COLUMNS)
+    cursor.execute(f"""
+        WITH fresh AS ({FRESH_SELECT.format(where='')})
+        SELECT f.customer_id
+        FROM fresh f
+        JOIN api_customer_credit_aggregate a ON a.customer_id = f.customer_id
+        WHERE ({values[0]}) IS DISTINCT FROM ({values[1]})
+           OR (a.computed_on <= %(today)s AND %(today)s <= a.valid_until
+               AND ({dated[0]}) IS DISTINCT FROM ({dated[1]}))
+        ORDER BY f.customer_id
+    """, _params(today))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def get_credit_aggregate(customer_id, today=None):
+    """Aggregate row for a customer, recomputed first if missing or out of date."""
+    today = today or date.today()
+    aggregate = CustomerCreditAggregate.objects.filter(customer_id=customer_id).first()
+    if aggregate is None or not aggregate.is_current(today):
+        with connection.cursor() as cursor:
+            refresh_aggregates(cursor, [customer_id], today)
+        # Re-read where it was written; a replica may not have it yet
+        aggregate = CustomerCreditAggregate.objects.using(connection.alias).get(customer_id=customer_id)
+    return aggregate
+
+
+def get_credit_aggregates(customer_ids, today=None):
+    """
+    Aggregate rows for many customers as {customer_id: aggregate}, in a
+    constant number of queries; missing or out-of-date rows are recomputed.
+    """
+    today = today or date.today()
+    aggregates = CustomerCreditAggregate.objects.in_bulk(customer_ids)
+    stale = [c for c in customer_ids if c not in aggregates or not aggregates[c].is_current(today)]
+    if stale:
+        with connection.cursor() as cursor:
+            refresh_aggregates(cursor, stale, today)
+        aggregates.update(CustomerCreditAggregate.objects.using(connection.alias).in_bulk(stale))
+    return aggregates
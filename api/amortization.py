@@ -0,0 +1,59 @@
+# api/amortization.py
+"""
+Loan amortization: EMI, per-period principal/interest split and outstanding
+balance. Functions take scalars or NumPy arrays and broadcast, so a
+portfolio job can price every active loan in one call.
+"""
+import numpy as np
+
+
+def monthly_rate(annual_rate):
+    return np.asarray(annual_rate, dtype=float) / 12 / 100
+
+
+def emi(principal, annual_rate, tenure):
+    """EMI using the compound interest formula; 0 for non-positive amounts or tenures."""
+    p = np.asarray(principal, dtype=float)
+    n = np.asarray(tenure, dtype=float)
+    r = monthly_rate(annual_rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + r) ** n
+        installment = np.where(r == 0, p / n, p * r * growth / (growth - 1))
+    return np.where((p <= 0) | (n <= 0), 0.0, installment)
+
+
+def outstanding_balance(principal, annual_rate, tenure, periods_paid):
+    """Principal still owed after periods_paid installments (clipped to [0, tenure])."""
+    p = np.asarray(principal, dtype=float)
+    n = np.asarray(tenure, dtype=float)
+    k = np.clip(np.asarray(periods_paid, dtype=float), 0, np.maximum(n, 0))
+    r = monthly_rate(annual_rate)
+    installment = emi(p, annual_rate, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + r) ** k
+        balance = np.where(r == 0, p - installment * k, p * growth - installment * (growth - 1) / r)
+    balance = np.where(k >= n, 0.0, balance)
+    return np.maximum(balance, 0.0)
+
+
+def schedule(principal, annual_rate, tenure):
+    """
+    Repayment schedule of one loan as arrays indexed by period 1..tenure:
+    installment, interest, principal and closing balance.
+    """
+    tenure = int(tenure)
+    periods = np.arange(1, tenure + 1)
+    installment = float(emi(principal, annual_rate, tenure))
+    opening = outstanding_balance(principal, annual_rate, tenure, periods - 1)
+    interest = opening * monthly_rate(annual_rate)
+    principal_part = installment - interest
+    if tenure:
+        # The last installment clears whatever floating-point residue remains
+        principal_part[-1] = opening[-1]
+    return {
+        'period': periods,
+        'installment': interest + principal_part,
+        'interest': interest,
+        'principal': principal_part,
+        'balance': opening - principal_part,
+    }
@@ -0,0 +1,103 @@
+# api/async_views.py
+"""
+Async versions of the read endpoints, used when ASYNC_READ_VIEWS is on
+(SERVER_MODE=asgi). They query through Django's async ORM, so one ASGI
+worker can keep many DB-bound requests in flight. Bodies are rendered with
+the REST framework renderer and match the sync views.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .credit_cache import get_credit_snapshot
+from .credit_rules import evaluate_eligibility
+from .models import Customer, Loan
+from .pagination import active_loans, add_next_link, astream_json_array, page_params, split_page
+from .serializers import CheckEligibilityRequestSerializer, LoanDetailSerializer
+from .views import calculate_emi, eligibility_result
+from credit_system.profiling import stage
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), content_type=renderer.media_type, status=status_code)
+
+
+def not_found(model):
+    return render(
+        {"detail": f"No {model._meta.object_name} matches the given query."},
+        status.HTTP_404_NOT_FOUND
+    )
+
+
+async def view_loan(request, loan_id):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        loan = await Loan.objects.select_related('customer').aget(loan_id=loan_id)
+    except Loan.DoesNotExist:
+        return not_found(Loan)
+    return render(LoanDetailSerializer(loan).data)
+
+
+async def view_loans(request, customer_id):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        cursor, page_size, stream = page_params(request.GET)
+    except ValidationError as e:
+        return render(e.detail, status.HTTP_400_BAD_REQUEST)
+
+    if stream:
+        if not await Customer.objects.filter(customer_id=customer_id).aexists():
+            return not_found(Customer)
+        # Fetched whole rather than in chunks when DB_POOL_MODE=pgbouncer disables server-side cursors
+        values = active_loans(customer_id, cursor).aiterator(chunk_size=settings.VIEW_LOANS_STREAM_CHUNK)
+        return StreamingHttpResponse(astream_json_array(values), content_type='application/json')
+
+    values = [v async for v in active_loans(customer_id, cursor)[:page_size + 1]]
+    if not values and not await Customer.objects.filter(customer_id=customer_id).aexists():
+        return not_found(Customer)
+    rows, next_cursor = split_page(values, page_size)
+    return add_next_link(render(rows), request, next_cursor, page_size)
+
+
+async def check_eligibility(request):
+    """JSON bodies only; the sync view also accepts form data."""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        payload = json.loads(request.body)
+    except ValueError as e:
+        return render({"detail": f"JSON parse error - {e}"}, status.HTTP_400_BAD_REQUEST)
+
+    serializer = CheckEligibilityRequestSerializer(data=payload)
+    if not serializer.is_valid():
+        return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    try:
+        with stage('customer_lookup'):
+            customer = await Customer.objects.aget(customer_id=data['customer_id'])
+    except Customer.DoesNotExist:
+        return not_found(Customer)
+
+    # Cache and aggregate refresh are sync; run them off the event loop
+    with stage('credit_snapshot'):
+        credit_score, current_emi_sum = await sync_to_async(get_credit_snapshot)(customer)
+    with stage('eligibility_rules'):
+        approval, corrected_rate = evaluate_eligibility(
+            credit_score, current_emi_sum, customer.monthly_salary, data['interest_rate']
+        )
+        emi = calculate_emi(data['loan_amount'], corrected_rate, data['tenure']) if approval else 0
+    return render(eligibility_result(customer.customer_id, data, approval, corrected_rate, emi))
+
+
+# csrf_exempt() wraps views in a sync function on Django 4.2; mark it directly,
+# as APIView.as_view() does for the sync views
+check_eligibility.csrf_exempt = True
@@ -0,0 +1,217 @@
+# api/benchmarking.py
+"""Helpers shared by the benchmark management commands."""
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Metrics where a larger value is an improvement; everything else is a latency
+HIGHER_IS_BETTER = ('rps', 'rows_per_sec')
+
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of an already sorted list, nearest-rank."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Latency percentiles in milliseconds and throughput for one run."""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def wait_for_server(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server at {url} did not come up within {timeout}s")
+
+
+@contextmanager
+def gunicorn_server(mode, workers, port, ready_path='/'):
+    """Run gunicorn.conf.py in SERVER_MODE=mode on 127.0.0.1:port; yields the base URL."""
+    env = {
+        **os.environ,
+        'SERVER_MODE': mode,
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_BIND': f"127.0.0.1:{port}",
+    }
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        cwd=settings.BASE_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for_server(base_url + ready_path)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _request(base_url, spec):
+    """urllib Request for a path, or a (method, path, body) tuple; body may be a callable."""
+    if isinstance(spec, str):
+        return urllib.request.Request(base_url + spec)
+    method, path, body = spec
+    if callable(body):
+        body = body()
+    return urllib.request.Request(
+        base_url + path, data=json.dumps(body).encode(), method=method,
+        headers={'Content-Type': 'application/json'},
+    )
+
+
+def http_load(base_url, paths, concurrency, duration):
+    """
+    Issue requests round-robin over paths from `concurrency` threads for
+    `duration` seconds. Items are GET paths or (method, path, body) tuples.
+    Returns summarize() of the run.
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        nonlocal errors
+        local, failed, n = [], 0, offset
+        while time.monotonic() < deadline:
+            request = _request(base_url, paths[n % len(paths)])
+            n += 1
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                local.append(time.perf_counter() - started)
+            except OSError:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return summarize(latencies, time.monotonic() - started, errors)
+
+
+def timed_rows(func, rows):
+    """Run func() and report rows/sec for `rows` rows of work."""
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    return {'rows': rows, 'seconds': elapsed, 'rows_per_sec': rows / elapsed if elapsed > 0 else 0.0}
+
+
+def cpu_per_call(func, iterations):
+    """Mean process CPU seconds per func() call, after one warm-up call."""
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations
+
+
+# Ingestion-only dependencies that must stay out of process startup
+STARTUP_FORBIDDEN = ('pandas', 'openpyxl', 'pyarrow')
+
+# Code each kind of process runs after django.setup() before it can do work
+STARTUP_TARGETS = {
+    'manage': '',
+    'web': 'from django.urls import get_resolver; get_resolver().url_patterns',
+    'worker': 'from credit_system.celery import app; app.loader.import_default_modules()',
+}
+
+_STARTUP_SCRIPT = """
+import json, sys, django
+django.setup()
+{code}
+from django.db import connections
+print(json.dumps({{
+    'forbidden': [m for m in {forbidden!r} if m in sys.modules],
+    'connections': [alias for alias in connections if connections[alias].connection is not None],
+}}))
+"""
+
+
+def cold_start(target, runs=3):
+    """
+    Time `runs` fresh interpreters through django.setup() and the target's
+    own loading (STARTUP_TARGETS). Also reports which STARTUP_FORBIDDEN
+    modules were imported and which database connections were opened.
+    """
+    script = _STARTUP_SCRIPT.format(code=STARTUP_TARGETS[target], forbidden=STARTUP_FORBIDDEN)
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'credit_system.settings')}
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        'runs': runs,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'max_ms': timings[-1] * 1000,
+        **json.loads(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def _flatten(results, prefix=''):
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from _flatten(value, f'{name}.')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(current, baseline, tolerance=0.1):
+    """
+    Compare the throughput and latency metrics two result documents share.
+    Returns rows of {metric, baseline, current, change, regressed}; change is
+    relative to the baseline, and a metric regresses when it is worse by more
+    than tolerance (0.1 = 10%).
+    """
+    base = dict(_flatten(baseline))
+    rows = []
+    for metric, value in _flatten(current):
+        leaf = metric.rsplit('.', 1)[-1]
+        if metric not in base or not (leaf in HIGHER_IS_BETTER or leaf.endswith('_ms')):
+            continue
+        old = base[metric]
+        change = (value - old) / old if old else 0.0
+        worse = -change if leaf in HIGHER_IS_BETTER else change
+        rows.append({
+            'metric': metric, 'baseline': old, 'current': value,
+            'change': change, 'regressed': worse > tolerance,
+        })
+    return rows
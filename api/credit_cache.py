@@ -0,0 +1,79 @@
+# api/credit_cache.py
+"""
+Cache of (credit_score, active_emi_sum) per customer.
+
+Keys carry the calendar date, so the "current year" and "active loan" rules
+roll over at midnight without explicit invalidation. Loan writes and
+ingestion refreshes delete the affected customers' keys. Hit/miss counters
+are batched per process and accumulated in the cache, so totals cover
+every web and worker process.
+"""
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .aggregates import get_credit_aggregates
+from .credit_rules import score_from_aggregate
+
+STATS_KEYS = {'hits': 'credit:stats:hits', 'misses': 'credit:stats:misses'}
+STATS_FLUSH_EVERY = 100
+
+_pending = {'hits': 0, 'misses': 0}
+_lock = threading.Lock()
+
+
+def _key(customer_id, today):
+    return f"credit:{customer_id}:{today.isoformat()}"
+
+
+def _count(hits, misses):
+    with _lock:
+        _pending['hits'] += hits
+        _pending['misses'] += misses
+        if _pending['hits'] + _pending['misses'] < STATS_FLUSH_EVERY:
+            return
+        flush = dict(_pending)
+        _pending.update(hits=0, misses=0)
+    for kind, n in flush.items():
+        if n:
+            cache.add(STATS_KEYS[kind], 0, timeout=None)
+            cache.incr(STATS_KEYS[kind], n)
+
+
+def get_credit_snapshots(customers, today=None):
+    """{customer_id: (credit_score, active_emi_sum)} for Customer objects."""
+    today = today or date.today()
+    keys = {_key(c.customer_id, today): c for c in customers}
+    snapshots = {keys[k].customer_id: v for k, v in cache.get_many(list(keys)).items()}
+    missing = [c for c in customers if c.customer_id not in snapshots]
+    if missing:
+        aggregates = get_credit_aggregates([c.customer_id for c in missing], today)
+        fresh = {
+            c.customer_id: (score_from_aggregate(aggregates[c.customer_id], c.approved_limit),
+                            aggregates[c.customer_id].active_emi_sum)
+            for c in missing
+        }
+        cache.set_many({_key(c, today): v for c, v in fresh.items()}, settings.CREDIT_CACHE_TTL)
+        snapshots.update(fresh)
+    _count(len(customers) - len(missing), len(missing))
+    return snapshots
+
+
+def get_credit_snapshot(customer, today=None):
+    """(credit_score, active_emi_sum) for one customer."""
+    return get_credit_snapshots([customer], today)[customer.customer_id]
+
+
+def invalidate_credit(customer_ids, today=None):
+    """Drop today's cached snapshots of the given customers."""
+    today = today or date.today()
+    cache.delete_many([_key(c, today) for c in customer_ids])
+
+
+def cache_stats():
+    """Hit and miss totals across processes, including this process's unflushed counts."""
+    totals = cache.get_many(list(STATS_KEYS.values()))
+    with _lock:
+        return {kind: totals.get(key, 0) + _pending[kind] for kind, key in STATS_KEYS.items()}
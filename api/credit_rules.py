@@ -0,0 +1,50 @@
+# api/credit_rules.py
+"""
+Credit score and loan approval rules for one customer. Plain Python with
+no app imports, so credit_cache, utils and the views can all use them.
+"""
+
+
+def score_from_aggregate(aggregate, approved_limit):
+    if aggregate.loan_count == 0:
+        return 100  # New customer, high score
+
+    # Factor i: Past loans paid on time (e.g., avg % on-time)
+    total_emis = aggregate.total_emis
+    on_time = aggregate.emis_paid_on_time
+    on_time_score = (on_time / total_emis) * 30 if total_emis > 0 else 30
+
+    # Factor ii: No of loans (penalize many loans)
+    num_loans_score = max(20 - aggregate.loan_count * 2, 0)
+
+    # Factor iii: Loan activity current year
+    activity_score = 20 if aggregate.current_year_loans > 0 else 10  # Bonus for activity
+
+    # Factor iv: Loan approved volume (total loan amount, normalize)
+    approved_limit = float(approved_limit)
+    total_volume = float(aggregate.total_volume)
+    volume_score = min(total_volume / approved_limit * 20, 20) if approved_limit > 0 else 0
+
+    # Factor v: Sum current loans > approved limit -> 0
+    if float(aggregate.active_loan_amount) > approved_limit:  # Active if end_date not passed
+        return 0
+
+    return int(on_time_score + num_loans_score + activity_score + volume_score)  # Out of ~100
+
+
+def evaluate_eligibility(credit_score, current_emi_sum, monthly_salary, interest_rate):
+    """
+    Loan approval rules: EMI load and credit-score slabs.
+    Returns (approval, corrected_rate); corrected_rate is None when not approved.
+    """
+    # Check EMI > 50% of salary
+    if current_emi_sum > monthly_salary / 2:
+        return False, None
+
+    if credit_score > 50:
+        return True, interest_rate  # Any rate allowed
+    if credit_score > 30:
+        return True, interest_rate if interest_rate >= 12 else 12.0
+    if credit_score > 10:
+        return True, interest_rate if interest_rate >= 16 else 16.0
+    return False, None
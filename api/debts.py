@@ -0,0 +1,65 @@
+# api/debts.py
+"""
+current_debt maintenance.
+
+current_debt = SUM(monthly_repayment * remaining_emis) over a customer's loans,
+remaining_emis = tenure - emIs_paid_on_time (never negative).
+"""
+
+DEBT_SUM = 'COALESCE(SUM(l.monthly_repayment * GREATEST(0, l.tenure - l."emIs_paid_on_time")), 0)'
+
+# Fully repaid loans contribute nothing; filtering them out lets the planner
+# use the partial api_loan_outstanding_idx index
+OUTSTANDING = 'l.tenure > l."emIs_paid_on_time"'
+
+
+def stale_insert(customer_ids_sql):
+    """INSERT queuing the customer_ids selected by customer_ids_sql; also usable as a CTE."""
+    return f"""
+        INSERT INTO api_stale_customer (customer_id)
+        SELECT DISTINCT customer_id FROM ({customer_ids_sql}) AS touched
+        WHERE customer_id IS NOT NULL
+        ON CONFLICT (customer_id) DO NOTHING
+    """
+
+
+def mark_stale(cursor, customer_ids_sql, params=None):
+    """Queue the customer_ids selected by customer_ids_sql for a debt refresh."""
+    cursor.execute(stale_insert(customer_ids_sql), params)
+
+
+def take_stale(cursor):
+    """Remove and return every queued customer_id."""
+    cursor.execute("DELETE FROM api_stale_customer RETURNING customer_id")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def refresh_current_debts(cursor, customer_ids):
+    """Recompute current_debt for the given customers with one grouped aggregate."""
+    if not customer_ids:
+        return 0
+    cursor.execute(f"""
+        UPDATE api_customer c
+        SET current_debt = d.debt
+        FROM (
+            SELECT ids.customer_id, {DEBT_SUM} AS debt
+            FROM unnest(%s::integer[]) AS ids(customer_id)
+            LEFT JOIN api_loan l ON l.customer_id = ids.customer_id AND {OUTSTANDING}
+            GROUP BY ids.customer_id
+        ) d
+        WHERE c.customer_id = d.customer_id
+    """, [list(customer_ids)])
+    return cursor.rowcount
+
+
+def reconcile_all_debts(cursor):
+    """Recompute current_debt for every customer."""
+    cursor.execute(f"""
+        UPDATE api_customer
+        SET current_debt = (
+            SELECT {DEBT_SUM}
+            FROM api_loan l
+            WHERE l.customer_id = api_customer.customer_id AND {OUTSTANDING}
+        )
+    """)
+    return cursor.rowcount
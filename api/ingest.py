@@ -0,0 +1,329 @@
+# api/ingest.py
+"""
+Streaming bulk-load helpers shared by the ingestion tasks.
+
+Input files are read in bounded chunks (readers.py), each chunk is pushed
+into a staging table with COPY FROM STDIN and then merged into the target
+table with a single set-based upsert. Customers use a per-transaction temp
+table; loans go through the shared api_loan_staging table so partitions
+loaded on different workers can be merged in one final step.
+"""
+import glob
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .debts import stale_insert
+
+CUSTOMER_COLUMNS = [
+    'customer_id', 'first_name', 'last_name', 'age',
+    'phone_number', 'monthly_salary', 'approved_limit',
+]
+
+
+LOAN_COLUMNS = {
+    'loan id': 'loan_id',
+    'customer id': 'customer_id',
+    'loan amount': 'loan_amount',
+    'tenure': 'tenure',
+    'interest rate': 'interest_rate',
+    'monthly repayment (emi)': 'monthly_repayment',
+    'EMIs paid on time': 'emIs_paid_on_time',
+    'start date': 'start_date',
+    'end date': 'end_date',
+}
+
+
+def customer_frame(df, offset=0):
+    """Map a raw customer_data chunk onto staging columns."""
+    return pd.DataFrame({
+        'seq': range(offset, offset + len(df)),
+        'customer_id': df['customer_id'].astype('int64'),
+        'first_name': df['first_name'].astype(str).str.strip(),
+        'last_name': df['last_name'].astype(str).str.strip(),
+        'age': df['age'].astype('int64'),
+        'phone_number': df['phone_number'].astype(str).str.strip(),
+        'monthly_salary': df['monthly_salary'].astype(float),
+        'approved_limit': df['approved_limit'].astype(float),
+    })
+
+
+# Numeric loan columns, in staging order
+LOAN_NUMBERS = [
+    'loan_id', 'customer_id', 'loan_amount', 'tenure',
+    'interest_rate', 'monthly_repayment', 'emIs_paid_on_time',
+]
+LOAN_DATES = ['start_date', 'end_date']
+
+
+def _parse_dates(values):
+    """
+    Parse a date column in one pass; ISO strings and date cells take the
+    fast path, and only what that left unparsed goes through the slower
+    mixed-format parser.
+    """
+    parsed = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], format='mixed', errors='coerce')
+    return parsed
+
+
+def _whole(values):
+    return values == values.round()
+
+
+def loan_frame(df, offset=0):
+    """
+    Map a raw loan_data chunk onto staging columns, validating the whole
+    chunk at once. Returns (clean, rejects): rejects holds the raw rows that
+    failed, with their data row number and ';'-separated reason codes.
+    The customer foreign key is checked later, at merge (orphaned_loans).
+    """
+    renamed = df.rename(columns=LOAN_COLUMNS)
+    frame = pd.DataFrame({
+        'seq': range(offset, offset + len(df)),
+        **{c: pd.to_numeric(renamed[c], errors='coerce') for c in LOAN_NUMBERS},
+        **{c: _parse_dates(renamed[c]) for c in LOAN_DATES},
+    }, index=df.index)
+
+    # NaN fails every comparison, so missing values are caught as invalid_<column>
+    checks = {
+        'invalid_loan_id': ~((frame['loan_id'] > 0) & _whole(frame['loan_id'])),
+        'invalid_customer_id': ~((frame['customer_id'] > 0) & _whole(frame['customer_id'])),
+        'invalid_loan_amount': ~(frame['loan_amount'] > 0),
+        'invalid_tenure': ~((frame['tenure'] > 0) & _whole(frame['tenure'])),
+        'invalid_interest_rate': ~frame['interest_rate'].between(0, 100),
+        'invalid_monthly_repayment': ~(frame['monthly_repayment'] >= 0),
+        'invalid_emIs_paid_on_time': ~((frame['emIs_paid_on_time'] >= 0) & _whole(frame['emIs_paid_on_time'])),
+        'invalid_start_date': frame['start_date'].isna(),
+        'invalid_end_date': frame['end_date'].isna(),
+        'emis_exceed_tenure': frame['emIs_paid_on_time'] > frame['tenure'],
+        'end_before_start': frame['end_date'] < frame['start_date'],
+    }
+    bad = pd.concat(checks, axis=1).any(axis=1)
+
+    reasons = pd.Series('', index=frame.index[bad])
+    for code, failed in checks.items():
+        reasons += np.where(failed[bad], code + ';', '')
+    rejects = df[bad].assign(row=frame['seq'][bad], reason=reasons.str.rstrip(';'))
+
+    clean = frame[~bad].astype({
+        'loan_id': 'int64', 'customer_id': 'int64',
+        'tenure': 'int64', 'emIs_paid_on_time': 'int64',
+    })
+    clean['start_date'] = clean['start_date'].dt.date
+    clean['end_date'] = clean['end_date'].dt.date
+    return clean, rejects
+
+
+def reject_path(run_id, part=None):
+    """Reject file of a loan import run, or one partition's share of it."""
+    name = f'{run_id}-loans' if part is None else f'{run_id}-loans-{part}'
+    return os.path.join(settings.IMPORT_REJECT_DIR, f'{name}.csv')
+
+
+def spool_path(run_id):
+    """Parquet copy of an xlsx loan sheet that the partitions of a run read from."""
+    return os.path.join(settings.IMPORT_SPOOL_DIR, f'{run_id}-loans.parquet')
+
+
+def write_rejects(rejects, path):
+    """Append rejected rows to a CSV reject file, writing the header once."""
+    if rejects.empty:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    new = not os.path.exists(path)
+    with open(path, 'a', newline='') as f:
+        rejects.to_csv(f, header=new, index=False)
+
+
+def collect_rejects(run_id):
+    """
+    Concatenate the partition reject files of a run into reject_path(run_id)
+    and remove them. Returns the combined path, or None if nothing was rejected.
+    """
+    path = reject_path(run_id)
+    # Partition files first: they keep the input file's column order
+    parts = sorted(glob.glob(reject_path(run_id, '*')), key=lambda part: (part.endswith('-orphans.csv'), part))
+    if parts:
+        # A run resumed after collecting keeps what was collected before
+        existing = [path] if os.path.exists(path) else []
+        combined = pd.concat(
+            [pd.read_csv(f, dtype=str, keep_default_na=False) for f in existing + parts], ignore_index=True
+        )
+        # A chunk retried after a crash may have appended its rejects twice
+        combined = combined.drop_duplicates().sort_values('row', key=lambda r: r.astype('int64'), kind='stable')
+        combined.to_csv(path, index=False)
+        for part in parts:
+            os.remove(part)
+    return path if os.path.exists(path) else None
+
+
+def copy_frame(cursor, table, frame):
+    """COPY a DataFrame into table, matching columns by name."""
+    buf = io.StringIO()
+    frame.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    columns = ', '.join(f'"{c}"' for c in frame.columns)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def load_customers(cursor, frame):
+    """
+    Stage one customer chunk and upsert it into api_customer, writing only
+    new customers and ones whose columns changed; those are queued for a
+    debt and aggregate refresh. Must run inside a transaction; the staging
+    table is dropped on commit. Returns (inserted, updated, unchanged).
+    """
+    cursor.execute("DROP TABLE IF EXISTS stage_customer")
+    cursor.execute("""
+        CREATE TEMP TABLE stage_customer (
+            seq bigint,
+            customer_id integer,
+            first_name text,
+            last_name text,
+            age integer,
+            phone_number text,
+            monthly_salary numeric,
+            approved_limit numeric
+        ) ON COMMIT DROP
+    """)
+    copy_frame(cursor, 'stage_customer', frame)
+    # Last occurrence of a customer_id in the file wins, as with row-by-row upserts.
+    # Identical rows are skipped by the IS DISTINCT FROM guard, so a re-import
+    # leaves no dead tuples behind; xmax = 0 marks rows that were inserted.
+    # current_debt is derived from loans and left alone on update.
+    cursor.execute(f"""
+        WITH staged AS (
+            SELECT DISTINCT ON (customer_id)
+                customer_id, first_name, last_name, age, phone_number, monthly_salary, approved_limit
+            FROM stage_customer
+            ORDER BY customer_id, seq DESC
+        ), upserted AS (
+            INSERT INTO api_customer
+            (customer_id, first_name, last_name, age, phone_number, monthly_salary, approved_limit, current_debt)
+            SELECT *, 0 FROM staged
+            ON CONFLICT (customer_id) DO UPDATE SET
+                first_name = EXCLUDED.first_name,
+                last_name = EXCLUDED.last_name,
+                age = EXCLUDED.age,
+                phone_number = EXCLUDED.phone_number,
+                monthly_salary = EXCLUDED.monthly_salary,
+                approved_limit = EXCLUDED.approved_limit
+            WHERE (api_customer.first_name, api_customer.last_name, api_customer.age,
+                   api_customer.phone_number, api_customer.monthly_salary, api_customer.approved_limit)
+                IS DISTINCT FROM
+                  (EXCLUDED.first_name, EXCLUDED.last_name, EXCLUDED.age,
+                   EXCLUDED.phone_number, EXCLUDED.monthly_salary, EXCLUDED.approved_limit)
+            RETURNING customer_id, xmax = 0 AS inserted
+        ), stale AS ({stale_insert("SELECT customer_id FROM upserted")})
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted), (SELECT COUNT(*) FROM staged)
+        FROM upserted
+    """)
+    inserted, updated, staged = cursor.fetchone()
+    return inserted, updated, staged - inserted - updated
+
+
+def sync_sequence(cursor, table, column):
+    """Move the serial sequence past explicitly inserted ids."""
+    cursor.execute(f"""
+        SELECT setval(pg_get_serial_sequence('{table}', '{column}'),
+                      COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, false)
+    """)
+
+
+def clear_staged_loans(cursor, run_id, partition):
+    """
+    Drop whatever an earlier attempt staged for one partition, so a retried
+    partition is idempotent.
+    """
+    cursor.execute(
+        "DELETE FROM api_loan_staging WHERE run_id = %s AND partition = %s",
+        [run_id, partition],
+    )
+
+
+def stage_loans(cursor, run_id, partition, frames):
+    """Append the given loan frames to the staged rows of one partition."""
+    staged = 0
+    for frame in frames:
+        frame = frame.assign(run_id=run_id, partition=partition)
+        copy_frame(cursor, 'api_loan_staging', frame)
+        staged += len(frame)
+    return staged
+
+
+def merge_loans(cursor, run_id):
+    """
+    Upsert every staged loan of a run into api_loan, then drop the run's staging rows.
+    Loans whose customer does not exist are skipped (read them first with
+    orphaned_loans), and so are loans that are already stored unchanged.
+    For every written loan both the owner and, for reassigned loans, the
+    previous owner are queued for a debt refresh.
+    Returns (inserted, updated, unchanged).
+    """
+    # The stale CTE reads api_loan as of before the statement, so it sees
+    # the previous owner of every updated loan
+    owners = """
+        SELECT customer_id FROM upserted
+        UNION ALL
+        SELECT l.customer_id FROM api_loan l JOIN upserted u ON u.loan_id = l.loan_id
+    """
+    cursor.execute(f"""
+        WITH staged AS (
+            SELECT DISTINCT ON (s.loan_id)
+                s.loan_id, s.customer_id, s.loan_amount, s.tenure, s.interest_rate,
+                s.monthly_repayment, s."emIs_paid_on_time", s.start_date, s.end_date
+            FROM api_loan_staging s
+            JOIN api_customer c ON c.customer_id = s.customer_id
+            WHERE s.run_id = %s
+            ORDER BY s.loan_id, s.seq DESC
+        ), upserted AS (
+            INSERT INTO api_loan
+            (loan_id, customer_id, loan_amount, tenure, interest_rate, monthly_repayment,
+             "emIs_paid_on_time", start_date, end_date)
+            SELECT * FROM staged
+            ON CONFLICT (loan_id) DO UPDATE SET
+                customer_id = EXCLUDED.customer_id,
+                loan_amount = EXCLUDED.loan_amount,
+                tenure = EXCLUDED.tenure,
+                interest_rate = EXCLUDED.interest_rate,
+                monthly_repayment = EXCLUDED.monthly_repayment,
+                "emIs_paid_on_time" = EXCLUDED."emIs_paid_on_time",
+                start_date = EXCLUDED.start_date,
+                end_date = EXCLUDED.end_date
+            WHERE (api_loan.customer_id, api_loan.loan_amount, api_loan.tenure, api_loan.interest_rate,
+                   api_loan.monthly_repayment, api_loan."emIs_paid_on_time", api_loan.start_date, api_loan.end_date)
+                IS DISTINCT FROM
+                  (EXCLUDED.customer_id, EXCLUDED.loan_amount, EXCLUDED.tenure, EXCLUDED.interest_rate,
+                   EXCLUDED.monthly_repayment, EXCLUDED."emIs_paid_on_time", EXCLUDED.start_date, EXCLUDED.end_date)
+            RETURNING loan_id, customer_id, xmax = 0 AS inserted
+        ), stale AS ({stale_insert(owners)})
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted), (SELECT COUNT(*) FROM staged)
+        FROM upserted
+    """, [run_id])
+    inserted, updated, staged = cursor.fetchone()
+    cursor.execute("DELETE FROM api_loan_staging WHERE run_id = %s", [run_id])
+    return inserted, updated, staged - inserted - updated
+
+
+def orphaned_loans(cursor, run_id):
+    """
+    Staged loans of a run whose customer does not exist, as reject rows
+    (loan_data headers, row number and reason unknown_customer).
+    """
+    staging = {column: header for header, column in LOAN_COLUMNS.items()}
+    columns = ', '.join(f's."{column}"' for column in staging)
+    cursor.execute(f"""
+        SELECT s.seq, {columns} FROM api_loan_staging s
+        WHERE s.run_id = %s
+          AND NOT EXISTS (SELECT 1 FROM api_customer c WHERE c.customer_id = s.customer_id)
+        ORDER BY s.seq
+    """, [run_id])
+    orphans = pd.DataFrame(cursor.fetchall(), columns=['row', *staging.values()])
+    orphans = orphans[[*staging.values(), 'row']]
+    return orphans.assign(reason='unknown_customer')
@@ -0,0 +1,164 @@
+# api/management/commands/benchmark.py
+import importlib.util
+import json
+import os
+import random
+import tempfile
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import get_resolver, reverse
+
+from api.benchmarking import compare, gunicorn_server, http_load, timed_rows
+from api.models import Loan, StaleCustomer
+from api.readers import FORMATS
+from api.synthetic import customer_chunks, loan_chunks, next_ids, write_frames
+from api.tasks import ingest_customer_data, ingest_loan_data, update_current_debts
+
+
+def endpoint_requests(loan):
+    """One request spec (see benchmarking.http_load) per named URL, built around a sample loan."""
+    customer_id = loan.customer_id
+    application = {"customer_id": customer_id, "loan_amount": 100000, "interest_rate": 12, "tenure": 12}
+
+    def registration():
+        return {
+            "first_name": "Bench", "last_name": "Mark", "age": 30, "monthly_income": 50000,
+            "phone_number": str(random.randrange(6000000000, 7000000000)),
+        }
+
+    def registrations():
+        return [registration() for _ in range(50)]
+
+    return {
+        'register': ('POST', reverse('register'), registration),
+        'register_bulk': ('POST', reverse('register_bulk'), registrations),
+        'check_eligibility': ('POST', reverse('check_eligibility'), application),
+        'check_eligibility_batch': ('POST', reverse('check_eligibility_batch'), [application] * 20),
+        'create_loan': ('POST', reverse('create_loan'), application),
+        'view_loan': reverse('view_loan', kwargs={'loan_id': loan.loan_id}),
+        'view_loan_schedule': reverse('view_loan_schedule', kwargs={'loan_id': loan.loan_id}),
+        'view_loans': reverse('view_loans', kwargs={'customer_id': customer_id}),
+        'portfolio_summary': reverse('portfolio_summary'),
+        'metrics': reverse('metrics'),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every URL in credit_system/urls.py (p50/p95/p99 latency, requests/sec) "
+        "and the ingestion pipeline (rows/sec). Writes to the configured database: "
+        "run it against a benchmark copy, e.g. one filled by generate_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Benchmark a running server instead of starting gunicorn.")
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent client threads.")
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds of load per endpoint.")
+        parser.add_argument('--endpoint', action='append', help="Only these URL names (repeatable).")
+        parser.add_argument('--skip-http', action='store_true')
+        parser.add_argument('--ingest-rows', type=int, default=10000,
+                            help="Customers generated for the ingestion benchmark (2 loans each); 0 skips it.")
+        parser.add_argument('--ingest-format', choices=FORMATS, action='append',
+                            help="Input formats compared on the same data (repeatable; default all available).")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--baseline', help="Compare against the JSON results of an earlier run.")
+        parser.add_argument('--tolerance', type=float, default=10.0,
+                            help="Percent a metric may worsen before it counts as a regression.")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        results = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'config': {k: options[k] for k in ('mode', 'workers', 'concurrency', 'duration', 'ingest_rows')},
+        }
+        if not options['skip_http']:
+            results['endpoints'] = self.benchmark_endpoints(options)
+        if options['ingest_rows'] > 0:
+            formats = options['ingest_format'] or [
+                fmt for fmt in FORMATS if fmt in ('xlsx', 'csv') or importlib.util.find_spec('pyarrow')
+            ]
+            results['ingest'] = self.benchmark_ingest(options['ingest_rows'], formats)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            self.compare_baseline(results, options)
+
+    def benchmark_endpoints(self, options):
+        loan = Loan.objects.order_by('-loan_id').first()
+        if loan is None:
+            raise CommandError("No loans to read; run generate_data --db first.")
+        requests = endpoint_requests(loan)
+        names = [p.name for p in get_resolver().url_patterns if getattr(p, 'name', None)]
+        for name in names:
+            if name not in requests:
+                self.stderr.write(f"No benchmark request defined for URL '{name}', skipping")
+        selected = [n for n in names if n in requests and (not options['endpoint'] or n in options['endpoint'])]
+
+        server = (
+            nullcontext(options['url'].rstrip('/')) if options['url']
+            else gunicorn_server(options['mode'], options['workers'], options['port'], requests['metrics'])
+        )
+        endpoints = {}
+        with server as base_url:
+            for name in selected:
+                r = endpoints[name] = http_load(base_url, [requests[name]], options['concurrency'], options['duration'])
+                self.stdout.write(
+                    f"{name:<26} {r['rps']:8.1f} req/s  p50={r['p50_ms']:.1f}ms  p95={r['p95_ms']:.1f}ms  "
+                    f"p99={r['p99_ms']:.1f}ms  errors={r['errors']}"
+                )
+        return endpoints
+
+    def benchmark_ingest(self, rows, formats):
+        """
+        Ingest generated customers and loans once per input format. Each
+        format gets a fresh id range, so every one times the same inserts
+        rather than later formats upserting the rows the first inserted.
+        """
+        # Anything queued earlier would be counted as this run's debt refresh
+        update_current_debts()
+
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt in formats:
+                with connection.cursor() as cursor:
+                    first_customer, first_loan = next_ids(cursor)
+                customer_file = os.path.join(tmp, f'customer_data.{fmt}')
+                loan_file = os.path.join(tmp, f'loan_data.{fmt}')
+                write_frames(customer_chunks(rows, first_customer), customer_file)
+                loans = write_frames(
+                    loan_chunks(2 * rows, (first_customer, first_customer + rows - 1), first_loan), loan_file
+                )
+
+                ingest = results[fmt] = {
+                    'ingest_customer_data': timed_rows(lambda: ingest_customer_data(customer_file), rows),
+                    'ingest_loan_data': timed_rows(lambda: ingest_loan_data(loan_file), loans),
+                }
+                ingest['update_current_debts'] = timed_rows(update_current_debts, StaleCustomer.objects.count())
+                for name, r in ingest.items():
+                    self.stdout.write(
+                        f"{fmt:<8} {name:<22} {r['rows_per_sec']:8.0f} rows/s  ({r['rows']} rows in {r['seconds']:.2f}s)"
+                    )
+        return results
+
+    def compare_baseline(self, results, options):
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, options['tolerance'] / 100)
+        for row in rows:
+            flag = '  REGRESSION' if row['regressed'] else ''
+            self.stdout.write(
+                f"{row['metric']:<50} {row['baseline']:12.2f} -> {row['current']:12.2f} "
+                f"({row['change']:+.1%}){flag}"
+            )
+        regressions = [row['metric'] for row in rows if row['regressed']]
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} metric(s) regressed beyond {options['tolerance']}%")
@@ -0,0 +1,45 @@
+# api/management/commands/benchmark_async.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarking import gunicorn_server, http_load
+from api.models import Loan
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the read endpoints served by sync gunicorn workers "
+        "and by uvicorn workers with the async views, at the same worker count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=64, help="Concurrent client threads.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds of load per mode.")
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        loan = Loan.objects.order_by('loan_id').first()
+        if loan is None:
+            raise CommandError("No loans to read; load or generate data first.")
+        paths = [f'/view-loan/{loan.loan_id}/', f'/view-loans/{loan.customer_id}/']
+
+        results = {}
+        for mode in ('wsgi', 'asgi'):
+            with gunicorn_server(mode, options['workers'], options['port'], paths[0]) as base_url:
+                results[mode] = http_load(base_url, paths, options['concurrency'], options['duration'])
+
+            r = results[mode]
+            self.stdout.write(
+                f"{mode}: {r['rps']:.1f} req/s  p50={r['p50_ms']:.1f}ms  p95={r['p95_ms']:.1f}ms  "
+                f"p99={r['p99_ms']:.1f}ms  errors={r['errors']}"
+            )
+
+        if results['wsgi']['rps']:
+            self.stdout.write(f"asgi/wsgi throughput: {results['asgi']['rps'] / results['wsgi']['rps']:.2f}x")
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'workers': options['workers'], 'concurrency': options['concurrency'],
+                           'results': results}, f, indent=2)
@@ -0,0 +1,114 @@
+# api/management/commands/benchmark_rendering.py
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmarking import cpu_per_call
+from api.models import Customer, Loan
+from api.renderers import ORJSONRenderer
+from api.serializers import (
+    CustomerLoanSerializer, CustomerResponseSerializer, LoanDetailSerializer, LoanScheduleSerializer,
+)
+
+
+class ModelCustomerResponseSerializer(serializers.ModelSerializer):
+    """The field-per-attribute /register/ serializer CustomerResponseSerializer replaced."""
+    name = serializers.SerializerMethodField()
+    monthly_income = serializers.IntegerField(source='monthly_salary')
+
+    class Meta:
+        model = Customer
+        fields = ['customer_id', 'name', 'age', 'monthly_income', 'approved_limit', 'phone_number']
+
+    def get_name(self, obj):
+        return f"{obj.first_name} {obj.last_name}"
+
+
+def _loan(n, customer):
+    return Loan(
+        loan_id=n, customer=customer, loan_amount=Decimal('250000.00'), tenure=36,
+        interest_rate=Decimal('11.25'), monthly_repayment=Decimal('8214.47'), emIs_paid_on_time=n % 36,
+        start_date=date(2024, 1, 1) + timedelta(days=n % 365), end_date=date(2027, 1, 1),
+    )
+
+
+def sample_bodies(rows):
+    """
+    Body builders for the read endpoints, from in-memory rows shaped like
+    the database's (Decimal money): 'before' is the previous hand-built
+    dict with Decimals (or ModelSerializer), 'after' the lean serializer
+    output. The schedule body was already built directly and only changed place.
+    """
+    customer = Customer(
+        customer_id=1, first_name='Bench', last_name='Mark', age=30, phone_number='9000000001',
+        monthly_salary=Decimal('50000.00'), approved_limit=Decimal('1800000.00'),
+    )
+    loan = _loan(1, customer)
+    values = [
+        {f: getattr(_loan(n, customer), f) for f in
+         ('loan_id', 'loan_amount', 'interest_rate', 'monthly_repayment', 'tenure', 'emIs_paid_on_time')}
+        for n in range(rows)
+    ]
+    customers = [customer] * rows
+
+    def loan_row(v):
+        return {
+            "loan_id": v['loan_id'], "loan_amount": v['loan_amount'], "interest_rate": v['interest_rate'],
+            "monthly_installment": v['monthly_repayment'], "repayments_left": v['tenure'] - v['emIs_paid_on_time'],
+        }
+
+    def loan_detail(loan):
+        c = loan.customer
+        return {
+            "loan_id": loan.loan_id,
+            "customer": {"id": c.customer_id, "first_name": c.first_name, "last_name": c.last_name,
+                         "phone_number": c.phone_number, "age": c.age},
+            "loan_amount": loan.loan_amount, "interest_rate": loan.interest_rate,
+            "monthly_installment": loan.monthly_repayment, "tenure": loan.tenure,
+        }
+
+    return {
+        'view_loan': (lambda: loan_detail(loan), lambda: LoanDetailSerializer(loan).data),
+        'view_loans': (lambda: [loan_row(v) for v in values], lambda: CustomerLoanSerializer(values, many=True).data),
+        'view_loan_schedule': (lambda: LoanScheduleSerializer(loan).data, lambda: LoanScheduleSerializer(loan).data),
+        'register_bulk': (lambda: ModelCustomerResponseSerializer(customers, many=True).data,
+                          lambda: CustomerResponseSerializer(customers, many=True).data),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure CPU time per response body spent building and rendering JSON: the stock REST "
+        "framework renderer on the previous Decimal-valued dicts against the lean serializers "
+        "with each renderer. No database or server needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help="Rows per list body (a /view-loans/ page).")
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, (before, after) in sample_bodies(options['rows']).items():
+            json_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+            timings = {
+                'before_us': cpu_per_call(lambda: json_renderer.render(before()), options['iterations']),
+                'lean_json_us': cpu_per_call(lambda: json_renderer.render(after()), options['iterations']),
+                'lean_orjson_us': cpu_per_call(lambda: orjson_renderer.render(after()), options['iterations']),
+            }
+            r = results[name] = {k: v * 1e6 for k, v in timings.items()}
+            r['speedup'] = r['before_us'] / r['lean_orjson_us'] if r['lean_orjson_us'] else 0.0
+            self.stdout.write(
+                f"{name:<20} before={r['before_us']:8.1f}us  lean+json={r['lean_json_us']:8.1f}us  "
+                f"lean+orjson={r['lean_orjson_us']:8.1f}us  ({r['speedup']:.1f}x)"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'rows': options['rows'], 'rendering': results}, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,47 @@
+# api/management/commands/benchmark_startup.py
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarking import STARTUP_TARGETS, cold_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Time cold starts of a manage.py command, a web worker and a Celery worker, and check "
+        "that none of them imports pandas/openpyxl or opens a database connection on boot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=list(STARTUP_TARGETS), action='append',
+                            help="Only these process types (repeatable).")
+        parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per target.")
+        parser.add_argument('--budget-ms', type=int, default=settings.STARTUP_BUDGET_MS,
+                            help="Median cold start allowed per target.")
+        parser.add_argument('--fail-over-budget', action='store_true',
+                            help="Exit with an error on a blown budget, a heavy import or a boot-time connection.")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        results, problems = {}, []
+        for target in options['target'] or STARTUP_TARGETS:
+            r = results[target] = cold_start(target, options['runs'])
+            self.stdout.write(
+                f"{target:<8} p50={r['p50_ms']:.0f}ms  max={r['max_ms']:.0f}ms  "
+                f"forbidden={','.join(r['forbidden']) or '-'}  connections={','.join(r['connections']) or '-'}"
+            )
+            if r['p50_ms'] > options['budget_ms']:
+                problems.append(f"{target} starts in {r['p50_ms']:.0f}ms, budget {options['budget_ms']}ms")
+            if r['forbidden']:
+                problems.append(f"{target} imports {', '.join(r['forbidden'])} on startup")
+            if r['connections']:
+                problems.append(f"{target} connects to {', '.join(r['connections'])} on startup")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'budget_ms': options['budget_ms'], 'startup': results}, f, indent=2)
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems and options['fail_over_budget']:
+            raise CommandError(f"{len(problems)} startup problem(s)")
@@ -0,0 +1,46 @@
+# api/management/commands/bootstrap_data.py
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.models import Customer, ImportRun
+from api.tasks import import_pipeline, plan_import
+
+# pg_advisory lock key shared by every container running this command
+BOOTSTRAP_LOCK = 7301
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the initial customer and loan sheets once: skipped when customers already "
+        "exist or another full import is running or done. Safe to run from every container "
+        "on startup; a Postgres advisory lock lets only one of them plan the run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', default='customer_data.xlsx')
+        parser.add_argument('--loans', default='loan_data.xlsx')
+        parser.add_argument('--partitions', type=int, default=1)
+        parser.add_argument('--sync', action='store_true', help="Run in this process instead of on the workers.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [BOOTSTRAP_LOCK])
+                locked = cursor.fetchone()[0]
+            if not locked:
+                self.stdout.write("Bootstrap already in progress elsewhere, skipping")
+                return
+            previous = ImportRun.objects.filter(kind=ImportRun.KIND_FULL).exclude(status=ImportRun.STATUS_FAILED)
+            if Customer.objects.exists() or previous.exists():
+                self.stdout.write("Data already imported, skipping bootstrap")
+                return
+            run = plan_import(options['customers'], options['loans'], options['partitions'])
+            pipeline = import_pipeline(run)
+            if not options['sync']:
+                transaction.on_commit(pipeline.delay)
+
+        if options['sync']:
+            pipeline.apply().get()
+            self.stdout.write(self.style.SUCCESS(f"Bootstrap import {run.run_id} finished"))
+        else:
+            self.stdout.write(f"Queued bootstrap import {run.run_id}")
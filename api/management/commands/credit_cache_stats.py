@@ -0,0 +1,14 @@
+# api/management/commands/credit_cache_stats.py
+from django.core.management.base import BaseCommand
+
+from api.credit_cache import cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show credit score cache hit/miss totals."
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups if lookups else 0.0
+        self.stdout.write(f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.3f}")
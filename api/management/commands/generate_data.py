@@ -0,0 +1,62 @@
+# api/management/commands/generate_data.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.synthetic import customer_chunks, load_frames, loan_chunks, next_ids, write_frames
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic customers and loans, as rows in the database and/or as "
+        "customer_data/loan_data files (xlsx or csv) for the ingestion tasks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--loans', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=100000, help="Rows generated per batch.")
+        parser.add_argument('--db', action='store_true', help="COPY the rows into api_customer/api_loan.")
+        parser.add_argument('--output-dir', help="Write customer_data.<fmt> and loan_data.<fmt> here.")
+        parser.add_argument('--format', choices=['xlsx', 'csv', 'parquet', 'arrow'], action='append',
+                            help="File format; repeat for several (default xlsx). parquet/arrow need pyarrow.")
+
+    def handle(self, *args, **options):
+        if not options['db'] and not options['output_dir']:
+            raise CommandError("Nothing to do: pass --db and/or --output-dir.")
+        if options['customers'] < 1:
+            raise CommandError("--customers must be at least 1.")
+
+        # New ids start after the existing ones, so files can be ingested
+        # and rows loaded without overwriting real customers or loans
+        with connection.cursor() as cursor:
+            first_customer, first_loan = next_ids(cursor)
+        last_customer = first_customer + options['customers'] - 1
+
+        def customers():
+            return customer_chunks(options['customers'], first_customer, options['seed'], options['chunk_size'])
+
+        def loans():
+            return loan_chunks(
+                options['loans'], (first_customer, last_customer), first_loan,
+                options['seed'], options['chunk_size'],
+            )
+
+        if options['output_dir']:
+            os.makedirs(options['output_dir'], exist_ok=True)
+            for fmt in options['format'] or ['xlsx']:
+                for name, frames in (('customer_data', customers()), ('loan_data', loans())):
+                    path = os.path.join(options['output_dir'], f'{name}.{fmt}')
+                    rows = write_frames(frames, path)
+                    self.stdout.write(f"Wrote {rows} rows to {path}")
+
+        if options['db']:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    customer_count, loan_count = load_frames(cursor, customers(), loans())
+            self.stdout.write(self.style.SUCCESS(
+                f"Loaded {customer_count} customers ({first_customer}-{last_customer}) "
+                f"and {loan_count} loans into the database"
+            ))
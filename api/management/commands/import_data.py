@@ -0,0 +1,42 @@
+# api/management/commands/import_data.py
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import ImportRun
+from api.tasks import import_pipeline, plan_import, reopen_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Import customer and loan sheets as one checkpointed run (customers → loans → debts), "
+        "or resume an interrupted run from its last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', help="customer_data.xlsx path.")
+        parser.add_argument('--loans', help="loan_data.xlsx path.")
+        parser.add_argument('--partitions', type=int, default=1, help="Loan partitions staged in parallel.")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Rows per committed chunk.")
+        parser.add_argument('--resume', metavar='RUN_ID', help="Continue this run instead of starting one.")
+        parser.add_argument('--sync', action='store_true', help="Run in this process instead of on the workers.")
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                run = reopen_import(options['resume'])
+            except ImportRun.DoesNotExist:
+                raise CommandError(f"No import run {options['resume']}")
+            if run is None:
+                self.stdout.write(f"Import {options['resume']} already finished")
+                return
+        elif options['customers'] and options['loans']:
+            run = plan_import(options['customers'], options['loans'], options['partitions'])
+        else:
+            raise CommandError("Pass --customers and --loans, or --resume RUN_ID.")
+
+        pipeline = import_pipeline(run, options['chunk_size'])
+        if options['sync']:
+            pipeline.apply().get()
+            self.stdout.write(self.style.SUCCESS(f"Import {run.run_id} finished"))
+        else:
+            pipeline.delay()
+            self.stdout.write(f"Queued import {run.run_id}; follow it with import_status --run-id {run.run_id} --follow")
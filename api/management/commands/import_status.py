@@ -0,0 +1,51 @@
+# api/management/commands/import_status.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import ImportRun
+from api.progress import STAGES
+
+
+class Command(BaseCommand):
+    help = "Show recent ingestion runs, or follow one run's counters and stage timings until it finishes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run-id', help="Show only this run (ImportRun run_id).")
+        parser.add_argument('--limit', type=int, default=10, help="Recent runs listed without --run-id.")
+        parser.add_argument('--follow', action='store_true', help="With --run-id: poll until the run finishes.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls with --follow.")
+
+    def handle(self, *args, **options):
+        if not options['run_id']:
+            if options['follow']:
+                raise CommandError("--follow needs --run-id.")
+            for run in ImportRun.objects.order_by('-started_at')[:options['limit']]:
+                self.stdout.write(self.describe(run))
+            return
+
+        while True:
+            try:
+                run = ImportRun.objects.get(run_id=options['run_id'])
+            except ImportRun.DoesNotExist:
+                raise CommandError(f"No import run {options['run_id']}")
+            self.stdout.write(self.describe(run))
+            if not options['follow'] or run.status != ImportRun.STATUS_RUNNING:
+                break
+            time.sleep(options['interval'])
+        if run.reject_file:
+            self.stdout.write(f"Rejected rows: {run.reject_file}")
+        if run.status == ImportRun.STATUS_FAILED:
+            self.stderr.write(run.error)
+
+    def describe(self, run):
+        stages = ' '.join(
+            f"{stage}={getattr(run, f'{stage}_seconds'):.2f}s" for stage in STAGES
+            if getattr(run, f'{stage}_seconds')
+        )
+        return (
+            f"{run.run_id} {run.kind:<9} {run.status:<9} read={run.rows_read} inserted={run.rows_inserted} "
+            f"updated={run.rows_updated} unchanged={run.rows_unchanged} rejected={run.rows_rejected} "
+            f"{run.rows_per_sec:.0f} rows/s  {run.elapsed_seconds:.1f}s"
+            f"{'  ' + stages if stages else ''}"
+        )
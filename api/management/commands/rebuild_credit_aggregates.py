@@ -0,0 +1,35 @@
+# api/management/commands/rebuild_credit_aggregates.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.aggregates import find_drift, rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = "Check api_customer_credit_aggregate against api_loan and rebuild it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report customers whose aggregate has drifted; exit non-zero if any.",
+        )
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            drifted = find_drift(cursor)
+
+        if drifted:
+            sample = ', '.join(str(c) for c in drifted[:20])
+            self.stdout.write(f"{len(drifted)} aggregates out of sync: {sample}")
+        else:
+            self.stdout.write("All stored aggregates match api_loan.")
+
+        if options['check']:
+            if drifted:
+                raise CommandError("Credit aggregates are out of sync.")
+            return
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                rebuilt = rebuild_aggregates(cursor)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} credit aggregates."))
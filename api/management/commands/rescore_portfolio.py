@@ -0,0 +1,19 @@
+# api/management/commands/rescore_portfolio.py
+from django.core.management.base import BaseCommand
+
+from api.tasks import rescore_portfolio
+
+
+class Command(BaseCommand):
+    help = "Recompute the credit score of every customer into api_credit_score."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None, help="Loan rows fetched per batch.")
+        parser.add_argument('--async', dest='use_async', action='store_true', help="Queue on a Celery worker instead.")
+
+    def handle(self, *args, **options):
+        if options['use_async']:
+            result = rescore_portfolio.delay(options['chunk_size'])
+            self.stdout.write(f"Queued rescore_portfolio as task {result.id}")
+            return
+        self.stdout.write(self.style.SUCCESS(rescore_portfolio(options['chunk_size'])))
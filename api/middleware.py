@@ -0,0 +1,73 @@
+# api/middleware.py
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from credit_system import metrics
+from credit_system.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'Request latency by URL name.')
+REQUESTS = metrics.counter('http_requests_total', 'Requests by URL name, method and status class.')
+REQUEST_QUERIES = metrics.histogram(
+    'http_request_db_queries', 'Database queries per request by URL name.',
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500),
+)
+REQUEST_DB_SECONDS = metrics.histogram('http_request_db_seconds', 'Database time per request by URL name.')
+STAGE_SECONDS = metrics.histogram('view_stage_duration_seconds', 'Time spent in named view stages.')
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, query count and database time per URL name, plus the
+    stage timings views report through profiling.stage(), and logs requests
+    slower than SLOW_REQUEST_MS with the SQL they ran. Streaming responses
+    are timed until the response object is returned, not until the last byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with profiled() as profile:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            self.record(request, response, profile, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        with profiled() as profile:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            self.record(request, response, profile, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, profile, elapsed):
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'unmatched'
+        REQUEST_SECONDS.observe(elapsed, view=view, method=request.method)
+        REQUESTS.inc(view=view, method=request.method, status=f'{response.status_code // 100}xx')
+        REQUEST_QUERIES.observe(profile.queries, view=view)
+        REQUEST_DB_SECONDS.observe(profile.db_seconds, view=view)
+        for name, seconds in profile.stages.items():
+            STAGE_SECONDS.observe(seconds, view=view, stage=name)
+
+        if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+            stages = ', '.join(f'{name}={seconds * 1000:.1f}ms' for name, seconds in profile.stages.items())
+            slowest = sorted(profile.sql, key=lambda q: q[0], reverse=True)[:settings.SLOW_REQUEST_SQL]
+            statements = ''.join(f'\n  {seconds * 1000:8.1f}ms  {sql}' for seconds, sql in slowest)
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({view}) {elapsed * 1000:.0f}ms: "
+                f"{profile.queries} queries, {profile.db_seconds * 1000:.0f}ms in DB"
+                f"{'; ' + stages if stages else ''}{statements}"
+            )
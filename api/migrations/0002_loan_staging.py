@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        # Landing area for partitioned loan imports. UNLOGGED: the rows are
+        # transient and can always be reloaded from the source file.
+        migrations.RunSQL(
+            sql="""
+                CREATE UNLOGGED TABLE api_loan_staging (
+                    run_id varchar(64) NOT NULL,
+                    partition integer NOT NULL,
+                    seq bigint NOT NULL,
+                    loan_id integer NOT NULL,
+                    customer_id integer NOT NULL,
+                    loan_amount numeric(12, 2) NOT NULL,
+                    tenure integer NOT NULL,
+                    interest_rate numeric(5, 2) NOT NULL,
+                    monthly_repayment numeric(12, 2) NOT NULL,
+                    "emIs_paid_on_time" integer NOT NULL,
+                    start_date date NOT NULL,
+                    end_date date NOT NULL
+                );
+                CREATE INDEX api_loan_staging_run_idx ON api_loan_staging (run_id, partition);
+            """,
+            reverse_sql="DROP TABLE api_loan_staging;",
+        ),
+    ]
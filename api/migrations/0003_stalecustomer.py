@@ -0,0 +1,21 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_loan_staging'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleCustomer',
+            fields=[
+                ('customer', models.OneToOneField(db_column='customer_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='api.customer')),
+            ],
+            options={
+                'db_table': 'api_stale_customer',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_stalecustomer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerCreditAggregate',
+            fields=[
+                ('customer', models.OneToOneField(db_column='customer_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='credit_aggregate', serialize=False, to='api.customer')),
+                ('loan_count', models.IntegerField(default=0)),
+                ('total_emis', models.IntegerField(default=0)),
+                ('emis_paid_on_time', models.IntegerField(default=0)),
+                ('total_volume', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('current_year_loans', models.IntegerField(default=0)),
+                ('active_loan_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('active_emi_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('computed_on', models.DateField()),
+                ('valid_until', models.DateField()),
+            ],
+            options={
+                'db_table': 'api_customer_credit_aggregate',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_customercreditaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditScore',
+            fields=[
+                ('customer', models.OneToOneField(db_column='customer_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='credit_score', serialize=False, to='api.customer')),
+                ('score', models.IntegerField()),
+                ('scored_on', models.DateField()),
+            ],
+            options={
+                'db_table': 'api_credit_score',
+            },
+        ),
+    ]
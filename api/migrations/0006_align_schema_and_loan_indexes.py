@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_creditscore'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='approved_limit',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='current_debt',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='monthly_salary',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='customer',
+            field=models.ForeignKey(db_column='customer_id', on_delete=django.db.models.deletion.CASCADE, related_name='loans', to='api.customer'),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='interest_rate',
+            field=models.DecimalField(decimal_places=2, max_digits=5),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='loan_amount',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='monthly_repayment',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['customer', 'end_date'], include=('monthly_repayment',), name='api_loan_customer_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('tenure__gt', models.F('emIs_paid_on_time'))), fields=['customer'], include=('monthly_repayment', 'tenure', 'emIs_paid_on_time'), name='api_loan_outstanding_idx'),
+        ),
+        migrations.AlterModelTable(
+            name='customer',
+            table='api_customer',
+        ),
+        migrations.AlterModelTable(
+            name='loan',
+            table='api_loan',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_align_schema_and_loan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.CharField(max_length=64, unique=True)),
+                ('kind', models.CharField(choices=[('customers', 'Customers'), ('loans', 'Loans'), ('debts', 'Debt refresh'), ('full', 'Full import')], max_length=20)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('source', models.CharField(blank=True, max_length=500)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('rows_read', models.BigIntegerField(default=0)),
+                ('rows_upserted', models.BigIntegerField(default=0)),
+                ('rows_rejected', models.BigIntegerField(default=0)),
+                ('read_seconds', models.FloatField(default=0)),
+                ('transform_seconds', models.FloatField(default=0)),
+                ('load_seconds', models.FloatField(default=0)),
+                ('debt_refresh_seconds', models.FloatField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'api_import_run',
+                'indexes': [models.Index(fields=['-started_at'], name='api_import_run_started_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_importrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('customers', 'Customers'), ('loans', 'Loan partition'), ('merge', 'Loan merge'), ('debts', 'Debt refresh')], max_length=20)),
+                ('partition', models.IntegerField(default=0)),
+                ('source', models.CharField(blank=True, max_length=500)),
+                ('start_row', models.BigIntegerField(default=0)),
+                ('stop_row', models.BigIntegerField(blank=True, null=True)),
+                ('rows_done', models.BigIntegerField(default=0)),
+                ('rows_loaded', models.BigIntegerField(default=0)),
+                ('rows_rejected', models.BigIntegerField(default=0)),
+                ('done', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='api.importrun')),
+            ],
+            options={
+                'db_table': 'api_import_checkpoint',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importcheckpoint',
+            constraint=models.UniqueConstraint(fields=('run', 'stage', 'partition'), name='api_import_checkpoint_step_uniq'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importrun',
+            name='rows_inserted',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importrun',
+            name='rows_unchanged',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importrun',
+            name='rows_updated',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
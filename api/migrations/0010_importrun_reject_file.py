@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_importrun_change_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importrun',
+            name='reject_file',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+    ]
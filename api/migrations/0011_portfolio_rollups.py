@@ -0,0 +1,71 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_importrun_reject_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioMember',
+            fields=[
+                ('customer_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('age_band', models.CharField(max_length=20)),
+                ('salary_band', models.CharField(max_length=20)),
+                ('score_slab', models.CharField(max_length=20)),
+                ('loans', models.IntegerField(default=0)),
+                ('total_volume', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('exposure', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('active_emi_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('outstanding_debt', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_emis', models.IntegerField(default=0)),
+                ('emis_paid_on_time', models.IntegerField(default=0)),
+                ('over_emi_limit', models.IntegerField(default=0)),
+                ('valid_until', models.DateField()),
+            ],
+            options={
+                'db_table': 'api_portfolio_member',
+            },
+        ),
+        migrations.CreateModel(
+            name='PortfolioRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20)),
+                ('band', models.CharField(max_length=20)),
+                ('customers', models.BigIntegerField(default=0)),
+                ('loans', models.BigIntegerField(default=0)),
+                ('total_volume', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('exposure', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('active_emi_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('outstanding_debt', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_emis', models.BigIntegerField(default=0)),
+                ('emis_paid_on_time', models.BigIntegerField(default=0)),
+                ('over_emi_limit', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'api_portfolio_rollup',
+            },
+        ),
+        migrations.CreateModel(
+            name='PortfolioStale',
+            fields=[
+                ('customer_id', models.IntegerField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'db_table': 'api_portfolio_stale',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='portfoliorollup',
+            constraint=models.UniqueConstraint(fields=('dimension', 'band'), name='api_portfolio_rollup_band_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliomember',
+            index=models.Index(fields=['valid_until'], name='api_portfolio_member_valid_idx'),
+        ),
+    ]
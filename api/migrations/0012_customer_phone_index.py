@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_portfolio_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_number'], name='api_customer_phone_idx'),
+        ),
+    ]
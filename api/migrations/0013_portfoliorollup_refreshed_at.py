@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_customer_phone_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfoliorollup',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
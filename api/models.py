@@ -1,5 +1,7 @@
 # api/models.py
 from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
 
 class Customer(models.Model):
     customer_id = models.AutoField(primary_key=True)
@@ -13,6 +15,10 @@ class Customer(models.Model):
 
     class Meta:
         db_table = 'api_customer'
+        indexes = [
+            # Duplicate phone number checks of /register/bulk/
+            models.Index(fields=['phone_number'], name='api_customer_phone_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.customer_id})"
@@ -20,17 +26,260 @@ class Customer(models.Model):
 
 class Loan(models.Model):
     loan_id = models.AutoField(primary_key=True)
-    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, db_column='customer_id')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, db_column='customer_id', related_name='loans')
     loan_amount = models.DecimalField(max_digits=12, decimal_places=2)
     tenure = models.IntegerField()
     interest_rate = models.DecimalField(max_digits=5, decimal_places=2)
     monthly_repayment = models.DecimalField(max_digits=12, decimal_places=2)
-    emIs_paid_on_time = models.IntegerField(db_column='"emIs_paid_on_time"')
+    emIs_paid_on_time = models.IntegerField(default=0)
     start_date = models.DateField()
     end_date = models.DateField()
 
     class Meta:
         db_table = 'api_loan'
+        indexes = [
+            # /view-loans/ (customer_id = %s AND end_date >= today) and the per-customer
+            # loan reads of the credit aggregate refresh
+            models.Index(
+                fields=['customer', 'end_date'], include=['monthly_repayment'],
+                name='api_loan_customer_end_idx'
+            ),
+            # Loans still being repaid; "end_date >= today" cannot be an index predicate,
+            # so this covers the current_debt refresh instead
+            models.Index(
+                fields=['customer'], include=['monthly_repayment', 'tenure', 'emIs_paid_on_time'],
+                condition=Q(tenure__gt=F('emIs_paid_on_time')),
+                name='api_loan_outstanding_idx'
+            ),
+        ]
 
     def __str__(self):
-        return f"Loan {self.loan_id} - Customer {self.customer_id}"
\ No newline at end of file
+        return f"Loan {self.loan_id} - Customer {self.customer_id}"
+
+
+class StaleCustomer(models.Model):
+    """Customers whose derived data (current_debt, credit aggregate) needs recomputing."""
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, db_column='customer_id')
+
+    class Meta:
+        db_table = 'api_stale_customer'
+
+
+class CustomerCreditAggregate(models.Model):
+    """
+    Per-customer loan totals behind calculate_credit_score.
+    current_year_loans, active_loan_amount and active_emi_sum are as of
+    computed_on and hold until valid_until (next loan expiry or year end).
+    """
+    customer = models.OneToOneField(
+        Customer, on_delete=models.CASCADE, primary_key=True,
+        db_column='customer_id', related_name='credit_aggregate'
+    )
+    loan_count = models.IntegerField(default=0)
+    total_emis = models.IntegerField(default=0)
+    emis_paid_on_time = models.IntegerField(default=0)
+    total_volume = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    current_year_loans = models.IntegerField(default=0)
+    active_loan_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    active_emi_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    computed_on = models.DateField()
+    valid_until = models.DateField()
+
+    class Meta:
+        db_table = 'api_customer_credit_aggregate'
+
+    def is_current(self, today):
+        return self.computed_on <= today <= self.valid_until
+
+
+class CreditScore(models.Model):
+    """Nightly portfolio credit score, written in bulk by rescore_portfolio."""
+    customer = models.OneToOneField(
+        Customer, on_delete=models.CASCADE, primary_key=True,
+        db_column='customer_id', related_name='credit_score'
+    )
+    score = models.IntegerField()
+    scored_on = models.DateField()
+
+    class Meta:
+        db_table = 'api_credit_score'
+
+
+class PortfolioStale(models.Model):
+    """
+    Customers whose portfolio rollup contribution needs recomputing. A plain
+    id rather than a foreign key: deleted customers still have to be taken out.
+    """
+    customer_id = models.IntegerField(primary_key=True)
+
+    class Meta:
+        db_table = 'api_portfolio_stale'
+
+
+class PortfolioMember(models.Model):
+    """
+    One customer's contribution to api_portfolio_rollup, as last applied.
+    exposure and active_emi_sum cover loans active on the day it was
+    computed and hold until valid_until, like the credit aggregate.
+    """
+    customer_id = models.IntegerField(primary_key=True)
+    age_band = models.CharField(max_length=20)
+    salary_band = models.CharField(max_length=20)
+    score_slab = models.CharField(max_length=20)
+    loans = models.IntegerField(default=0)
+    total_volume = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    exposure = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    active_emi_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    outstanding_debt = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_emis = models.IntegerField(default=0)
+    emis_paid_on_time = models.IntegerField(default=0)
+    over_emi_limit = models.IntegerField(default=0)
+    valid_until = models.DateField()
+
+    class Meta:
+        db_table = 'api_portfolio_member'
+        indexes = [models.Index(fields=['valid_until'], name='api_portfolio_member_valid_idx')]
+
+
+class PortfolioRollup(models.Model):
+    """
+    Portfolio totals per band of one dimension (age_band, salary_band,
+    score_slab, or total). refreshed_at is set on the total row when a
+    refresh runs to the end.
+    """
+    dimension = models.CharField(max_length=20)
+    band = models.CharField(max_length=20)
+    customers = models.BigIntegerField(default=0)
+    loans = models.BigIntegerField(default=0)
+    total_volume = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    exposure = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    active_emi_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    outstanding_debt = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_emis = models.BigIntegerField(default=0)
+    emis_paid_on_time = models.BigIntegerField(default=0)
+    over_emi_limit = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'api_portfolio_rollup'
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'band'], name='api_portfolio_rollup_band_uniq'),
+        ]
+
+
+class ImportRun(models.Model):
+    """
+    One ingestion run: live row counters and seconds spent per stage.
+    Tasks add to the counters with F() increments, so partitions running on
+    several workers, or the stages of a full import, can share one row.
+    """
+    KIND_CUSTOMERS = 'customers'
+    KIND_LOANS = 'loans'
+    KIND_DEBTS = 'debts'
+    KIND_FULL = 'full'
+    KIND_CHOICES = [
+        (KIND_CUSTOMERS, 'Customers'),
+        (KIND_LOANS, 'Loans'),
+        (KIND_DEBTS, 'Debt refresh'),
+        (KIND_FULL, 'Full import'),
+    ]
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    run_id = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    source = models.CharField(max_length=500, blank=True)
+    task_id = models.CharField(max_length=255, blank=True)
+    rows_read = models.BigIntegerField(default=0)
+    # rows_upserted = rows_inserted + rows_updated; unchanged rows are not written
+    rows_upserted = models.BigIntegerField(default=0)
+    rows_inserted = models.BigIntegerField(default=0)
+    rows_updated = models.BigIntegerField(default=0)
+    rows_unchanged = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    read_seconds = models.FloatField(default=0)
+    transform_seconds = models.FloatField(default=0)
+    load_seconds = models.FloatField(default=0)
+    debt_refresh_seconds = models.FloatField(default=0)
+    # CSV of rejected rows with their reason codes (IMPORT_REJECT_DIR)
+    reject_file = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'api_import_run'
+        indexes = [models.Index(fields=['-started_at'], name='api_import_run_started_idx')]
+
+    @property
+    def elapsed_seconds(self):
+        return ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+
+    @property
+    def rows_per_sec(self):
+        elapsed = self.elapsed_seconds
+        return self.rows_read / elapsed if elapsed > 0 else 0.0
+
+
+class ImportCheckpoint(models.Model):
+    """
+    How far one step of an ImportRun has got. Steps that load in chunks
+    advance rows_done in the same transaction as each chunk, so a restarted
+    step skips exactly the rows that were committed. The rows of a run's
+    checkpoints are also its plan: resume_import rebuilds the pipeline from them.
+    """
+    STAGE_CUSTOMERS = 'customers'
+    STAGE_LOANS = 'loans'
+    STAGE_MERGE = 'merge'
+    STAGE_DEBTS = 'debts'
+    STAGE_CHOICES = [
+        (STAGE_CUSTOMERS, 'Customers'),
+        (STAGE_LOANS, 'Loan partition'),
+        (STAGE_MERGE, 'Loan merge'),
+        (STAGE_DEBTS, 'Debt refresh'),
+    ]
+
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name='checkpoints')
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES)
+    partition = models.IntegerField(default=0)
+    source = models.CharField(max_length=500, blank=True)
+    start_row = models.BigIntegerField(default=0)
+    stop_row = models.BigIntegerField(null=True, blank=True)
+    rows_done = models.BigIntegerField(default=0)
+    rows_loaded = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    done = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'api_import_checkpoint'
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'stage', 'partition'], name='api_import_checkpoint_step_uniq'),
+        ]
+
+    @property
+    def next_row(self):
+        return self.start_row + self.rows_done
+
+    def advance(self, rows, loaded=0, rejected=0):
+        """Record a committed chunk; call inside the chunk's transaction."""
+        self.rows_done += rows
+        self.rows_loaded += loaded
+        self.rows_rejected += rejected
+        self.save(update_fields=['rows_done', 'rows_loaded', 'rows_rejected', 'updated_at'])
+
+    def complete(self, loaded=None, rejected=None):
+        if loaded is not None:
+            self.rows_loaded = loaded
+        if rejected is not None:
+            self.rows_rejected = rejected
+        self.done = True
+        self.save(update_fields=['rows_loaded', 'rows_rejected', 'done', 'updated_at'])
@@ -0,0 +1,96 @@
+# api/pagination.py
+"""
+Keyset pagination and JSON streaming for /view-loans/.
+
+Pages are ordered by loan_id and continue after ?cursor=<last loan_id>, so
+every page costs one index range scan however deep the client has paged.
+The body stays a plain list; the next page is advertised in the Link and
+X-Next-Cursor headers. ?stream=1 returns all active loans as one JSON array
+written row by row from a server-side cursor. With DB_POOL_MODE=pgbouncer
+there are no server-side cursors, so the rows are fetched whole first and
+only the writing is streamed.
+"""
+from datetime import date
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .models import Loan
+from .serializers import CustomerLoanSerializer
+
+LOAN_FIELDS = ('loan_id', 'loan_amount', 'interest_rate', 'monthly_repayment', 'tenure', 'emIs_paid_on_time')
+
+loan_row = CustomerLoanSerializer().to_representation
+
+
+def page_params(query_params):
+    """(cursor, page_size, stream) from the query string; ValidationError on bad input."""
+    errors = {}
+    values = {}
+    for name, default in (('cursor', 0), ('page_size', settings.VIEW_LOANS_PAGE_SIZE)):
+        try:
+            values[name] = int(query_params.get(name, default))
+        except ValueError:
+            errors[name] = ["A valid integer is required."]
+    if 'page_size' in values and not 1 <= values['page_size'] <= settings.VIEW_LOANS_MAX_PAGE_SIZE:
+        errors['page_size'] = [f"Must be between 1 and {settings.VIEW_LOANS_MAX_PAGE_SIZE}."]
+    if errors:
+        raise ValidationError(errors)
+    stream = query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+    return values['cursor'], values['page_size'], stream
+
+
+def active_loans(customer_id, cursor=0):
+    queryset = (
+        Loan.objects
+        .filter(customer_id=customer_id, end_date__gte=date.today(), loan_id__gt=cursor)
+        .order_by('loan_id')
+        .values(*LOAN_FIELDS)
+    )
+    # Route now: a streamed response is iterated after the view has returned
+    return queryset.using(queryset.db)
+
+
+def split_page(values, page_size):
+    """(rows, next_cursor) from up to page_size + 1 fetched rows."""
+    rows = [loan_row(v) for v in values[:page_size]]
+    next_cursor = rows[-1]["loan_id"] if len(values) > page_size else None
+    return rows, next_cursor
+
+
+def add_next_link(response, request, next_cursor, page_size):
+    if next_cursor is None:
+        return response
+    query = request.GET.copy()
+    query['cursor'] = next_cursor
+    query['page_size'] = page_size
+    url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+    response['Link'] = f'<{url}>; rel="next"'
+    response['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+
+def _encoder():
+    """Row encoder of the configured JSON renderer, so streamed and paged rows match."""
+    return api_settings.DEFAULT_RENDERER_CLASSES[0]().render
+
+
+def stream_json_array(values):
+    """Encode an iterable of .values() dicts as a JSON array, one row at a time."""
+    encode = _encoder()
+    yield b'['
+    for n, v in enumerate(values):
+        yield (b',' if n else b'') + encode(loan_row(v))
+    yield b']'
+
+
+async def astream_json_array(values):
+    """stream_json_array for an async iterable."""
+    encode = _encoder()
+    yield b'['
+    n = 0
+    async for v in values:
+        yield (b',' if n else b'') + encode(loan_row(v))
+        n += 1
+    yield b']'
@@ -0,0 +1,264 @@
+# api/portfolio.py
+"""
+Portfolio rollups behind /portfolio/summary/.
+
+api_portfolio_member holds what each customer contributes to the portfolio
+figures (exposure, EMI load, repayment record) and the age band, salary
+band and credit-score slab it falls in; api_portfolio_rollup holds the sums
+per band. Loan and customer writes only queue the customer in
+api_portfolio_stale. refresh_portfolio recomputes the queued customers and
+those whose date-dependent figures expired, then adds the difference
+between their old and new member rows to the rollups; it re-aggregates the
+loans of those customers only. The summary reads the rollups as they are
+and reports when they were last brought up to date and how many customers
+are still waiting.
+"""
+from datetime import date
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .aggregates import refresh_aggregates
+from .models import PortfolioMember, PortfolioRollup, PortfolioStale
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory lock key: one refresh at a time applies deltas
+PORTFOLIO_LOCK = 7302
+# Set while a refresh_portfolio_rollups run is queued after a new loan
+SCHEDULED_KEY = 'portfolio:refresh:scheduled'
+
+# (lower bound, label) per band, in ascending order
+AGE_BANDS = [(0, 'under_25'), (25, '25_34'), (35, '35_44'), (45, '45_54'), (55, '55_plus')]
+SALARY_BANDS = [(0, 'under_25k'), (25000, '25k_50k'), (50000, '50k_1l'), (100000, '1l_2l'), (200000, '2l_plus')]
+# Slabs of evaluate_eligibility
+SCORE_SLABS = [(0, '0_10'), (11, '11_30'), (31, '31_50'), (51, '51_100')]
+SLAB_APPROVAL = {
+    '0_10': 'rejected',
+    '11_30': 'approved at 16% or more',
+    '31_50': 'approved at 12% or more',
+    '51_100': 'approved at requested rate',
+}
+DIMENSIONS = {'age_band': AGE_BANDS, 'salary_band': SALARY_BANDS, 'score_slab': SCORE_SLABS}
+
+VALUE_COLUMNS = [
+    'loans', 'total_volume', 'exposure', 'active_emi_sum', 'outstanding_debt',
+    'total_emis', 'emis_paid_on_time', 'over_emi_limit',
+]
+MEMBER_COLUMNS = ['customer_id', *DIMENSIONS, *VALUE_COLUMNS, 'valid_until']
+
+# Scoring factors as scoring.score_frame expects them, plus the member values
+MEMBER_SELECT = """
+    SELECT c.customer_id, c.age, c.monthly_salary::float8 AS salary,
+           (c.approved_limit * 100)::bigint AS limit_cents,
+           a.loan_count, a.total_emis, a.emis_paid_on_time, a.current_year_loans,
+           (a.total_volume * 100)::bigint AS total_volume_cents,
+           (a.active_loan_amount * 100)::bigint AS active_amount_cents,
+           a.total_volume, a.active_loan_amount AS exposure, a.active_emi_sum,
+           c.current_debt AS outstanding_debt,
+           (a.active_emi_sum > c.monthly_salary / 2)::int AS over_emi_limit,
+           a.valid_until
+    FROM api_customer c
+    JOIN api_customer_credit_aggregate a ON a.customer_id = c.customer_id
+    WHERE c.customer_id = ANY(%s)
+"""
+
+
+def _key(today):
+    return f"portfolio:summary:{today.isoformat()}"
+
+
+def queue_customers(cursor, customer_ids):
+    """Queue customers for the next refresh_portfolio."""
+    cursor.execute("""
+        INSERT INTO api_portfolio_stale (customer_id)
+        SELECT unnest(%s::integer[])
+        ON CONFLICT (customer_id) DO NOTHING
+    """, [list(customer_ids)])
+
+
+def schedule_refresh():
+    """
+    Queue refresh_portfolio_rollups PORTFOLIO_REFRESH_DELAY seconds from now,
+    unless a run is already queued; meant for transaction.on_commit.
+    """
+    from .tasks import refresh_portfolio_rollups
+
+    if cache.add(SCHEDULED_KEY, True, settings.PORTFOLIO_REFRESH_DELAY):
+        refresh_portfolio_rollups.apply_async(countdown=settings.PORTFOLIO_REFRESH_DELAY)
+
+
+def _band(values, bands):
+    import numpy as np
+
+    bounds, labels = zip(*bands)
+    index = np.searchsorted(bounds, values.to_numpy(dtype=float), side='right') - 1
+    return np.asarray(labels, dtype=object)[np.maximum(index, 0)]
+
+
+def _member_frame(cursor, customer_ids, today):
+    import pandas as pd
+
+    from .scoring import score_frame
+
+    refresh_aggregates(cursor, customer_ids, today)
+    cursor.execute(MEMBER_SELECT, [list(customer_ids)])
+    rows = pd.DataFrame.from_records(cursor.fetchall(), columns=[c.name for c in cursor.description])
+    return rows.assign(
+        age_band=_band(rows['age'], AGE_BANDS),
+        salary_band=_band(rows['salary'], SALARY_BANDS),
+        score_slab=_band(score_frame(rows), SCORE_SLABS),
+        loans=rows['loan_count'],
+    )[MEMBER_COLUMNS]
+
+
+def _apply(cursor, customer_ids, today):
+    """Replace the member rows of customer_ids and add the difference to the rollups."""
+    from .ingest import copy_frame
+
+    columns = ', '.join(MEMBER_COLUMNS)
+    cursor.execute("DROP TABLE IF EXISTS stage_portfolio_member")
+    cursor.execute("""
+        CREATE TEMP TABLE stage_portfolio_member (LIKE api_portfolio_member, sign integer DEFAULT 1)
+        ON COMMIT DROP
+    """)
+    copy_frame(cursor, 'stage_portfolio_member', _member_frame(cursor, customer_ids, today))
+    # Old rows are staged with sign -1, so the rollup change is one grouped sum
+    cursor.execute(f"""
+        WITH old AS (
+            DELETE FROM api_portfolio_member WHERE customer_id = ANY(%s) RETURNING {columns}
+        )
+        INSERT INTO stage_portfolio_member ({columns}, sign) SELECT {columns}, -1 FROM old
+    """, [list(customer_ids)])
+    cursor.execute(f"""
+        INSERT INTO api_portfolio_member ({columns})
+        SELECT {columns} FROM stage_portfolio_member WHERE sign = 1
+    """)
+
+    sums = ', '.join(f'SUM(s.sign * s.{c})' for c in VALUE_COLUMNS)
+    values = ', '.join(['customers', *VALUE_COLUMNS])
+    bands = ', '.join(f"('{dimension}', s.{dimension})" for dimension in DIMENSIONS)
+    updates = ', '.join(f'{c} = api_portfolio_rollup.{c} + EXCLUDED.{c}' for c in ['customers', *VALUE_COLUMNS])
+    cursor.execute(f"""
+        INSERT INTO api_portfolio_rollup (dimension, band, {values})
+        SELECT d.dimension, d.band, SUM(s.sign), {sums}
+        FROM stage_portfolio_member s
+        CROSS JOIN LATERAL (VALUES ('total', 'all'), {bands}) AS d(dimension, band)
+        GROUP BY d.dimension, d.band
+        ON CONFLICT (dimension, band) DO UPDATE SET {updates}
+    """)
+    cursor.execute("DELETE FROM api_portfolio_rollup WHERE customers = 0")
+
+
+def _lock(cursor, wait=False):
+    """Take PORTFOLIO_LOCK until the end of the transaction. Returns False if another refresh holds it."""
+    if wait:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [PORTFOLIO_LOCK])
+        return True
+    cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [PORTFOLIO_LOCK])
+    return cursor.fetchone()[0]
+
+
+def _queue_expired(cursor, today, rebuild):
+    """Queue the members that expired before today, or every customer for a first build. Returns the queue length."""
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM api_portfolio_rollup WHERE dimension = 'total')")
+    if rebuild or not cursor.fetchone()[0]:
+        cursor.execute("DELETE FROM api_portfolio_rollup")
+        cursor.execute("DELETE FROM api_portfolio_member")
+        cursor.execute("""
+            INSERT INTO api_portfolio_stale (customer_id)
+            SELECT customer_id FROM api_customer
+            ON CONFLICT (customer_id) DO NOTHING
+        """)
+    else:
+        cursor.execute("""
+            INSERT INTO api_portfolio_stale (customer_id)
+            SELECT customer_id FROM api_portfolio_member WHERE valid_until < %s
+            ON CONFLICT (customer_id) DO NOTHING
+        """, [today])
+    cursor.execute("SELECT count(*) FROM api_portfolio_stale")
+    return cursor.fetchone()[0]
+
+
+def refresh_portfolio(today=None, rebuild=False):
+    """
+    Bring the rollups up to date with the queued customers and the members
+    whose figures expired before today; a portfolio without rollups yet is
+    built in full. The queue is drained SCORING_CHUNK_SIZE customers per
+    transaction, so an interrupted refresh leaves the rest queued. Returns
+    the customers recomputed, or None when another refresh holds the lock
+    (the queue is left for it or the next one).
+    """
+    today = today or date.today()
+    size = settings.SCORING_CHUNK_SIZE
+    refreshed = 0
+    with connection.cursor() as cursor:
+        with transaction.atomic():
+            if not _lock(cursor, wait=rebuild):
+                return None
+            pending = _queue_expired(cursor, today, rebuild)
+
+        # Customers queued from here on are left for the next refresh
+        for _ in range(-(-pending // size)):
+            with transaction.atomic():
+                if not _lock(cursor):
+                    break
+                cursor.execute("""
+                    DELETE FROM api_portfolio_stale WHERE customer_id = ANY(ARRAY(
+                        SELECT customer_id FROM api_portfolio_stale ORDER BY customer_id LIMIT %s
+                    ))
+                    RETURNING customer_id
+                """, [size])
+                customer_ids = sorted(row[0] for row in cursor.fetchall())
+                if customer_ids:
+                    _apply(cursor, customer_ids, today)
+            refreshed += len(customer_ids)
+            logger.info(f"Portfolio rollups: {refreshed}/{pending} queued customers applied")
+        else:
+            cursor.execute(
+                "UPDATE api_portfolio_rollup SET refreshed_at = now() WHERE dimension = 'total'"
+            )
+    if refreshed:
+        transaction.on_commit(lambda: cache.delete(_key(today)))
+    return refreshed
+
+
+def rebuild_portfolio(today=None):
+    """Drop the rollups and build them again from every customer."""
+    return refresh_portfolio(today, rebuild=True)
+
+
+def _figures(row):
+    figures = {c: row[c] for c in ['customers', *VALUE_COLUMNS] if c not in ('total_emis', 'emis_paid_on_time')}
+    figures['on_time_ratio'] = round(row['emis_paid_on_time'] / row['total_emis'], 4) if row['total_emis'] else None
+    return figures
+
+
+def portfolio_summary(today=None):
+    """
+    Totals and per-band breakdowns from the rollups as they stand, cached
+    per day for PORTFOLIO_CACHE_TTL seconds. as_of is when a refresh last
+    ran to the end (None before the first build); stale_customers counts
+    the customers queued or expired that it has not applied.
+    """
+    today = today or date.today()
+    summary = cache.get(_key(today))
+    if summary is not None:
+        return summary
+
+    rows = {(r['dimension'], r['band']): r for r in PortfolioRollup.objects.values()}
+    stale = PortfolioStale.objects.values('customer_id').union(
+        PortfolioMember.objects.filter(valid_until__lt=today).values('customer_id')
+    ).count()
+    total = rows.get(('total', 'all'), {**dict.fromkeys(['customers', *VALUE_COLUMNS], 0), 'refreshed_at': None})
+    summary = {'as_of': total['refreshed_at'], 'stale_customers': stale, 'total': _figures(total)}
+    for dimension, bands in DIMENSIONS.items():
+        summary[f'by_{dimension}'] = [
+            {'band': label, **_figures(rows[(dimension, label)]),
+             **({'approval': SLAB_APPROVAL[label]} if dimension == 'score_slab' else {})}
+            for _, label in bands if (dimension, label) in rows
+        ]
+    cache.set(_key(today), summary, settings.PORTFOLIO_CACHE_TTL)
+    return summary
@@ -0,0 +1,131 @@
+# api/progress.py
+"""
+Progress reporting for the ingestion tasks.
+
+ImportProgress accumulates row counters and stage timings for one
+ImportRun. It publishes them as Celery task state (state PROGRESS, with the
+counters as meta) and adds them to the ImportRun row, at most every
+IMPORT_PROGRESS_INTERVAL seconds and always when the task finishes.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ImportCheckpoint, ImportRun
+
+STAGES = ('read', 'transform', 'load', 'debt_refresh')
+COUNTERS = ('rows_read', 'rows_upserted', 'rows_inserted', 'rows_updated', 'rows_unchanged', 'rows_rejected')
+
+
+def _column(key):
+    return f'{key}_seconds' if key in STAGES else key
+
+
+class ImportProgress:
+    """
+    Tracks one task's share of an ImportRun. Only the task whose kind matches
+    the run's kind marks it finished; stages of a larger run just add to it.
+    """
+
+    def __init__(self, run, kind, task=None):
+        self.run = run
+        self.owner = run.kind == kind
+        self.task = task
+        self.started = time.monotonic()
+        self.totals = dict.fromkeys(COUNTERS + STAGES, 0)
+        self._pending = dict.fromkeys(COUNTERS + STAGES, 0)
+        self._flushed = self.started
+
+    @classmethod
+    def start(cls, kind, run_id=None, source='', task=None):
+        """Progress for run_id (created if new) or for a fresh run of this kind."""
+        task_id = (task.request.id if task is not None else None) or ''
+        if run_id is None:
+            run = ImportRun.objects.create(
+                run_id=task_id or uuid.uuid4().hex, kind=kind, source=source, task_id=task_id
+            )
+        else:
+            run, _ = ImportRun.objects.get_or_create(
+                run_id=run_id, defaults={'kind': kind, 'source': source, 'task_id': task_id}
+            )
+        return cls(run, kind, task)
+
+    def checkpoint(self, stage, partition=0, **defaults):
+        """The run's ImportCheckpoint for one step, created with defaults on first use."""
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            run=self.run, stage=stage, partition=partition, defaults=defaults
+        )
+        return checkpoint
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - started)
+
+    def timed(self, iterable, name='read'):
+        """Iterate, charging the time spent producing each item to stage name."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add(self, read=0, inserted=0, updated=0, unchanged=0, rejected=0):
+        self._add('rows_read', read)
+        self._add('rows_upserted', inserted + updated)
+        self._add('rows_inserted', inserted)
+        self._add('rows_updated', updated)
+        self._add('rows_unchanged', unchanged)
+        self._add('rows_rejected', rejected)
+        self.publish()
+
+    def _add(self, key, value):
+        self.totals[key] += value
+        self._pending[key] += value
+
+    def meta(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            'run_id': self.run.run_id,
+            'kind': self.run.kind,
+            **{key: self.totals[key] for key in COUNTERS},
+            'rows_per_sec': self.totals['rows_read'] / elapsed if elapsed > 0 else 0.0,
+            'stage_seconds': {stage: self.totals[stage] for stage in STAGES if self.totals[stage]},
+        }
+
+    def publish(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._flushed < settings.IMPORT_PROGRESS_INTERVAL:
+            return
+        self._flushed = now
+        if self.task is not None and self.task.request.id and not self.task.request.is_eager:
+            self.task.update_state(state='PROGRESS', meta=self.meta())
+        self.flush()
+
+    def flush(self, **fields):
+        changes = {_column(key): F(_column(key)) + value for key, value in self._pending.items() if value}
+        changes.update(fields)
+        if changes:
+            ImportRun.objects.filter(pk=self.run.pk).update(updated_at=timezone.now(), **changes)
+        self._pending = dict.fromkeys(self._pending, 0)
+
+    def finish(self):
+        """Flush the counters; the run is marked succeeded if this task owns it."""
+        if self.owner:
+            self.flush(status=ImportRun.STATUS_SUCCEEDED, finished_at=timezone.now())
+        else:
+            self.flush()
+
+    def fail(self, error):
+        """Flush the counters and mark the whole run failed."""
+        self.flush(status=ImportRun.STATUS_FAILED, error=str(error)[:2000], finished_at=timezone.now())
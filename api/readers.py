@@ -0,0 +1,230 @@
+# api/readers.py
+"""
+Chunked readers for the ingestion input files.
+
+xlsx, CSV, Parquet and Arrow IPC (file or stream) are all read in bounded
+chunks of raw rows with the file's own header, so customer_frame() and
+loan_frame() see the same columns whatever the format. start/stop select
+a range of data rows (0-based, header excluded) for loan partitions and
+resumed imports. Parquet and Arrow need pyarrow and are memory-mapped:
+Arrow row ranges are zero-copy slices, Parquet skips whole row groups
+before start. xlsx cannot seek, so a partitioned import first spools the
+sheet to Parquet once (spool_excel) and partitions that.
+"""
+import os
+from itertools import islice
+
+import pandas as pd
+
+FORMATS = ('xlsx', 'csv', 'parquet', 'arrow')
+
+EXTENSIONS = {
+    '.xlsx': 'xlsx', '.xlsm': 'xlsx',
+    '.csv': 'csv', '.txt': 'csv',
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow', '.arrows': 'arrow',
+}
+
+
+def detect_format(file_path):
+    """Input format from the file's magic bytes, falling back to its extension (then CSV)."""
+    with open(file_path, 'rb') as f:
+        magic = f.read(8)
+    if magic.startswith(b'PK\x03\x04'):
+        return 'xlsx'
+    if magic.startswith(b'PAR1'):
+        return 'parquet'
+    if magic.startswith(b'ARROW1') or magic.startswith(b'\xff\xff\xff\xff'):
+        return 'arrow'
+    return EXTENSIONS.get(os.path.splitext(str(file_path))[1].lower(), 'csv')
+
+
+def read_chunks(file_path, chunk_size, start=0, stop=None):
+    """Yield DataFrames of at most chunk_size data rows from any supported format."""
+    return READERS[detect_format(file_path)](file_path, chunk_size, start, stop)
+
+
+def count_rows(file_path):
+    """Number of data rows, as read_chunks() would yield them."""
+    return COUNTERS[detect_format(file_path)](file_path)
+
+
+def _strip_header(frame):
+    frame.columns = [str(c).strip() for c in frame.columns]
+    return frame
+
+
+def _window(frames, chunk_size, start=0, stop=None, first_row=0):
+    """
+    Re-cut frames holding consecutive data rows (the first one is row
+    first_row) into frames of exactly chunk_size rows covering [start, stop).
+    """
+    pending, pending_rows, row = [], 0, first_row
+    for frame in frames:
+        low = max(start - row, 0)
+        high = len(frame) if stop is None else min(len(frame), stop - row)
+        row += len(frame)
+        if high > low:
+            pending.append(frame.iloc[low:high])
+            pending_rows += high - low
+            while pending_rows >= chunk_size:
+                merged = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+                yield merged.iloc[:chunk_size].reset_index(drop=True)
+                pending = [merged.iloc[chunk_size:]]
+                pending_rows -= chunk_size
+        if stop is not None and row >= stop:
+            break
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+# xlsx: openpyxl read-only streaming; skipped rows are still parsed. The file
+# is passed as a file object since openpyxl refuses unknown extensions.
+
+def _data_rows(workbook):
+    rows = workbook.active.iter_rows(values_only=True)
+    header = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+    return header, (row for row in rows if any(v is not None for v in row))
+
+
+def count_excel_rows(file_path):
+    """Number of non-empty data rows in the first sheet."""
+    from openpyxl import load_workbook
+
+    with open(file_path, 'rb') as f:
+        workbook = load_workbook(f, read_only=True, data_only=True)
+        try:
+            _, rows = _data_rows(workbook)
+            return sum(1 for _ in rows)
+        finally:
+            workbook.close()
+
+
+def read_excel_chunks(file_path, chunk_size, start=0, stop=None):
+    """Yield DataFrames of at most chunk_size rows from the first sheet."""
+    from openpyxl import load_workbook
+
+    with open(file_path, 'rb') as f:
+        workbook = load_workbook(f, read_only=True, data_only=True)
+        try:
+            header, rows = _data_rows(workbook)
+            rows = islice(rows, start, stop)
+            while True:
+                batch = list(islice(rows, chunk_size))
+                if not batch:
+                    break
+                yield pd.DataFrame.from_records(batch, columns=header)
+        finally:
+            workbook.close()
+
+
+def spool_excel(file_path, dest, chunk_size):
+    """
+    Copy the first sheet to a Parquet file at dest, one row group per
+    chunk_size rows, and return its row count. Cells are written as text,
+    as the CSV reader yields them.
+    """
+    pa = _pyarrow()
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    writer, total = None, 0
+    try:
+        for chunk in read_excel_chunks(file_path, chunk_size):
+            table = pa.Table.from_pandas(chunk.astype('string'), preserve_index=False)
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(dest, table.schema)
+            writer.write_table(table, row_group_size=chunk_size)
+            total += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+# CSV: pandas' C parser over a memory map. Every value is read as text, like
+# the cells customer_frame()/loan_frame() coerce, so ids and phone numbers
+# never go through float.
+
+def _csv_reader(file_path, chunk_size, **kwargs):
+    return pd.read_csv(
+        file_path, chunksize=chunk_size, dtype=str, memory_map=True, **kwargs
+    )
+
+
+def count_csv_rows(file_path):
+    with _csv_reader(file_path, 1000000, usecols=[0]) as reader:
+        return sum(len(chunk) for chunk in reader)
+
+
+def read_csv_chunks(file_path, chunk_size, start=0, stop=None):
+    with _csv_reader(file_path, chunk_size) as reader:
+        yield from _window((_strip_header(chunk) for chunk in reader), chunk_size, start, stop)
+
+
+# Parquet and Arrow IPC (pyarrow)
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("Reading Parquet or Arrow files needs pyarrow (pip install pyarrow)") from exc
+    return pyarrow
+
+
+def _to_frame(table):
+    return _strip_header(table.to_pandas(date_as_object=True))
+
+
+def count_parquet_rows(file_path):
+    return _pyarrow().parquet.ParquetFile(file_path, memory_map=True).metadata.num_rows
+
+
+def read_parquet_chunks(file_path, chunk_size, start=0, stop=None):
+    parquet = _pyarrow().parquet.ParquetFile(file_path, memory_map=True)
+    groups, first_row, row = [], None, 0
+    for n in range(parquet.num_row_groups):
+        rows = parquet.metadata.row_group(n).num_rows
+        if row + rows > start and (stop is None or row < stop):
+            groups.append(n)
+            first_row = row if first_row is None else first_row
+        row += rows
+    if not groups:
+        return
+    batches = parquet.iter_batches(batch_size=chunk_size, row_groups=groups)
+    yield from _window((_to_frame(batch) for batch in batches), chunk_size, start, stop, first_row)
+
+
+def _arrow_table(file_path):
+    """The whole IPC file or stream as a Table backed by a memory map (no copy)."""
+    pa = _pyarrow()
+    source = pa.memory_map(str(file_path))
+    if source.read(6) == b'ARROW1':
+        return pa.ipc.open_file(source).read_all()
+    source.seek(0)
+    return pa.ipc.open_stream(source).read_all()
+
+
+def count_arrow_rows(file_path):
+    return _arrow_table(file_path).num_rows
+
+
+def read_arrow_chunks(file_path, chunk_size, start=0, stop=None):
+    table = _arrow_table(file_path)
+    stop = table.num_rows if stop is None else min(stop, table.num_rows)
+    for offset in range(start, stop, chunk_size):
+        yield _to_frame(table.slice(offset, min(chunk_size, stop - offset)))
+
+
+READERS = {
+    'xlsx': read_excel_chunks,
+    'csv': read_csv_chunks,
+    'parquet': read_parquet_chunks,
+    'arrow': read_arrow_chunks,
+}
+COUNTERS = {
+    'xlsx': count_excel_rows,
+    'csv': count_csv_rows,
+    'parquet': count_parquet_rows,
+    'arrow': count_arrow_rows,
+}
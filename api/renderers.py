@@ -0,0 +1,33 @@
+# api/renderers.py
+"""
+orjson-backed JSON renderer, switched on with FAST_JSON_RENDERER.
+
+Output matches rest_framework's JSONRenderer for this API's bodies:
+compact UTF-8 JSON. Dates, numpy scalars and dict/list subclasses
+(ReturnDict, ReturnList) are encoded natively and Decimal as a float, as
+the REST framework encoder does; anything else, such as lazy translation
+strings, goes through that encoder's default(). The ?indent= media type
+parameter is ignored.
+"""
+from decimal import Decimal
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+_fallback = JSONEncoder().default
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return _fallback(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=OPTIONS)
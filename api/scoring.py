@@ -0,0 +1,114 @@
+# api/scoring.py
+"""
+Vectorized credit scoring for the whole portfolio.
+
+Mirrors credit_rules.score_from_aggregate, but computes the five factors for every
+customer at once from api_loan pulled in columnar chunks. Money is read as
+integer cents so the per-customer sums are exact and the float arithmetic
+matches the per-customer function operation for operation.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .ingest import copy_frame
+
+FACTOR_COLUMNS = [
+    'loan_count', 'total_emis', 'emis_paid_on_time',
+    'total_volume_cents', 'current_year_loans', 'active_amount_cents',
+]
+
+
+def loan_factors(connection, chunk_size, today=None):
+    """
+    Per-customer factor totals over api_loan, indexed by customer_id. The
+    rows come through a server-side cursor chunk_size at a time, except
+    behind PgBouncer (DB_POOL_MODE=pgbouncer disables server-side cursors),
+    where the whole result is fetched before the first chunk.
+    """
+    today = today or date.today()
+    parts = []
+    with connection.chunked_cursor() as cursor:
+        cursor.execute("""
+            SELECT customer_id,
+                   1 AS loan_count,
+                   tenure AS total_emis,
+                   "emIs_paid_on_time" AS emis_paid_on_time,
+                   (loan_amount * 100)::bigint AS total_volume_cents,
+                   (start_date BETWEEN %s AND %s)::int AS current_year_loans,
+                   CASE WHEN end_date >= %s THEN (loan_amount * 100)::bigint ELSE 0 END AS active_amount_cents
+            FROM api_loan
+            ORDER BY customer_id
+        """, [date(today.year, 1, 1), date(today.year, 12, 31), today])
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = pd.DataFrame.from_records(rows, columns=['customer_id'] + FACTOR_COLUMNS)
+            parts.append(chunk.groupby('customer_id').sum())
+    if not parts:
+        return pd.DataFrame(columns=FACTOR_COLUMNS, dtype='int64')
+    # Chunks are ordered by customer_id, so only boundary customers appear twice
+    return pd.concat(parts).groupby(level=0).sum()
+
+
+def customer_limits(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT customer_id, (approved_limit * 100)::bigint FROM api_customer")
+        rows = cursor.fetchall()
+    return pd.DataFrame.from_records(rows, columns=['customer_id', 'limit_cents'], index='customer_id')
+
+
+def score_frame(factors):
+    """
+    Credit score per row of a frame holding FACTOR_COLUMNS and limit_cents.
+    Customers without loans score 100, as in score_from_aggregate.
+    """
+    loan_count = factors['loan_count'].to_numpy()
+    total_emis = factors['total_emis'].to_numpy()
+    on_time = factors['emis_paid_on_time'].to_numpy()
+    limit = factors['limit_cents'].to_numpy() / 100
+    total_volume = factors['total_volume_cents'].to_numpy() / 100
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        on_time_score = np.where(total_emis > 0, (on_time / total_emis) * 30, 30)
+        volume_score = np.where(limit > 0, np.minimum(total_volume / limit * 20, 20), 0)
+    num_loans_score = np.maximum(20 - loan_count * 2, 0)
+    activity_score = np.where(factors['current_year_loans'].to_numpy() > 0, 20, 10)
+
+    score = (on_time_score + num_loans_score + activity_score + volume_score).astype('int64')
+    score = np.where(factors['active_amount_cents'].to_numpy() > factors['limit_cents'].to_numpy(), 0, score)
+    score = np.where(loan_count == 0, 100, score)
+    return pd.Series(score, index=factors.index, name='score')
+
+
+def portfolio_scores(connection, chunk_size, today=None):
+    """Credit score of every customer as a Series indexed by customer_id."""
+    factors = customer_limits(connection).join(loan_factors(connection, chunk_size, today), how='left')
+    factors[FACTOR_COLUMNS] = factors[FACTOR_COLUMNS].fillna(0).astype('int64')
+    return score_frame(factors)
+
+
+def store_scores(cursor, scores, today=None):
+    """Bulk upsert a score Series into api_credit_score."""
+    frame = pd.DataFrame({
+        'customer_id': scores.index,
+        'score': scores.to_numpy(),
+        'scored_on': today or date.today(),
+    })
+    cursor.execute("DROP TABLE IF EXISTS stage_credit_score")
+    cursor.execute("""
+        CREATE TEMP TABLE stage_credit_score (
+            customer_id integer, score integer, scored_on date
+        ) ON COMMIT DROP
+    """)
+    copy_frame(cursor, 'stage_credit_score', frame)
+    cursor.execute("""
+        INSERT INTO api_credit_score (customer_id, score, scored_on)
+        SELECT customer_id, score, scored_on FROM stage_credit_score
+        ON CONFLICT (customer_id) DO UPDATE SET
+            score = EXCLUDED.score,
+            scored_on = EXCLUDED.scored_on
+    """)
+    return cursor.rowcount
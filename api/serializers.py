@@ -1,6 +1,11 @@
 # api/serializers.py
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
 from rest_framework import serializers
-from .models import Customer, Loan
+from . import amortization
+from .models import Customer
+from .utils import approved_limits
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -12,7 +17,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         monthly_salary = validated_data.pop('monthly_salary')
-        approved_limit = round(36 * monthly_salary / 100000) * 100000
+        approved_limit = int(approved_limits([monthly_salary])[0])
         return Customer.objects.create(
             **validated_data,
             monthly_salary=monthly_salary,
@@ -21,16 +26,39 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
 
 
-class CustomerResponseSerializer(serializers.ModelSerializer):
-    name = serializers.SerializerMethodField()
-    monthly_income = serializers.IntegerField(source='monthly_salary')
+class LeanSerializer(ABC):
+    """
+    Read-only serializer for response bodies. to_representation builds a
+    whole body in one call instead of running a DRF field per attribute,
+    and money goes out as float, as the JSON encoder would render a Decimal,
+    so the renderer never needs a fallback. Same .data as a DRF serializer.
+    """
+    def __init__(self, instance=None, many=False):
+        self.instance = instance
+        self.many = many
 
-    class Meta:
-        model = Customer
-        fields = ['customer_id', 'name', 'age', 'monthly_income', 'approved_limit', 'phone_number']
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(obj) for obj in self.instance]
+        return self.to_representation(self.instance)
 
-    def get_name(self, obj):
-        return f"{obj.first_name} {obj.last_name}"
+    @abstractmethod
+    def to_representation(self, obj):
+        """The response body for one object."""
+
+
+class CustomerResponseSerializer(LeanSerializer):
+    """/register/ body; approved_limit stays the two-decimal string the ModelSerializer gave."""
+    def to_representation(self, customer):
+        return {
+            "customer_id": customer.customer_id,
+            "name": f"{customer.first_name} {customer.last_name}",
+            "age": customer.age,
+            "monthly_income": int(customer.monthly_salary),
+            "approved_limit": f"{customer.approved_limit:.2f}",
+            "phone_number": customer.phone_number,
+        }
 
 
 class CheckEligibilityRequestSerializer(serializers.Serializer):
@@ -47,32 +75,59 @@ class CreateLoanRequestSerializer(serializers.Serializer):
     tenure = serializers.IntegerField(min_value=1)
 
 
-class LoanDetailSerializer(serializers.ModelSerializer):
-    customer = serializers.SerializerMethodField()
-    monthly_installment = serializers.FloatField(source='monthly_repayment')
-
-    class Meta:
-        model = Loan
-        fields = ['loan_id', 'customer', 'loan_amount', 'interest_rate', 'monthly_installment', 'tenure']
-
-    def get_customer(self, obj):
-        c = obj.customer
+class LoanDetailSerializer(LeanSerializer):
+    """/view-loan/ body; the loan needs its customer loaded (select_related)."""
+    def to_representation(self, loan):
+        customer = loan.customer
         return {
-            "id": c.customer_id,
-            "first_name": c.first_name,
-            "last_name": c.last_name,
-            "phone_number": c.phone_number,
-            "age": c.age
+            "loan_id": loan.loan_id,
+            "customer": {
+                "id": customer.customer_id,
+                "first_name": customer.first_name,
+                "last_name": customer.last_name,
+                "phone_number": customer.phone_number,
+                "age": customer.age
+            },
+            "loan_amount": float(loan.loan_amount),
+            "interest_rate": float(loan.interest_rate),
+            "monthly_installment": float(loan.monthly_repayment),
+            "tenure": loan.tenure
         }
 
 
-class CustomerLoanSerializer(serializers.ModelSerializer):
-    monthly_installment = serializers.FloatField(source='monthly_repayment')
-    repayments_left = serializers.SerializerMethodField()
+class LoanScheduleSerializer(LeanSerializer):
+    """/view-loan/<id>/schedule/ body: the loan with its full amortization table."""
+    def to_representation(self, loan):
+        plan = amortization.schedule(loan.loan_amount, loan.interest_rate, loan.tenure)
+        rows = zip(*(plan[k].tolist() for k in ('period', 'installment', 'interest', 'principal', 'balance')))
+        return {
+            "loan_id": loan.loan_id,
+            "loan_amount": float(loan.loan_amount),
+            "interest_rate": float(loan.interest_rate),
+            "tenure": loan.tenure,
+            "monthly_installment": round(float(amortization.emi(loan.loan_amount, loan.interest_rate, loan.tenure)), 2),
+            "schedule": [
+                {
+                    "period": period,
+                    # Approximate due dates (30 days per month), as for end_date
+                    "due_date": loan.start_date + timedelta(days=30 * period),
+                    "installment": round(installment, 2),
+                    "interest": round(interest, 2),
+                    "principal": round(principal, 2),
+                    "balance": round(balance, 2),
+                }
+                for period, installment, interest, principal, balance in rows
+            ]
+        }
 
-    class Meta:
-        model = Loan
-        fields = ['loan_id', 'loan_amount', 'interest_rate', 'monthly_installment', 'repayments_left']
 
-    def get_repayments_left(self, obj):
-        return obj.tenure - obj.emIs_paid_on_time
\ No newline at end of file
+class CustomerLoanSerializer(LeanSerializer):
+    """/view-loans/ rows, from Loan .values() dicts (pagination.LOAN_FIELDS)."""
+    def to_representation(self, values):
+        return {
+            "loan_id": values['loan_id'],
+            "loan_amount": float(values['loan_amount']),
+            "interest_rate": float(values['interest_rate']),
+            "monthly_installment": float(values['monthly_repayment']),
+            "repayments_left": values['tenure'] - values['emIs_paid_on_time']
+        }
@@ -0,0 +1,35 @@
+# api/signals.py
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .aggregates import refresh_aggregates
+from .credit_cache import invalidate_credit
+from .models import Customer, Loan
+from .portfolio import queue_customers
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+def refresh_customer_aggregate(sender, instance, **kwargs):
+    """Keep the owner's credit aggregate and cached score in step with ORM writes to api_loan."""
+    # Loans cascading from a customer delete: the aggregate row goes with the
+    # customer, and refreshing it would recreate a row the delete never sees
+    if isinstance(kwargs.get('origin'), Customer):
+        return
+    with connection.cursor() as cursor:
+        refresh_aggregates(cursor, [instance.customer_id])
+        queue_customers(cursor, [instance.customer_id])
+    transaction.on_commit(lambda: invalidate_credit([instance.customer_id]))
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def queue_portfolio_customer(sender, instance, **kwargs):
+    """
+    Queue the customer for the portfolio rollups. Applying the change here
+    would make every loan write lock the shared total rows, so it is left
+    to refresh_portfolio.
+    """
+    with connection.cursor() as cursor:
+        queue_customers(cursor, [instance.customer_id])
@@ -0,0 +1,157 @@
+# api/synthetic.py
+"""
+Synthetic customer and loan data for load tests and benchmarks.
+
+Frames carry the headers of customer_data.xlsx and loan_data.xlsx, so they
+can be written to files and fed to the ingestion tasks unchanged, or loaded
+straight into the tables with load_frames(). Generation is chunked and
+seeded per chunk: the same arguments always produce the same rows, and
+millions of loans never have to sit in memory at once.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from . import amortization
+from .aggregates import refresh_aggregates
+from .debts import refresh_current_debts
+from .ingest import LOAN_COLUMNS, copy_frame, sync_sequence
+from .portfolio import queue_customers
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Sara']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Reddy', 'Khan', 'Gupta', 'Singh', 'Das', 'Nair', 'Joshi']
+TENURES = np.array([6, 12, 18, 24, 36, 48, 60, 72, 84, 96, 108, 120])
+
+
+def _chunks(count, chunk_size):
+    for n, start in enumerate(range(0, count, chunk_size)):
+        yield n, start, min(chunk_size, count - start)
+
+
+def customer_chunks(count, first_id=1, seed=0, chunk_size=100000):
+    """Yield customer frames (customer_data.xlsx columns) with ids first_id .. first_id + count - 1."""
+    for n, start, size in _chunks(count, chunk_size):
+        rng = np.random.default_rng([seed, 0, n])
+        ids = np.arange(first_id + start, first_id + start + size)
+        salary = rng.integers(15, 301, size) * 1000
+        yield pd.DataFrame({
+            'customer_id': ids,
+            'first_name': rng.choice(FIRST_NAMES, size),
+            'last_name': rng.choice(LAST_NAMES, size),
+            'age': rng.integers(21, 66, size),
+            'phone_number': (9000000000 + ids).astype(str),
+            'monthly_salary': salary,
+            # Same rule as registration: 36 x salary, to the nearest lakh
+            'approved_limit': (np.round(36 * salary / 100000) * 100000).astype('int64'),
+        })
+
+
+def loan_chunks(count, customer_ids, first_id=1, seed=0, chunk_size=100000, today=None):
+    """
+    Yield loan frames (loan_data.xlsx columns) with ids first_id .. first_id + count - 1,
+    spread uniformly over customer_ids (a (low, high) inclusive range). About
+    half of the loans are still running on `today`.
+    """
+    today = pd.Timestamp(today or date.today())
+    low, high = customer_ids
+    for n, start, size in _chunks(count, chunk_size):
+        rng = np.random.default_rng([seed, 1, n])
+        tenure = rng.choice(TENURES, size)
+        amount = rng.integers(50, 1001, size) * 1000
+        rate = np.round(rng.uniform(6, 18, size), 2)
+        start_date = today - pd.to_timedelta(rng.integers(0, 8 * 365, size), unit='D')
+        end_date = start_date + pd.to_timedelta(30 * tenure, unit='D')
+        yield pd.DataFrame({
+            'customer id': rng.integers(low, high + 1, size),
+            'loan id': np.arange(first_id + start, first_id + start + size),
+            'loan amount': amount,
+            'tenure': tenure,
+            'interest rate': rate,
+            'monthly repayment (emi)': np.round(amortization.emi(amount, rate, tenure), 2),
+            'EMIs paid on time': rng.integers(0, tenure + 1),
+            'start date': start_date.date,
+            'end date': end_date.date,
+        })
+
+
+def write_frames(frames, path):
+    """
+    Stream frames into one .csv, .parquet, .arrow or .xlsx file, chosen by
+    extension. Parquet gets one row group and Arrow one record batch per
+    frame. Returns the rows written.
+    """
+    rows = 0
+    if str(path).endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            for frame in frames:
+                frame.to_csv(f, header=rows == 0, index=False)
+                rows += len(frame)
+        return rows
+    if str(path).endswith(('.parquet', '.arrow')):
+        return _write_arrow(frames, path)
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for frame in frames:
+        if rows == 0:
+            sheet.append(list(frame.columns))
+        for row in frame.itertuples(index=False):
+            sheet.append([v.item() if isinstance(v, np.generic) else v for v in row])
+        rows += len(frame)
+    workbook.save(path)
+    return rows
+
+
+def _write_arrow(frames, path):
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    import pyarrow.parquet  # noqa: F401
+
+    rows, writer = 0, None
+    try:
+        for frame in frames:
+            batch = pa.RecordBatch.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = (
+                    pa.parquet.ParquetWriter(path, batch.schema) if str(path).endswith('.parquet')
+                    else pa.ipc.new_file(path, batch.schema)
+                )
+            writer.write_batch(batch)
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def load_frames(cursor, customer_frames, loan_frames, today=None):
+    """
+    COPY generated customers and loans straight into api_customer / api_loan,
+    then compute current_debt and credit aggregates for the new customers
+    and queue them for the portfolio rollups.
+    Ids must not collide with existing rows. Returns (customers, loans).
+    """
+    customer_ids = []
+    for frame in customer_frames:
+        copy_frame(cursor, 'api_customer', frame.assign(current_debt=0))
+        customer_ids.extend(frame['customer_id'].tolist())
+    loans = 0
+    for frame in loan_frames:
+        copy_frame(cursor, 'api_loan', frame.rename(columns=LOAN_COLUMNS))
+        loans += len(frame)
+    sync_sequence(cursor, 'api_customer', 'customer_id')
+    sync_sequence(cursor, 'api_loan', 'loan_id')
+    refresh_current_debts(cursor, customer_ids)
+    refresh_aggregates(cursor, customer_ids, today or date.today())
+    queue_customers(cursor, customer_ids)
+    return len(customer_ids), loans
+
+
+def next_ids(cursor):
+    """First unused (customer_id, loan_id), so generated rows never overwrite real ones."""
+    cursor.execute("SELECT COALESCE(MAX(customer_id), 0) + 1 FROM api_customer")
+    customer_id = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(loan_id), 0) + 1 FROM api_loan")
+    return customer_id, cursor.fetchone()[0]
@@ -1,199 +1,459 @@
 # api/tasks.py
-import pandas as pd
-from django.db import connection, transaction
-from celery import shared_task, chain
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections, transaction
+from celery import shared_task, chain, chord, group
+from datetime import date
+from itertools import islice
 import logging
+import os
+import time
+import uuid
+
+from .aggregates import rebuild_aggregates, refresh_aggregates
+from .credit_cache import invalidate_credit
+from .debts import reconcile_all_debts, refresh_current_debts, take_stale
+from .models import Customer, ImportCheckpoint, ImportRun
+from .portfolio import SCHEDULED_KEY, queue_customers, rebuild_portfolio, refresh_portfolio
+from .progress import ImportProgress
+from credit_system.routers import replica_alias
+
+# .ingest and .scoring pull in pandas/openpyxl: they are imported inside the
+# tasks that use them, so loading this module (Celery autodiscovery, web
+# processes queuing a task) stays cheap.
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task
-def ingest_customer_data(file_path: str):
+@shared_task(bind=True)
+def ingest_customer_data(self, file_path: str, chunk_size: int = None, import_run: str = None):
     """
     Ingest customer_data.xlsx → api_customer
     Headers: customer_id, first_name, last_name, age, phone_number, monthly_salary, approved_limit
+    The file may also be CSV, Parquet or Arrow IPC with the same headers
+    (format detected from its contents). It is streamed in chunks of INGEST_CHUNK_SIZE rows; every chunk is
+    COPYed into a staging table and upserted in its own short transaction,
+    together with the run's checkpoint. Running again with the same
+    import_run continues after the last committed chunk.
+    Progress goes to the task state and to ImportRun import_run (a new run by default).
     """
+    from .ingest import customer_frame, load_customers, sync_sequence
+    from .readers import read_chunks
+
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    progress = ImportProgress.start(ImportRun.KIND_CUSTOMERS, import_run, file_path, self)
     try:
-        df = pd.read_excel(file_path)
-        logger.info(f"Customer columns: {df.columns.tolist()}")
-        logger.info(f"Processing {len(df)} customer records")
+        started = time.monotonic()
+        checkpoint = progress.checkpoint(ImportCheckpoint.STAGE_CUSTOMERS, source=file_path)
+        resumed_at = checkpoint.rows_done
+        if resumed_at and not checkpoint.done:
+            logger.info(f"Resuming customer import {progress.run.run_id} after row {resumed_at}")
+        if not checkpoint.done:
+            for chunk in progress.timed(read_chunks(file_path, chunk_size, checkpoint.next_row)):
+                with progress.stage('transform'):
+                    frame = customer_frame(chunk, offset=checkpoint.rows_done)
+                with progress.stage('load'):
+                    with transaction.atomic():
+                        with connection.cursor() as cursor:
+                            inserted, updated, unchanged = load_customers(cursor, frame)
+                        checkpoint.advance(len(chunk), loaded=inserted + updated)
+                progress.add(read=len(chunk), inserted=inserted, updated=updated, unchanged=unchanged)
+                logger.info(f"Customer rows loaded: {checkpoint.rows_done}")
 
-        with transaction.atomic():
             with connection.cursor() as cursor:
-                for _, row in df.iterrows():
-                    cursor.execute("""
-                        INSERT INTO api_customer 
-                        (customer_id, first_name, last_name, age, phone_number, monthly_salary, approved_limit, current_debt)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (customer_id) DO UPDATE SET
-                            first_name = EXCLUDED.first_name,
-                            last_name = EXCLUDED.last_name,
-                            age = EXCLUDED.age,
-                            phone_number = EXCLUDED.phone_number,
-                            monthly_salary = EXCLUDED.monthly_salary,
-                            approved_limit = EXCLUDED.approved_limit,
-                            current_debt = EXCLUDED.current_debt
-                    """, [
-                        int(row['customer_id']),
-                        str(row['first_name']).strip(),
-                        str(row['last_name']).strip(),
-                        int(row['age']),
-                        str(row['phone_number']).strip(),
-                        float(row['monthly_salary']),
-                        float(row['approved_limit']),
-                        0.0  # Initialize current_debt
-                    ])
-        
-        logger.info("Customer data ingested successfully.")
-        return f"Processed {len(df)} customer records"
+                sync_sequence(cursor, 'api_customer', 'customer_id')
+            checkpoint.complete()
+        progress.finish()
+
+        total = checkpoint.rows_done
+        elapsed = time.monotonic() - started
+        rate = (total - resumed_at) / elapsed if elapsed > 0 else 0.0
+        changes = (
+            f"{progress.totals['rows_inserted']} inserted, {progress.totals['rows_updated']} updated, "
+            f"{progress.totals['rows_unchanged']} unchanged"
+        )
+        logger.info(f"Customer data ingested: {total} rows ({changes}) in {elapsed:.1f}s ({rate:.0f} rows/sec)")
+        return f"Processed {total} customer records: {changes} ({rate:.0f} rows/sec)"
     except Exception as e:
         logger.error(f"Customer ingestion failed: {e}")
+        progress.fail(e)
         raise
 
 
-@shared_task
-def ingest_loan_data(file_path: str):
+def _stage_partition(progress, file_path, run_id, partition, start, stop, chunk_size):
+    """
+    Stage data rows [start, stop) of a loan sheet, committing chunk by chunk
+    together with the partition's checkpoint. A restarted partition picks up
+    after its last committed chunk; one that never committed a chunk first
+    clears anything older left under its key. Rejected rows are appended to
+    the partition's reject file; the merge collects those into one file.
+    """
+    from .ingest import clear_staged_loans, loan_frame, reject_path, stage_loans, write_rejects
+    from .readers import read_chunks
+
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    checkpoint = progress.checkpoint(
+        ImportCheckpoint.STAGE_LOANS, partition, source=file_path, start_row=start, stop_row=stop
+    )
+    if not checkpoint.rows_done:
+        with connection.cursor() as cursor:
+            clear_staged_loans(cursor, run_id, partition)
+    elif not checkpoint.done:
+        logger.info(f"Resuming loan partition {partition} of run {run_id} at row {checkpoint.next_row}")
+
+    if not checkpoint.done:
+        for chunk in progress.timed(read_chunks(file_path, chunk_size, checkpoint.next_row, stop)):
+            with progress.stage('transform'):
+                frame, rejects = loan_frame(chunk, offset=checkpoint.next_row)
+                # Written before the chunk commits: a chunk repeated after a crash
+                # appends its rejects again, and collect_rejects drops the copies
+                write_rejects(rejects, reject_path(run_id, f'p{partition}'))
+            with progress.stage('load'):
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        staged = stage_loans(cursor, run_id, partition, [frame])
+                    checkpoint.advance(len(chunk), loaded=staged, rejected=len(rejects))
+            progress.add(read=len(chunk), rejected=len(rejects))
+        checkpoint.complete()
+
+    progress.flush()
+    staged, errors = checkpoint.rows_loaded, checkpoint.rows_rejected
+    logger.info(f"Loan partition {partition} of run {run_id}: {staged} staged, {errors} errors")
+    return {"partition": partition, "staged": staged, "errors": errors}
+
+
+def _merge_run(progress, partition_results, run_id, started):
+    from .ingest import (
+        collect_rejects, merge_loans, orphaned_loans, reject_path, spool_path, sync_sequence, write_rejects,
+    )
+
+    checkpoint = progress.checkpoint(ImportCheckpoint.STAGE_MERGE)
+    changes = ''
+    if checkpoint.done:
+        merged, orphaned = checkpoint.rows_loaded, checkpoint.rows_rejected
+    else:
+        with progress.stage('load'):
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    orphans = orphaned_loans(cursor, run_id)
+                    inserted, updated, unchanged = merge_loans(cursor, run_id)
+                    sync_sequence(cursor, 'api_loan', 'loan_id')
+                write_rejects(orphans, reject_path(run_id, 'orphans'))
+                merged, orphaned = inserted + updated + unchanged, len(orphans)
+                checkpoint.complete(loaded=merged, rejected=orphaned)
+        progress.add(inserted=inserted, updated=updated, unchanged=unchanged, rejected=orphaned)
+        changes = f": {inserted} inserted, {updated} updated, {unchanged} unchanged"
+    reject_file = collect_rejects(run_id)
+    if reject_file:
+        progress.flush(reject_file=reject_file)
+    if os.path.exists(spool_path(run_id)):
+        os.remove(spool_path(run_id))
+    progress.finish()
+
+    errors = sum(r['errors'] for r in partition_results) + orphaned
+    if orphaned:
+        logger.error(f"{orphaned} loans skipped in run {run_id}: customer not found")
+    if reject_file:
+        logger.warning(f"Rejected loan rows of run {run_id} written to {reject_file}")
+    message = f"Processed {merged} loans, {errors} errors{changes}"
+    if started is not None:
+        elapsed = time.time() - started
+        staged = sum(r['staged'] for r in partition_results)
+        rate = staged / elapsed if elapsed > 0 else 0.0
+        message += f" ({rate:.0f} rows/sec)"
+    logger.info(f"Loan ingestion completed: {message}")
+    return message
+
+
+@shared_task(bind=True, autoretry_for=(OperationalError,), retry_backoff=True, max_retries=3)
+def stage_loan_partition(self, file_path: str, run_id: str, partition: int, start: int, stop: int = None,
+                         chunk_size: int = None):
+    """
+    Load data rows [start, stop) of a loan sheet into api_loan_staging.
+    A retried partition resumes from its checkpoint, so no row is staged
+    twice; nothing reaches api_loan before the merge.
+    """
+    progress = ImportProgress.start(ImportRun.KIND_LOANS, run_id, file_path, self)
+    try:
+        return _stage_partition(progress, file_path, run_id, partition, start, stop, chunk_size)
+    except Exception as e:
+        if not isinstance(e, OperationalError) or self.request.retries >= self.max_retries:
+            progress.fail(e)
+        raise
+
+
+@shared_task(bind=True)
+def merge_loan_staging(self, partition_results, run_id: str, started: float = None):
+    """
+    Chord callback: merge every staged partition of a run into api_loan.
+    """
+    progress = ImportProgress.start(ImportRun.KIND_LOANS, run_id, task=self)
+    try:
+        return _merge_run(progress, partition_results, run_id, started)
+    except Exception as e:
+        progress.fail(e)
+        raise
+
+
+@shared_task(bind=True)
+def ingest_loan_data(self, file_path: str, chunk_size: int = None, import_run: str = None):
     """
     Ingest loan_data.xlsx → api_loan
     Headers: customer id, loan id, loan amount, tenure, interest rate,
              monthly repayment (emi), EMIs paid on time, start date, end date
+    Like customers, the file may be xlsx, CSV, Parquet or Arrow IPC.
+    Single-worker path: the whole sheet is one partition, merged right away.
+    The ImportRun id doubles as the staging run id.
     """
+    run_id = import_run or uuid.uuid4().hex
+    progress = ImportProgress.start(ImportRun.KIND_LOANS, run_id, file_path, self)
     try:
-        df = pd.read_excel(file_path)
-        logger.info(f"Loan columns: {df.columns.tolist()}")
-        logger.info(f"Processing {len(df)} loan records")
-
-        # Use transaction to ensure we get consistent customer data
-        with transaction.atomic():
-            # Get ALL customer IDs from database in a single transaction
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT customer_id FROM api_customer")
-                valid_customers = {row[0] for row in cursor.fetchall()}
-            
-            logger.info(f"Found {len(valid_customers)} valid customers in database")
-
-            inserted_count = 0
-            error_count = 0
-            
-            # Process loans in the same transaction
-            with connection.cursor() as cursor:
-                for _, row in df.iterrows():
-                    try:
-                        customer_id = int(row['customer id'])
-                        loan_id = int(row['loan id'])
-                        
-                        # Verify customer exists
-                        if customer_id not in valid_customers:
-                            logger.error(f"Customer {customer_id} not found for loan {loan_id}")
-                            error_count += 1
-                            continue
-                        
-                        # Convert dates properly
-                        start_date = pd.to_datetime(row['start date']).strftime('%Y-%m-%d')
-                        end_date = pd.to_datetime(row['end date']).strftime('%Y-%m-%d')
-                        
-                        cursor.execute("""
-                            INSERT INTO api_loan 
-                            (loan_id, customer_id, loan_amount, tenure, interest_rate, monthly_repayment, 
-                             "emIs_paid_on_time", start_date, end_date)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            ON CONFLICT (loan_id) DO UPDATE SET
-                                customer_id = EXCLUDED.customer_id,
-                                loan_amount = EXCLUDED.loan_amount,
-                                tenure = EXCLUDED.tenure,
-                                interest_rate = EXCLUDED.interest_rate,
-                                monthly_repayment = EXCLUDED.monthly_repayment,
-                                "emIs_paid_on_time" = EXCLUDED."emIs_paid_on_time",
-                                start_date = EXCLUDED.start_date,
-                                end_date = EXCLUDED.end_date
-                        """, [
-                            loan_id,
-                            customer_id,
-                            float(row['loan amount']),
-                            int(row['tenure']),
-                            float(row['interest rate']),
-                            float(row['monthly repayment (emi)']),
-                            int(row['EMIs paid on time']),
-                            start_date,
-                            end_date
-                        ])
-                        inserted_count += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error inserting loan {row['loan id']}: {e}")
-                        error_count += 1
-                        continue
-
-        logger.info(f"Loan ingestion completed: {inserted_count} inserted, {error_count} errors")
-        return f"Processed {inserted_count} loans, {error_count} errors"
+        started = time.time()
+        result = _stage_partition(progress, file_path, run_id, 0, 0, None, chunk_size)
+        return _merge_run(progress, [result], run_id, started)
     except Exception as e:
         logger.error(f"Loan ingestion failed: {e}")
+        progress.fail(e)
         raise
 
 
 @shared_task
-def update_current_debts():
+def ingest_loan_data_parallel(file_path: str, partitions: int = None, chunk_size: int = None):
+    """
+    Split the loan sheet into row-range partitions, stage them on all
+    available workers and merge once every partition has finished.
+    Returns the run id (also the ImportRun id); the chord result carries the final summary.
+    """
+    run = ImportRun.objects.create(run_id=uuid.uuid4().hex, kind=ImportRun.KIND_LOANS, source=file_path)
+    total = _plan_loan_partitions(run, file_path, partitions or settings.LOAN_INGEST_PARTITIONS)
+    import_pipeline(run, chunk_size, started=time.time()).delay()
+    logger.info(f"Loan run {run.run_id}: {total} rows in {run.checkpoints.count()} partitions")
+    return run.run_id
+
+
+@shared_task(bind=True)
+def update_current_debts(self, customer_ids: list = None, import_run: str = None):
     """
     Update current_debt = SUM(monthly_repayment * remaining_emis)
     remaining_emis = tenure - emIs_paid_on_time
+    Delta mode: only the given customers, or by default the customers the
+    ingestion tasks queued in api_stale_customer. Their credit aggregates
+    and portfolio rollup contributions are refreshed in the same pass.
     """
+    progress = ImportProgress.start(ImportRun.KIND_DEBTS, import_run, task=self)
     try:
-        with transaction.atomic():
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE api_customer 
-                    SET current_debt = (
-                        SELECT COALESCE(SUM(
-                            l.monthly_repayment * GREATEST(0, l.tenure - l."emIs_paid_on_time")
-                        ), 0)
-                        FROM api_loan l
-                        WHERE l.customer_id = api_customer.customer_id
-                    )
-                """)
-                updated_count = cursor.rowcount
-                
+        checkpoint = progress.checkpoint(ImportCheckpoint.STAGE_DEBTS)
+        if checkpoint.done:
+            updated_count = checkpoint.rows_loaded
+        else:
+            with progress.stage('debt_refresh'):
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        if customer_ids is None:
+                            customer_ids = take_stale(cursor)
+                        updated_count = refresh_current_debts(cursor, customer_ids)
+                        refresh_aggregates(cursor, customer_ids)
+                        queue_customers(cursor, customer_ids)
+                    checkpoint.complete(loaded=updated_count)
+                invalidate_credit(customer_ids)
+                refresh_portfolio()
+            progress.add(updated=updated_count)
+        progress.finish()
+
         logger.info(f"Current debts updated for {updated_count} customers.")
         return f"Updated debts for {updated_count} customers"
     except Exception as e:
         logger.error(f"Debt update failed: {e}")
+        progress.fail(e)
         raise
 
 
 @shared_task
-def import_all_data():
+def reconcile_current_debts():
     """
-    Master task: Customers → Loans → Update Debts (SEQUENTIAL)
-    This ensures proper ordering and prevents concurrent execution
+    Full-table current_debt, credit aggregate and portfolio rollup
+    recompute, for drift checks and manual repairs.
+    """
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                updated_count = reconcile_all_debts(cursor)
+                rebuild_aggregates(cursor)
+                cursor.execute("DELETE FROM api_stale_customer")
+        # Commits per chunk, outside the debt transaction
+        rebuild_portfolio()
+
+        customer_ids = Customer.objects.values_list('customer_id', flat=True).iterator(chunk_size=10000)
+        while batch := list(islice(customer_ids, 10000)):
+            invalidate_credit(batch)
+
+        logger.info(f"Current debts reconciled for {updated_count} customers.")
+        return f"Reconciled debts for {updated_count} customers"
+    except Exception as e:
+        logger.error(f"Debt reconcile failed: {e}")
+        raise
+
+
+@shared_task
+def refresh_portfolio_rollups():
+    """
+    Apply the customers queued by loan and customer writes to the portfolio
+    rollups. /create-loan/ queues it after commit; schedule it as well to
+    bound how stale /portfolio/summary/ can get after other writes.
+    """
+    # Loans created from here on queue the next run
+    cache.delete(SCHEDULED_KEY)
+    refreshed = refresh_portfolio()
+    if refreshed is None:
+        return "Portfolio refresh already running"
+    logger.info(f"Portfolio rollups refreshed for {refreshed} customers.")
+    return f"Refreshed portfolio rollups for {refreshed} customers"
+
+
+@shared_task
+def rescore_portfolio(chunk_size: int = None):
+    """
+    Score every customer from api_loan in columnar chunks and bulk-write
+    the results to api_credit_score. Same rules as calculate_credit_score.
     """
+    from .scoring import portfolio_scores, store_scores
+
+    chunk_size = chunk_size or settings.SCORING_CHUNK_SIZE
     try:
-        logger.info("=== STARTING COMPLETE DATA IMPORT ===")
-        
-        # Define file paths (adjust as needed)
-        customer_file = '/app/data/customer_data.xlsx'
-        loan_file = '/app/data/loan_data.xlsx'
-        
-        # Step 1: Import Customers
-        logger.info("STEP 1: Importing customers...")
-        customer_result = ingest_customer_data(customer_file)
-        logger.info(f"CUSTOMER IMPORT: {customer_result}")
-        
-        # Step 2: Import Loans  
-        logger.info("STEP 2: Importing loans...")
-        loan_result = ingest_loan_data(loan_file)
-        logger.info(f"LOAN IMPORT: {loan_result}")
-        
-        # Step 3: Update Debts
-        logger.info("STEP 3: Updating current debts...")
-        debt_result = update_current_debts()
-        logger.info(f"DEBT UPDATE: {debt_result}")
-        
-        logger.info("=== DATA IMPORT COMPLETED SUCCESSFULLY ===")
-        return {
-            "customers": customer_result,
-            "loans": loan_result, 
-            "debts": debt_result
-        }
-        
+        started = time.monotonic()
+        today = date.today()
+        # Read-heavy scan: run it on the replica when one is configured
+        scores = portfolio_scores(connections[replica_alias()], chunk_size, today)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                written = store_scores(cursor, scores, today)
+
+        elapsed = time.monotonic() - started
+        rate = written / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Portfolio rescored: {written} customers in {elapsed:.1f}s ({rate:.0f} customers/sec)")
+        return f"Scored {written} customers ({rate:.0f} customers/sec)"
     except Exception as e:
-        logger.error(f"Complete data import failed: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Portfolio rescoring failed: {e}")
+        raise
+
+
+def _plan_loan_partitions(run, file_path, partitions):
+    """
+    Checkpoint rows for the loan partitions of a run. Returns the sheet's row count, if it was counted.
+    An xlsx sheet is parsed once into a Parquet spool file that the partitions
+    read instead, since every xlsx partition would otherwise parse the sheet
+    from its first row.
+    """
+    if partitions <= 1:
+        ImportCheckpoint.objects.create(run=run, stage=ImportCheckpoint.STAGE_LOANS, source=file_path)
+        return None
+    from .ingest import spool_path
+    from .readers import count_rows, detect_format, spool_excel
+
+    if detect_format(file_path) == 'xlsx':
+        sheet, file_path = file_path, spool_path(run.run_id)
+        total = spool_excel(sheet, file_path, settings.INGEST_CHUNK_SIZE)
+    else:
+        sheet, total = file_path, count_rows(file_path)
+    if not total:
+        # One empty partition, so the chord still reaches the merge and the run finishes
+        ImportCheckpoint.objects.create(run=run, stage=ImportCheckpoint.STAGE_LOANS, source=sheet)
+        return total
+    size = max(1, -(-total // partitions))
+    ImportCheckpoint.objects.bulk_create([
+        ImportCheckpoint(run=run, stage=ImportCheckpoint.STAGE_LOANS, partition=n, source=file_path,
+                         start_row=start, stop_row=start + size)
+        for n, start in enumerate(range(0, total, size))
+    ])
+    return total
+
+
+def plan_import(customer_file, loan_file, partitions=1):
+    """Create a 'full' ImportRun with a checkpoint for every step of the pipeline."""
+    run = ImportRun.objects.create(
+        run_id=uuid.uuid4().hex, kind=ImportRun.KIND_FULL, source=f"{customer_file}, {loan_file}"
+    )
+    ImportCheckpoint.objects.create(run=run, stage=ImportCheckpoint.STAGE_CUSTOMERS, source=customer_file)
+    _plan_loan_partitions(run, loan_file, partitions)
+    ImportCheckpoint.objects.create(run=run, stage=ImportCheckpoint.STAGE_MERGE)
+    ImportCheckpoint.objects.create(run=run, stage=ImportCheckpoint.STAGE_DEBTS)
+    return run
+
+
+def import_pipeline(run, chunk_size=None, started=None):
+    """
+    Celery canvas for a planned run: customers → loan partitions (a chord
+    ending in the merge) → debt refresh. Every step reads its checkpoint
+    first, so the same canvas both starts a run and resumes it.
+    """
+    checkpoints = {}
+    for checkpoint in run.checkpoints.order_by('partition'):
+        checkpoints.setdefault(checkpoint.stage, []).append(checkpoint)
+    run_id = run.run_id
+
+    steps = [
+        ingest_customer_data.si(checkpoint.source, chunk_size, run_id)
+        for checkpoint in checkpoints.get(ImportCheckpoint.STAGE_CUSTOMERS, [])
+    ]
+    partitions = checkpoints.get(ImportCheckpoint.STAGE_LOANS, [])
+    if partitions:
+        steps.append(chord(
+            group(
+                stage_loan_partition.si(p.source, run_id, p.partition, p.start_row, p.stop_row, chunk_size)
+                for p in partitions
+            ),
+            merge_loan_staging.s(run_id, started),
+        ))
+    if ImportCheckpoint.STAGE_DEBTS in checkpoints:
+        steps.append(update_current_debts.si(None, run_id))
+    if run.kind == ImportRun.KIND_FULL:
+        steps.append(finish_import.si(run_id))
+    return chain(*steps)
+
+
+@shared_task
+def finish_import(run_id: str):
+    """Last link of a full import: mark the run succeeded."""
+    ImportProgress.start(ImportRun.KIND_FULL, run_id).finish()
+    logger.info(f"=== DATA IMPORT {run_id} COMPLETED SUCCESSFULLY ===")
+    return run_id
+
+
+@shared_task
+def import_all_data(customer_file: str = '/app/data/customer_data.xlsx',
+                    loan_file: str = '/app/data/loan_data.xlsx',
+                    partitions: int = 1, chunk_size: int = None):
+    """
+    Master task: Customers → Loans → Update Debts (SEQUENTIAL)
+    Plans a checkpointed 'full' ImportRun and starts it as one Celery
+    chain, so each stage only begins once the previous one has committed.
+    Returns the run id; follow it with import_status, continue it with resume_import.
+    """
+    run = plan_import(customer_file, loan_file, partitions)
+    logger.info(f"=== STARTING COMPLETE DATA IMPORT (run {run.run_id}) ===")
+    import_pipeline(run, chunk_size).delay()
+    return run.run_id
+
+
+def reopen_import(run_id):
+    """Mark an unfinished run running again and return it; None if it already succeeded."""
+    run = ImportRun.objects.get(run_id=run_id)
+    if run.status == ImportRun.STATUS_SUCCEEDED:
+        return None
+    ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.STATUS_RUNNING, error='', finished_at=None)
+    return run
+
+
+@shared_task
+def resume_import(run_id: str, chunk_size: int = None):
+    """
+    Restart an unfinished run from its checkpoints: finished steps are
+    skipped and chunked steps continue after their last committed chunk.
+    """
+    run = reopen_import(run_id)
+    if run is None:
+        logger.info(f"Import {run_id} already finished, nothing to resume")
+        return run_id
+    logger.info(f"Resuming import {run_id}")
+    import_pipeline(run, chunk_size).delay()
+    return run_id
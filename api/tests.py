@@ -1,6 +1,75 @@
-from django.test import TestCase
+import importlib.util
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, connections
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from psycopg2 import extensions
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from .models import Customer
+from credit_system import metrics, routers
+from credit_system.celery import app as celery_app
+from credit_system.db.base import ConnectionPool, DatabaseWrapper, _pools
+from credit_system.routers import ReadReplicaRouter
+from . import amortization, async_views, portfolio, readers, synthetic
+from .benchmarking import cold_start, compare
+from .aggregates import find_drift, get_credit_aggregate, refresh_aggregates
+from .credit_cache import cache_stats, get_credit_snapshot
+from .debts import refresh_current_debts
+from .ingest import customer_frame, loan_frame
+from .models import (
+    CreditScore, Customer, ImportCheckpoint, ImportRun, Loan, PortfolioRollup, PortfolioStale, StaleCustomer,
+)
+from .pagination import active_loans
+from .portfolio import rebuild_portfolio, refresh_portfolio
+from .renderers import ORJSONRenderer
+from .synthetic import write_frames
+from .utils import calculate_credit_score
+from .tasks import (
+    ingest_customer_data, ingest_loan_data, merge_loan_staging, reconcile_current_debts,
+    refresh_portfolio_rollups, rescore_portfolio, stage_loan_partition, update_current_debts,
+)
+
+
+def setUpModule():
+    # Reject and spool files of the ingestion tests go to throwaway directories
+    global _reject_dir
+    _reject_dir = override_settings(IMPORT_REJECT_DIR=tempfile.mkdtemp(), IMPORT_SPOOL_DIR=tempfile.mkdtemp())
+    _reject_dir.enable()
+
+
+def tearDownModule():
+    shutil.rmtree(settings.IMPORT_REJECT_DIR, ignore_errors=True)
+    shutil.rmtree(settings.IMPORT_SPOOL_DIR, ignore_errors=True)
+    _reject_dir.disable()
+
+
+def write_xlsx(rows):
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+    return path
+
 
 class CustomerTestCase(TestCase):
     def setUp(self):
@@ -17,4 +86,1114 @@ class CustomerTestCase(TestCase):
         response = self.client.post('/register/', data)
         self.assertEqual(response.status_code, 201)
         self.assertEqual(Customer.objects.count(), 1)
-        self.assertEqual(Customer.objects.first().approved_limit, 200000)  # 36*5000=180000, round to 200000?
\ No newline at end of file
+        self.assertEqual(Customer.objects.first().approved_limit, 200000)  # 36*5000=180000, round to 200000?
+
+    def registration(self, phone, income=50000):
+        return {"first_name": "A", "last_name": "B", "age": 30, "monthly_income": income, "phone_number": phone}
+
+    def test_register_bulk(self):
+        items = [self.registration('900', 5000), self.registration('901', 123456), self.registration('902')]
+        response = self.client.post('/register/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        ids = [row['customer_id'] for row in response.json()]
+        self.assertEqual(ids, sorted(ids))
+        customers = Customer.objects.in_bulk(ids)
+        self.assertEqual([customers[i].phone_number for i in ids], ['900', '901', '902'])
+        self.assertEqual([customers[i].approved_limit for i in ids], [200000, 4400000, 1800000])
+        self.assertEqual(set(PortfolioStale.objects.values_list('customer_id', flat=True)), set(ids))
+
+    def test_register_bulk_rejects_duplicates_and_invalid_items(self):
+        self.client.post('/register/bulk/', [self.registration('900')], format='json')
+        items = [
+            self.registration('901'), self.registration('900'),
+            self.registration('901'), {"first_name": "A", "phone_number": "903"},
+        ]
+        response = self.client.post('/register/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        errors = {row['index']: row['errors'] for row in response.json()}
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertIn('already exists', errors[1]['phone_number'][0])
+        self.assertIn('item 0', errors[2]['phone_number'][0])
+        self.assertIn('age', errors[3])
+        self.assertEqual(Customer.objects.count(), 1)
+
+
+class CustomerIngestionTestCase(TestCase):
+    def test_streams_chunks_and_upserts(self):
+        path = write_xlsx([
+            ['customer_id', 'first_name', 'last_name', 'age', 'phone_number', 'monthly_salary', 'approved_limit'],
+            [1, 'Ann ', 'Lee', 30, 9000000001, 50000, 1800000],
+            [2, 'Bob', 'Ray', 41, 9000000002, 70000, 2500000],
+            [3, 'Cid', 'Fox', 52, 9000000003, 90000, 3200000],
+            [1, 'Ann', 'Lee', 31, 9000000001, 60000, 2200000],
+        ])
+        self.addCleanup(os.remove, path)
+
+        result = ingest_customer_data(path, chunk_size=2, import_run='cust1')
+
+        self.assertIn('Processed 4 customer records', result)
+        run = ImportRun.objects.get(run_id='cust1')
+        self.assertEqual((run.kind, run.status), (ImportRun.KIND_CUSTOMERS, ImportRun.STATUS_SUCCEEDED))
+        self.assertEqual((run.rows_read, run.rows_upserted, run.rows_rejected), (4, 4, 0))
+        self.assertGreater(run.read_seconds, 0)
+        self.assertGreater(run.load_seconds, 0)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual(Customer.objects.count(), 3)
+        ann = Customer.objects.get(customer_id=1)
+        self.assertEqual((ann.first_name, ann.age, ann.approved_limit), ('Ann', 31, 2200000))
+        # The id sequence continues after the imported rows
+        response = self.client.post('/register/', {
+            "first_name": "New", "last_name": "Person", "age": 25,
+            "monthly_income": 10000, "phone_number": "9000000004"
+        })
+        self.assertEqual(response.data['customer_id'], 4)
+
+
+class LoanIngestionTestCase(TestCase):
+    HEADER = ['customer id', 'loan id', 'loan amount', 'tenure', 'interest rate',
+              'monthly repayment (emi)', 'EMIs paid on time', 'start date', 'end date']
+
+    def setUp(self):
+        for customer_id in (1, 2):
+            Customer.objects.create(
+                customer_id=customer_id, first_name='A', last_name='B', age=30,
+                monthly_salary=50000, phone_number='1', approved_limit=1800000
+            )
+        self.path = write_xlsx([
+            self.HEADER,
+            [1, 10, 100000, 12, 10.5, 8815, 12, '2020-01-01', '2021-01-01'],
+            [2, 11, 200000, 24, 12.0, 9415, 10, '2021-03-01', '2023-03-01'],
+            [9, 12, 300000, 36, 11.0, 9822, 5, '2021-03-01', '2024-03-01'],
+            [1, 13, 400000, 12, 9.0, 34980, 3, 'not a date', '2023-03-01'],
+            [2, 14, 500000, 48, 14.0, 13663, 40, '2019-06-01', '2023-06-01'],
+        ])
+        self.addCleanup(os.remove, self.path)
+
+    def test_single_worker_path(self):
+        result = ingest_loan_data(self.path, chunk_size=2)
+
+        self.assertIn('Processed 3 loans, 2 errors', result)
+        self.assertEqual(sorted(Loan.objects.values_list('loan_id', flat=True)), [10, 11, 14])
+        run = ImportRun.objects.get()
+        self.assertEqual((run.kind, run.status), (ImportRun.KIND_LOANS, ImportRun.STATUS_SUCCEEDED))
+        self.assertEqual((run.rows_read, run.rows_upserted, run.rows_rejected), (5, 3, 2))
+        self.assertGreater(run.transform_seconds, 0)
+
+        rejects = pd.read_csv(run.reject_file)
+        self.assertEqual(list(rejects.columns), self.HEADER + ['row', 'reason'])
+        self.assertEqual(list(zip(rejects['loan id'], rejects['row'], rejects['reason'])), [
+            (12, 2, 'unknown_customer'), (13, 3, 'invalid_start_date'),
+        ])
+        self.assertEqual(os.listdir(settings.IMPORT_REJECT_DIR).count(os.path.basename(run.reject_file)), 1)
+        self.assertFalse([f for f in os.listdir(settings.IMPORT_REJECT_DIR) if f.startswith(f'{run.run_id}-loans-')])
+
+    def test_validation_reason_codes(self):
+        rows = pd.DataFrame([
+            [1, 20, 1000, 12, 10.0, 90, 12, '2020-01-01', '2021-01-01'],
+            [1, 21, 1000, 12, 10.0, 90, 13, '2020-01-01', '2019-01-01'],
+            [1, 22, -5, 1.5, 'abc', 90, 0, '01/02/2020', ''],
+            [None, 23, 1000, 12, 150, -1, 0, '2020-01-01', '2021-01-01'],
+        ], columns=self.HEADER)
+
+        clean, rejects = loan_frame(rows, offset=100)
+
+        self.assertEqual(clean['loan_id'].tolist(), [20])
+        self.assertEqual(clean['start_date'].tolist(), [date(2020, 1, 1)])
+        self.assertEqual(rejects['row'].tolist(), [101, 102, 103])
+        self.assertEqual(rejects['reason'].tolist(), [
+            'emis_exceed_tenure;end_before_start',
+            'invalid_loan_amount;invalid_tenure;invalid_interest_rate;invalid_end_date',
+            'invalid_customer_id;invalid_interest_rate;invalid_monthly_repayment',
+        ])
+        self.assertEqual(rejects['loan id'].tolist(), [21, 22, 23])
+
+    def test_partitions_merge_and_retry(self):
+        results = [
+            stage_loan_partition(self.path, 'run1', 0, 0, 3),
+            stage_loan_partition(self.path, 'run1', 1, 3, None),
+        ]
+        # A retried partition resumes from its checkpoint instead of duplicating rows
+        results[1] = stage_loan_partition(self.path, 'run1', 1, 3, None)
+
+        self.assertEqual(ImportRun.objects.get(run_id='run1').status, ImportRun.STATUS_RUNNING)
+        result = merge_loan_staging(results, 'run1')
+
+        self.assertIn('Processed 3 loans, 2 errors', result)
+        run = ImportRun.objects.get(run_id='run1')
+        self.assertEqual(run.status, ImportRun.STATUS_SUCCEEDED)
+        self.assertEqual((run.rows_read, run.rows_upserted, run.rows_rejected), (5, 3, 2))
+        self.assertEqual(Loan.objects.get(loan_id=11).tenure, 24)
+        self.assertEqual(Loan.objects.create(
+            customer_id=1, loan_amount=1, tenure=1, interest_rate=1, monthly_repayment=1,
+            emIs_paid_on_time=0, start_date='2024-01-01', end_date='2024-02-01'
+        ).loan_id, 15)
+
+    def test_debt_refresh_only_touches_imported_customers(self):
+        other = Customer.objects.create(
+            customer_id=3, first_name='C', last_name='D', age=30,
+            monthly_salary=50000, phone_number='3', approved_limit=1800000, current_debt=999
+        )
+        ingest_loan_data(self.path)
+
+        self.assertEqual(update_current_debts(import_run='debts1'), "Updated debts for 2 customers")
+        run = ImportRun.objects.get(run_id='debts1')
+        self.assertEqual((run.kind, run.rows_upserted), (ImportRun.KIND_DEBTS, 2))
+        self.assertGreater(run.debt_refresh_seconds, 0)
+        self.assertEqual(Customer.objects.get(customer_id=1).current_debt, 0)
+        self.assertEqual(Customer.objects.get(customer_id=2).current_debt, 9415 * 14 + 13663 * 8)
+        other.refresh_from_db()
+        self.assertEqual(other.current_debt, 999)
+
+        reconcile_current_debts()
+        other.refresh_from_db()
+        self.assertEqual(other.current_debt, 0)
+
+
+def write_import_sheets(test):
+    """Two customers and five loans (one orphaned) for the full-import tests; removed after the test."""
+    customers = write_xlsx([
+        ['customer_id', 'first_name', 'last_name', 'age', 'phone_number', 'monthly_salary', 'approved_limit'],
+        [1, 'Ann', 'Lee', 30, 9000000001, 50000, 1800000],
+        [2, 'Bob', 'Ray', 41, 9000000002, 70000, 2500000],
+    ])
+    loans = write_xlsx([
+        LoanIngestionTestCase.HEADER,
+        [1, 10, 100000, 12, 10.5, 8815, 2, '2020-01-01', '2099-01-01'],
+        [2, 11, 200000, 24, 12.0, 9415, 10, '2021-03-01', '2099-03-01'],
+        [1, 12, 300000, 36, 11.0, 9822, 5, '2021-03-01', '2099-03-01'],
+        [2, 13, 400000, 12, 9.0, 34980, 3, '2022-03-01', '2099-03-01'],
+        [9, 14, 500000, 48, 14.0, 13663, 40, '2019-06-01', '2099-06-01'],
+    ])
+    test.addCleanup(os.remove, customers)
+    test.addCleanup(os.remove, loans)
+    return customers, loans
+
+
+class ChangeDetectionTestCase(TestCase):
+    CUSTOMER_HEADER = ['customer_id', 'first_name', 'last_name', 'age', 'phone_number', 'monthly_salary',
+                       'approved_limit']
+
+    def row_versions(self, table, key):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {key}, xmin::text FROM {table} ORDER BY {key}")
+            return dict(cursor.fetchall())
+
+    def stale_ids(self):
+        return sorted(StaleCustomer.objects.values_list('customer_id', flat=True))
+
+    def test_reimport_only_writes_changed_rows(self):
+        rows = [[1, 'Ann', 'Lee', 30, 9000000001, 50000, 1800000],
+                [2, 'Bob', 'Ray', 41, 9000000002, 70000, 2500000],
+                [3, 'Cid', 'Fox', 52, 9000000003, 90000, 3200000]]
+        path = write_xlsx([self.CUSTOMER_HEADER] + rows)
+        self.addCleanup(os.remove, path)
+        self.assertIn('3 inserted, 0 updated, 0 unchanged', ingest_customer_data(path))
+        update_current_debts()
+        before = self.row_versions('api_customer', 'customer_id')
+
+        rows[1][3] = 42
+        changed = write_xlsx([self.CUSTOMER_HEADER] + rows)
+        self.addCleanup(os.remove, changed)
+        self.assertIn('0 inserted, 1 updated, 2 unchanged', ingest_customer_data(changed, import_run='again'))
+
+        after = self.row_versions('api_customer', 'customer_id')
+        self.assertEqual([k for k in before if before[k] != after[k]], [2])
+        self.assertEqual(self.stale_ids(), [2])
+        run = ImportRun.objects.get(run_id='again')
+        self.assertEqual((run.rows_inserted, run.rows_updated, run.rows_unchanged, run.rows_upserted), (0, 1, 2, 1))
+
+    def test_loan_reimport_queues_old_and_new_owner_of_changed_loans(self):
+        for customer_id in (1, 2, 3):
+            Customer.objects.create(
+                customer_id=customer_id, first_name='A', last_name='B', age=30,
+                monthly_salary=50000, phone_number='1', approved_limit=1800000
+            )
+        rows = [[1, 10, 100000, 12, 10.5, 8815, 2, '2020-01-01', '2099-01-01'],
+                [2, 11, 200000, 24, 12.0, 9415, 10, '2021-03-01', '2099-03-01'],
+                [3, 12, 300000, 36, 11.0, 9822, 5, '2021-03-01', '2099-03-01']]
+        path = write_xlsx([LoanIngestionTestCase.HEADER] + rows)
+        self.addCleanup(os.remove, path)
+        ingest_loan_data(path)
+        update_current_debts()
+        before = self.row_versions('api_loan', 'loan_id')
+
+        rows[0][0] = 2  # loan 10 moves from customer 1 to customer 2
+        changed = write_xlsx([LoanIngestionTestCase.HEADER] + rows)
+        self.addCleanup(os.remove, changed)
+        result = ingest_loan_data(changed)
+
+        self.assertIn('Processed 3 loans, 0 errors: 0 inserted, 1 updated, 2 unchanged', result)
+        after = self.row_versions('api_loan', 'loan_id')
+        self.assertEqual([k for k in before if before[k] != after[k]], [10])
+        self.assertEqual(self.stale_ids(), [1, 2])
+
+
+class ResumableImportTestCase(TestCase):
+    def setUp(self):
+        self.customers, self.loans = write_import_sheets(self)
+
+    def test_full_import_runs_stages_in_order(self):
+        out = io.StringIO()
+        call_command('import_data', customers=self.customers, loans=self.loans, partitions=2,
+                     chunk_size=2, sync=True, stdout=out)
+
+        run = ImportRun.objects.get(kind=ImportRun.KIND_FULL)
+        self.assertIn(f"Import {run.run_id} finished", out.getvalue())
+        self.assertEqual(run.status, ImportRun.STATUS_SUCCEEDED)
+        self.assertEqual(list(run.checkpoints.values_list('stage', 'partition', 'done').order_by('id')), [
+            ('customers', 0, True), ('loans', 0, True), ('loans', 1, True), ('merge', 0, True), ('debts', 0, True),
+        ])
+        # The xlsx loan sheet was parsed once into a Parquet spool, removed after the merge
+        sources = set(run.checkpoints.filter(stage='loans').values_list('source', flat=True))
+        self.assertEqual(sources, {os.path.join(settings.IMPORT_SPOOL_DIR, f'{run.run_id}-loans.parquet')})
+        self.assertEqual(os.listdir(settings.IMPORT_SPOOL_DIR), [])
+        self.assertEqual(Loan.objects.count(), 4)
+        self.assertEqual(Customer.objects.get(customer_id=1).current_debt, 8815 * 10 + 9822 * 31)
+
+    def test_empty_loan_sheet_finishes_parallel_run(self):
+        from . import tasks
+        empty = write_xlsx([LoanIngestionTestCase.HEADER])
+        self.addCleanup(os.remove, empty)
+
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+        run = ImportRun.objects.get(run_id=tasks.ingest_loan_data_parallel(empty, partitions=2))
+        self.assertEqual(run.status, ImportRun.STATUS_SUCCEEDED)
+        self.assertEqual(run.checkpoints.filter(stage=ImportCheckpoint.STAGE_LOANS).count(), 1)
+        self.assertFalse(Loan.objects.exists())
+
+    def test_resume_continues_after_last_committed_chunk(self):
+        from . import ingest, tasks
+        loan_frame, offsets = ingest.loan_frame, []
+
+        def flaky_loan_frame(df, offset=0):
+            offsets.append(offset)
+            if offsets == [0, 2]:
+                raise ValueError('worker lost')
+            return loan_frame(df, offset)
+
+        run = tasks.plan_import(self.customers, self.loans)
+        with mock.patch.object(ingest, 'loan_frame', flaky_loan_frame):
+            with self.assertRaises(ValueError):
+                tasks.import_pipeline(run, chunk_size=2).apply().get()
+            run.refresh_from_db()
+            self.assertEqual(run.status, ImportRun.STATUS_FAILED)
+            partition = run.checkpoints.get(stage=ImportCheckpoint.STAGE_LOANS)
+            self.assertEqual((partition.rows_done, partition.done), (2, False))
+            self.assertFalse(Loan.objects.exists())
+
+            call_command('import_data', resume=run.run_id, chunk_size=2, sync=True, stdout=io.StringIO())
+
+        # The committed chunk (rows 0-1) was not read again
+        self.assertEqual(offsets, [0, 2, 2, 4])
+        run.refresh_from_db()
+        self.assertEqual(run.status, ImportRun.STATUS_SUCCEEDED)
+        # 2 customers + 5 loan rows read once; 2 customers, 4 loans and 2 debts written
+        self.assertEqual((run.rows_read, run.rows_upserted, run.rows_rejected), (7, 8, 1))
+        self.assertEqual(Loan.objects.count(), 4)
+
+
+class StartupTestCase(TestCase):
+    def test_cold_start_stays_lean_and_within_budget(self):
+        for target in ('web', 'worker'):
+            with self.subTest(target=target):
+                r = cold_start(target, runs=1)
+                self.assertEqual(r['forbidden'], [])
+                self.assertEqual(r['connections'], [])
+                self.assertLess(r['p50_ms'], settings.STARTUP_BUDGET_MS)
+
+    def test_bootstrap_imports_once(self):
+        customers, loans = write_import_sheets(self)
+        out = io.StringIO()
+
+        call_command('bootstrap_data', customers=customers, loans=loans, sync=True, stdout=out)
+        call_command('bootstrap_data', customers=customers, loans=loans, sync=True, stdout=out)
+
+        self.assertIn('finished', out.getvalue())
+        self.assertIn('Data already imported, skipping bootstrap', out.getvalue())
+        self.assertEqual(ImportRun.objects.filter(kind=ImportRun.KIND_FULL).count(), 1)
+        self.assertEqual(Loan.objects.count(), 4)
+
+
+class ImportStatusCommandTestCase(TestCase):
+    def test_lists_and_shows_runs(self):
+        ImportRun.objects.create(run_id='a1', kind=ImportRun.KIND_LOANS, rows_read=500, load_seconds=1.5)
+        ImportRun.objects.create(run_id='b2', kind=ImportRun.KIND_CUSTOMERS, status=ImportRun.STATUS_FAILED,
+                                 error='boom')
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command('import_status', stdout=out)
+        self.assertIn('a1 loans', out.getvalue())
+        self.assertIn('b2 customers failed', out.getvalue())
+
+        out = io.StringIO()
+        call_command('import_status', run_id='b2', follow=True, stdout=out, stderr=err)
+        self.assertEqual(out.getvalue().count('b2'), 1)
+        self.assertIn('boom', err.getvalue())
+        out = io.StringIO()
+        call_command('import_status', run_id='a1', stdout=out)
+        self.assertIn('read=500', out.getvalue())
+        self.assertIn('load=1.50s', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_status', run_id='missing')
+
+
+class CreditAggregateTestCase(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=50000,
+            phone_number='1', approved_limit=1000000
+        )
+        today = date.today()
+        self.loans = [
+            Loan.objects.create(
+                customer=self.customer, loan_amount=200000, tenure=12, interest_rate=10,
+                monthly_repayment=17583, emIs_paid_on_time=9, start_date=date(today.year, 1, 1),
+                end_date=date(today.year + 1, 1, 1)
+            ),
+            Loan.objects.create(
+                customer=self.customer, loan_amount=300000, tenure=24, interest_rate=12,
+                monthly_repayment=14122, emIs_paid_on_time=24, start_date=date(today.year - 3, 5, 1),
+                end_date=date(today.year - 1, 5, 1)
+            ),
+        ]
+
+    def test_score_reads_maintained_aggregate(self):
+        aggregate = get_credit_aggregate(self.customer.customer_id)
+        self.assertEqual((aggregate.loan_count, aggregate.total_emis, aggregate.emis_paid_on_time), (2, 36, 33))
+        self.assertEqual(aggregate.active_emi_sum, 17583)
+        # 33/36*30 + (20 - 2*2) + 20 + 500000/1000000*20
+        self.assertEqual(calculate_credit_score(self.customer), int(33 / 36 * 30 + 16 + 20 + 10.0))
+
+    def test_deleting_customer_with_loans(self):
+        customer_id = self.customer.customer_id
+        self.customer.delete()
+        # Deferred foreign keys are checked at commit; check them now
+        connection.check_constraints()
+        self.assertFalse(Loan.objects.filter(customer_id=customer_id).exists())
+        self.assertEqual(list(PortfolioStale.objects.values_list('customer_id', flat=True)), [customer_id])
+
+    def test_aggregate_expires_with_active_loans(self):
+        later = date(date.today().year + 1, 1, 2)
+        aggregate = get_credit_aggregate(self.customer.customer_id, today=later)
+        self.assertEqual((aggregate.active_emi_sum, aggregate.current_year_loans), (0, 0))
+
+    def test_rebuild_command_repairs_drift(self):
+        get_credit_aggregate(self.customer.customer_id)
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE api_loan SET tenure = 48 WHERE loan_id = %s', [self.loans[1].loan_id])
+            self.assertEqual(find_drift(cursor), [self.customer.customer_id])
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_credit_aggregates', '--check', stdout=io.StringIO())
+        call_command('rebuild_credit_aggregates', stdout=io.StringIO())
+        with connection.cursor() as cursor:
+            self.assertEqual(find_drift(cursor), [])
+
+
+class PortfolioRescoringTestCase(TestCase):
+    def test_matches_per_customer_score_on_random_data(self):
+        rng = random.Random(7)
+        today = date.today()
+        customers = [
+            Customer.objects.create(
+                first_name='F', last_name=str(n), age=30, phone_number=str(n),
+                monthly_salary=rng.randrange(0, 200000, 500),
+                approved_limit=rng.choice([0, rng.randrange(100000, 5000000, 100000)])
+            )
+            for n in range(60)
+        ]
+        for customer in customers:
+            for _ in range(rng.choice([0, 1, 2, 5, 12])):
+                tenure = rng.randint(6, 120)
+                start = today - timedelta(days=rng.randint(-30, 3000))
+                Loan.objects.create(
+                    customer=customer, loan_amount=rng.randrange(1000, 2000000) + rng.choice([0, 0.25, 0.5]),
+                    tenure=tenure, interest_rate=rng.randint(5, 20), monthly_repayment=rng.randint(100, 90000),
+                    emIs_paid_on_time=rng.randint(0, tenure), start_date=start,
+                    end_date=start + timedelta(days=30 * tenure)
+                )
+
+        rescore_portfolio(chunk_size=17)
+
+        stored = dict(CreditScore.objects.values_list('customer_id', 'score'))
+        expected = {c.customer_id: calculate_credit_score(c) for c in customers}
+        self.assertEqual(stored, expected)
+
+
+class PortfolioSummaryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        today = date.today()
+        young = Customer.objects.create(
+            customer_id=1, first_name='A', last_name='B', age=23,
+            monthly_salary=30000, phone_number='1', approved_limit=1100000
+        )
+        older = Customer.objects.create(
+            customer_id=2, first_name='C', last_name='D', age=40,
+            monthly_salary=120000, phone_number='2', approved_limit=4300000
+        )
+        Loan.objects.create(
+            customer=young, loan_amount=100000, tenure=12, interest_rate=10, monthly_repayment=8792,
+            emIs_paid_on_time=6, start_date=today - timedelta(days=180), end_date=today + timedelta(days=1)
+        )
+        Loan.objects.create(
+            customer=older, loan_amount=500000, tenure=24, interest_rate=12, monthly_repayment=23537,
+            emIs_paid_on_time=24, start_date=date(2015, 1, 1), end_date=date(2017, 1, 1)
+        )
+
+    def rollups(self):
+        return list(PortfolioRollup.objects.order_by('dimension', 'band').values_list(
+            'dimension', 'band', 'customers', 'loans', 'exposure', 'active_emi_sum', 'total_emis'
+        ))
+
+    def summary(self):
+        cache.clear()
+        return self.client.get('/portfolio/summary/').json()
+
+    def test_summary_is_served_from_incremental_rollups(self):
+        # The read path never refreshes: before the first build it reports the queue
+        summary = self.summary()
+        self.assertIsNone(summary['as_of'])
+        self.assertEqual(summary['stale_customers'], 2)
+        self.assertEqual(summary['total']['customers'], 0)
+
+        self.assertEqual(refresh_portfolio(), 2)
+        summary = self.summary()
+        self.assertIsNotNone(summary['as_of'])
+        self.assertEqual(summary['stale_customers'], 0)
+        self.assertEqual(summary['total']['customers'], 2)
+        self.assertEqual(summary['total']['loans'], 2)
+        self.assertEqual(summary['total']['exposure'], 100000)
+        self.assertEqual(summary['total']['active_emi_sum'], 8792)
+        self.assertEqual(summary['total']['on_time_ratio'], round(30 / 36, 4))
+        self.assertEqual([b['band'] for b in summary['by_age_band']], ['under_25', '35_44'])
+        self.assertEqual([b['band'] for b in summary['by_salary_band']], ['25k_50k', '1l_2l'])
+        self.assertEqual(sum(b['customers'] for b in summary['by_score_slab']), 2)
+        self.assertTrue(all(b['approval'] for b in summary['by_score_slab']))
+
+        with self.assertNumQueries(0):
+            self.client.get('/portfolio/summary/')
+
+        # New loans are queued and one refresh task is scheduled after commit
+        with mock.patch.object(refresh_portfolio_rollups, 'apply_async') as apply_async:
+            for _ in range(2):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        '/create-loan/',
+                        {"customer_id": 2, "loan_amount": 100000, "interest_rate": 12, "tenure": 12},
+                        format='json'
+                    )
+                self.assertEqual(response.status_code, 201)
+        apply_async.assert_called_once_with(countdown=settings.PORTFOLIO_REFRESH_DELAY)
+        self.assertEqual(list(PortfolioStale.objects.values_list('customer_id', flat=True)), [2])
+        summary = self.summary()
+        self.assertEqual((summary['total']['loans'], summary['stale_customers']), (2, 1))
+
+        refresh_portfolio_rollups()
+        summary = self.summary()
+        self.assertEqual((summary['total']['loans'], summary['stale_customers']), (4, 0))
+        self.assertFalse(PortfolioStale.objects.exists())
+
+        incremental = self.rollups()
+        rebuild_portfolio()
+        self.assertEqual(self.rollups(), incremental)
+
+    @override_settings(SCORING_CHUNK_SIZE=1)
+    def test_refresh_commits_each_chunk(self):
+        apply = portfolio._apply
+        calls = []
+
+        def second_chunk_fails(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OperationalError('connection lost')
+            apply(*args)
+
+        with mock.patch.object(portfolio, '_apply', second_chunk_fails):
+            with self.assertRaises(OperationalError):
+                refresh_portfolio()
+        # The first chunk stays applied; the second customer is still queued
+        self.assertEqual(list(PortfolioStale.objects.values_list('customer_id', flat=True)), [2])
+        self.assertEqual(PortfolioRollup.objects.get(dimension='total').customers, 1)
+
+        self.assertEqual(refresh_portfolio(), 1)
+        self.assertEqual(PortfolioRollup.objects.get(dimension='total').customers, 2)
+
+    def test_expired_members_are_recomputed(self):
+        refresh_portfolio()
+        self.assertEqual(refresh_portfolio(), 0)
+
+        # The young customer's only loan has ended by then (at a year end, every member expires)
+        later = date.today() + timedelta(days=2)
+        self.assertEqual(refresh_portfolio(later), 1 if later.year == date.today().year else 2)
+        total = PortfolioRollup.objects.get(dimension='total')
+        self.assertEqual((total.customers, total.loans, total.exposure), (2, 2, 0))
+
+
+class EligibilityBatchTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customers = [
+            Customer.objects.create(
+                first_name='A', last_name=str(n), age=30, monthly_salary=100000,
+                phone_number=str(n), approved_limit=3600000
+            )
+            for n in range(5)
+        ]
+
+    def application(self, customer, **overrides):
+        return {"customer_id": customer.customer_id, "loan_amount": 100000,
+                "interest_rate": 10, "tenure": 12, **overrides}
+
+    def test_matches_single_endpoint_with_partial_failures(self):
+        batch = [
+            self.application(self.customers[0]),
+            {"customer_id": 999999, "loan_amount": 1000, "interest_rate": 10, "tenure": 12},
+            {"customer_id": self.customers[1].customer_id, "tenure": 0},
+            self.application(self.customers[2], interest_rate=0, tenure=24),
+        ]
+        response = self.client.post('/check-eligibility/batch/', batch, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[1]["errors"], {"customer_id": ["Customer not found."]})
+        self.assertIn("tenure", results[2]["errors"])
+        for index in (0, 3):
+            single = self.client.post('/check-eligibility/', batch[index], format='json')
+            self.assertEqual(results[index], single.json())
+
+    def test_query_count_does_not_grow_with_batch(self):
+        batch = [self.application(c) for c in self.customers]
+        self.client.post('/check-eligibility/batch/', batch, format='json')  # fill aggregates
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.post('/check-eligibility/batch/', batch[:2], format='json')
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.post('/check-eligibility/batch/', batch, format='json')
+        # Served from the credit cache: only the customer lookup remains
+        with self.assertNumQueries(1):
+            self.client.post('/check-eligibility/batch/', batch, format='json')
+
+
+class CreditCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+
+    def test_loan_creation_invalidates_cached_score(self):
+        self.assertEqual(get_credit_snapshot(self.customer), (100, 0))
+        self.assertEqual(get_credit_snapshot(self.customer), (100, 0))
+        stats = cache_stats()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/create-loan/', {
+                "customer_id": self.customer.customer_id, "loan_amount": 100000,
+                "interest_rate": 10, "tenure": 12
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        _, active_emi_sum = get_credit_snapshot(self.customer)
+        self.assertEqual(float(active_emi_sum), response.data['monthly_installment'])
+        after = cache_stats()
+        # create-loan scores under its row lock without the cache; the read after it missed
+        self.assertEqual((after['hits'] - stats['hits'], after['misses'] - stats['misses']), (0, 1))
+
+
+class AmortizationTestCase(TestCase):
+    def test_schedule_endpoint(self):
+        customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+        loan = Loan.objects.create(
+            customer=customer, loan_amount=100000, tenure=12, interest_rate=12,
+            monthly_repayment=8885, emIs_paid_on_time=0,
+            start_date=date(2024, 1, 1), end_date=date(2024, 12, 26)
+        )
+        response = APIClient().get(f'/view-loan/{loan.loan_id}/schedule/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['monthly_installment'], 8884.88)
+        rows = response.data['schedule']
+        self.assertEqual(len(rows), 12)
+        self.assertEqual((rows[0]['interest'], rows[0]['due_date']), (1000.0, date(2024, 1, 31)))
+        self.assertEqual(rows[-1]['balance'], 0)
+        self.assertAlmostEqual(sum(r['principal'] for r in rows), 100000, places=1)
+
+    def test_vectorized_balances_match_schedules(self):
+        principal = [100000, 250000, 50000, 80000]
+        rate = [12, 9.5, 0, 14]
+        tenure = [12, 36, 10, 24]
+        paid = [5, 36, 3, 0]
+        balances = amortization.outstanding_balance(principal, rate, tenure, paid)
+        for i in range(4):
+            plan = amortization.schedule(principal[i], rate[i], tenure[i])
+            expected = plan['balance'][paid[i] - 1] if paid[i] else principal[i]
+            self.assertAlmostEqual(balances[i], expected, places=6)
+
+
+class ConcurrentCreateLoanTestCase(TransactionTestCase):
+    def test_parallel_requests_do_not_lose_updates(self):
+        customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+        # EMI 8884.88: five active loans keep the EMI sum under 50% of salary, six do not
+        request = {"customer_id": customer.customer_id, "loan_amount": 100000, "interest_rate": 12, "tenure": 12}
+        start = threading.Barrier(8)
+        responses = []
+
+        def apply():
+            try:
+                start.wait()
+                responses.append(APIClient().post('/create-loan/', request, format='json'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=apply) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        approved = [r for r in responses if r.status_code == 201]
+        self.assertEqual(len(approved), 6)
+        customer.refresh_from_db()
+        self.assertAlmostEqual(float(customer.current_debt), 6 * 12 * 8884.88, places=2)
+        self.assertEqual(Loan.objects.filter(customer=customer).count(), 6)
+
+
+class AsyncReadViewsTestCase(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+        self.loan = Loan.objects.create(
+            customer=self.customer, loan_amount=100000, tenure=12, interest_rate=12,
+            monthly_repayment=8884.88, emIs_paid_on_time=2,
+            start_date=date.today(), end_date=date.today() + timedelta(days=360)
+        )
+        self.factory = RequestFactory()
+
+    def test_async_views_match_sync_views(self):
+        path = f'/view-loan/{self.loan.loan_id}/'
+        response = async_to_sync(async_views.view_loan)(self.factory.get(path), loan_id=self.loan.loan_id)
+        self.assertEqual(response.content, APIClient().get(path).content)
+
+        request = {"customer_id": self.customer.customer_id, "loan_amount": 50000, "interest_rate": 9, "tenure": 6}
+        response = async_to_sync(async_views.check_eligibility)(
+            self.factory.post('/check-eligibility/', request, content_type='application/json')
+        )
+        self.assertEqual(response.content, APIClient().post('/check-eligibility/', request, format='json').content)
+
+    def test_async_loans_list_and_not_found(self):
+        view = async_to_sync(async_views.view_loans)
+        response = view(self.factory.get('/'), customer_id=self.customer.customer_id)
+        self.assertEqual(json.loads(response.content)[0]['repayments_left'], 10)
+        self.assertEqual(view(self.factory.get('/'), customer_id=0).status_code, 404)
+
+
+class FastRendererTestCase(TestCase):
+    def test_orjson_renderer_matches_stock_renderer(self):
+        customer = Customer.objects.create(
+            first_name='Zoë', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+        loan = Loan.objects.create(
+            customer=customer, loan_amount=100000, tenure=12, interest_rate=12.5,
+            monthly_repayment=8908.46, emIs_paid_on_time=2,
+            start_date=date.today(), end_date=date.today() + timedelta(days=360)
+        )
+        paths = [
+            f'/view-loan/{loan.loan_id}/', f'/view-loan/{loan.loan_id}/schedule/',
+            f'/view-loans/{customer.customer_id}/', f'/view-loans/{customer.customer_id}/?stream=1',
+            '/view-loan/999999/',
+        ]
+        client = APIClient()
+        stock = [b''.join(client.get(path).streaming_content) if path.endswith('stream=1')
+                 else client.get(path).content for path in paths]
+        fast = {'DEFAULT_RENDERER_CLASSES': ['api.renderers.ORJSONRenderer']}
+        with override_settings(REST_FRAMEWORK=fast):
+            for path, expected in zip(paths, stock):
+                response = client.get(path)
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                self.assertEqual(content, expected, path)
+        self.assertEqual(json.loads(stock[0])['loan_amount'], 100000)
+
+    def test_decimal_renders_as_float(self):
+        body = {'amount': Decimal('8908.46'), 'rates': [Decimal('12.50'), Decimal('0')]}
+        expected = b'{"amount":8908.46,"rates":[12.5,0.0]}'
+        self.assertEqual(JSONRenderer().render(body), expected)
+        self.assertEqual(ORJSONRenderer().render(body), expected)
+
+
+class ViewLoansPaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+        today = date.today()
+        for n in range(7):
+            Loan.objects.create(
+                customer=self.customer, loan_amount=1000 + n, tenure=12, interest_rate=10,
+                monthly_repayment=90, emIs_paid_on_time=n, start_date=today,
+                end_date=today + timedelta(days=30 if n != 3 else -30)
+            )
+
+    def test_keyset_pages_follow_next_cursor(self):
+        path = f'/view-loans/{self.customer.customer_id}/?page_size=4'
+        first = self.client.get(path)
+        self.assertEqual([r['repayments_left'] for r in first.json()], [12, 11, 10, 8])
+        second = self.client.get(first['Link'][1:first['Link'].index('>')])
+        self.assertEqual([r['repayments_left'] for r in second.json()], [7, 6])
+        self.assertNotIn('Link', second)
+        self.assertEqual(self.client.get(path.replace('4', '0')).status_code, 400)
+        self.assertEqual(self.client.get('/view-loans/999999/').status_code, 404)
+
+    def test_stream_returns_every_active_loan(self):
+        response = self.client.get(f'/view-loans/{self.customer.customer_id}/?stream=1')
+        # Iterating the response also drains the async stream the ASGI views return
+        rows = json.loads(b''.join(response))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows, self.client.get(f'/view-loans/{self.customer.customer_id}/').json())
+
+    def test_view_loan_fetches_customer_in_same_query(self):
+        loan = Loan.objects.first()
+        with self.assertNumQueries(1):
+            self.client.get(f'/view-loan/{loan.loan_id}/')
+
+
+class LoanIndexPlanTestCase(TestCase):
+    """Hot loan queries should hit the composite and partial indexes on a realistic table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO api_customer
+                (customer_id, first_name, last_name, age, phone_number, monthly_salary, approved_limit, current_debt)
+                SELECT g, 'F', 'L', 30, g::text, 50000, 1800000, 0 FROM generate_series(1, 5000) g
+            """)
+            cursor.execute("""
+                INSERT INTO api_loan
+                (loan_id, customer_id, loan_amount, tenure, interest_rate, monthly_repayment,
+                 "emIs_paid_on_time", start_date, end_date)
+                SELECT g, 1 + g % 5000, 100000, 24, 10, 4614.49, CASE WHEN g % 4 = 0 THEN 24 ELSE g % 24 END,
+                       DATE '2020-01-01' + g % 1000, DATE '2022-01-01' + g % 2000
+                FROM generate_series(1, 60000) g
+            """)
+            cursor.execute("ANALYZE api_customer")
+            cursor.execute("ANALYZE api_loan")
+
+    def explain(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def explain_captured(self, run):
+        """Plans of the statements run(cursor) executes, as sent to the server."""
+        with CaptureQueriesContext(connection) as queries:
+            with connection.cursor() as cursor:
+                run(cursor)
+        return [self.explain(query['sql']) for query in queries.captured_queries]
+
+    def test_active_loans_page_uses_composite_index(self):
+        sql, params = active_loans(42).query.sql_with_params()
+        plan = self.explain(sql, params)
+        self.assertIn('api_loan_customer_end_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_aggregate_refresh_reads_loans_by_index(self):
+        plan, = self.explain_captured(lambda cursor: refresh_aggregates(cursor, [7, 8, 9], date(2025, 1, 1)))
+        self.assertNotIn('Seq Scan on api_loan', plan)
+        self.assertIn('api_loan_customer_end_idx', plan)
+
+    def test_debt_refresh_uses_partial_index(self):
+        plan, = self.explain_captured(lambda cursor: refresh_current_debts(cursor, [7, 8, 9]))
+        self.assertIn('api_loan_outstanding_idx', plan)
+
+
+class ConnectionPoolTestCase(TestCase):
+    """The pooled backend reuses connections and bounds how many a process opens."""
+
+    def pooled(self, **pool):
+        settings_dict = dict(connection.settings_dict, OPTIONS={'pool': pool}, CONN_MAX_AGE=0)
+        return DatabaseWrapper(settings_dict, alias='pool_test')
+
+    def tearDown(self):
+        for key in [key for key in _pools if key[1] == 'pool_test']:
+            _pools.pop(key).close_idle()
+
+    def test_close_returns_connection_to_pool(self):
+        first = self.pooled(max_size=1, timeout=1)
+        with first.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            pid = cursor.fetchone()[0]
+        first.close()
+
+        opened = metrics.counter('db_connections_opened_total', '').value(alias='pool_test')
+        second = self.pooled(max_size=1, timeout=1)
+        with second.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            self.assertEqual(cursor.fetchone()[0], pid)
+        second.close()
+        self.assertEqual(metrics.counter('db_connections_opened_total', '').value(alias='pool_test'), opened)
+
+    def test_exhausted_pool_times_out(self):
+        holder = self.pooled(max_size=1, timeout=0.1)
+        holder.ensure_connection()
+        try:
+            with self.assertRaises(OperationalError):
+                self.pooled(max_size=1, timeout=0.1).ensure_connection()
+        finally:
+            holder.close()
+        body = self.client.get('/metrics/').content.decode()
+        self.assertIn('db_pool_timeouts_total{alias="pool_test"} 1', body)
+        self.assertIn('db_pool_wait_seconds_count{alias="pool_test"}', body)
+
+    def test_health_check_only_after_idle_threshold(self):
+        pool = ConnectionPool('pool_test', max_size=1, check_idle=60)
+        raw = mock.MagicMock(closed=0)
+        raw.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+        pool.release(pool.acquire(lambda: raw, health_check=True))
+
+        pool.release(pool.acquire(lambda: None, health_check=True))
+        raw.cursor.assert_not_called()
+        with mock.patch('credit_system.db.base.time.monotonic', return_value=float('inf')):
+            self.assertIs(pool.acquire(lambda: None, health_check=True), raw)
+        raw.cursor.assert_called_once()
+
+
+class ReadReplicaPinTestCase(TestCase):
+    def test_writes_pin_the_client_to_the_primary(self):
+        customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+        response = APIClient().post('/create-loan/', {
+            "customer_id": customer.customer_id, "loan_amount": 100000, "interest_rate": 12, "tenure": 12
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_reads_in_a_primary_transaction_stay_on_the_primary(self):
+        with routers.use_replica():
+            self.assertEqual(ReadReplicaRouter().db_for_read(Loan), 'default')
+
+
+@skipUnless('replica' in settings.DATABASES, "no replica configured (POSTGRES_REPLICA_HOST)")
+class ReadReplicaRoutingTestCase(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+        self.loan = Loan.objects.create(
+            customer=self.customer, loan_amount=100000, tenure=12, interest_rate=12,
+            monthly_repayment=8884.88, emIs_paid_on_time=0,
+            start_date=date.today(), end_date=date.today() + timedelta(days=360)
+        )
+
+    def queries(self, path, client=None):
+        client = client or APIClient()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def test_read_only_views_use_the_replica(self):
+        primary, replica = self.queries(f'/view-loan/{self.loan.loan_id}/')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_client_reads_its_own_writes(self):
+        client = APIClient()
+        response = client.post('/create-loan/', {
+            "customer_id": self.customer.customer_id, "loan_amount": 50000, "interest_rate": 12, "tenure": 6
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        primary, replica = self.queries(f'/view-loan/{response.data["loan_id"]}/', client)
+        self.assertEqual(replica, 0)
+        # A different client reading the same customer's loans is pinned through the cache
+        primary, replica = self.queries(f'/view-loans/{self.customer.customer_id}/')
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+
+class SyntheticDataTestCase(TestCase):
+    def test_generated_files_ingest_cleanly(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        customer_file = os.path.join(tmp, 'customer_data.xlsx')
+        loan_file = os.path.join(tmp, 'loan_data.xlsx')
+        write_frames(synthetic.customer_chunks(30, 1, seed=3, chunk_size=7), customer_file)
+        write_frames(synthetic.loan_chunks(90, (1, 30), 1, seed=3, chunk_size=20), loan_file)
+
+        ingest_customer_data(customer_file)
+        ingest_loan_data(loan_file)
+        update_current_debts()
+
+        self.assertEqual(Customer.objects.count(), 30)
+        self.assertEqual(Loan.objects.count(), 90)
+        for customer in Customer.objects.all():
+            self.assertEqual(customer.approved_limit, round(36 * customer.monthly_salary / 100000) * 100000)
+        for loan in Loan.objects.all():
+            self.assertLessEqual(loan.emIs_paid_on_time, loan.tenure)
+            self.assertAlmostEqual(
+                float(loan.monthly_repayment),
+                float(amortization.emi(loan.loan_amount, loan.interest_rate, loan.tenure)), places=2
+            )
+        self.assertEqual(find_drift(connection.cursor(), date.today()), [])
+
+    def test_generate_data_loads_after_existing_ids(self):
+        Customer.objects.create(
+            customer_id=500, first_name='A', last_name='B', age=30,
+            monthly_salary=50000, phone_number='1', approved_limit=1800000
+        )
+        call_command('generate_data', customers=20, loans=60, db=True, stdout=io.StringIO())
+
+        self.assertEqual(Customer.objects.filter(customer_id__gt=500).count(), 20)
+        self.assertEqual(Loan.objects.count(), 60)
+        self.assertEqual(find_drift(connection.cursor(), date.today()), [])
+        # COPYed customers are queued for the portfolio rollups like ORM-created ones
+        self.assertEqual(PortfolioStale.objects.filter(customer_id__gt=500).count(), 20)
+        # Same seed, same rows
+        frames = list(synthetic.loan_chunks(60, (501, 520), 1, chunk_size=25))
+        self.assertTrue(pd.concat(frames).equals(pd.concat(synthetic.loan_chunks(60, (501, 520), 1, chunk_size=25))))
+
+
+class InputFormatTestCase(TestCase):
+    FORMATS = ['xlsx', 'csv'] + (['parquet', 'arrow'] if importlib.util.find_spec('pyarrow') else [])
+
+    def write(self, fmt):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        # Extensionless copies: the format has to come from the contents
+        customer_file, loan_file = os.path.join(tmp, 'customers'), os.path.join(tmp, 'loans')
+        write_frames(synthetic.customer_chunks(30, 1, seed=5, chunk_size=7), customer_file + f'.{fmt}')
+        write_frames(synthetic.loan_chunks(90, (1, 30), 1, seed=5, chunk_size=20), loan_file + f'.{fmt}')
+        if fmt != 'csv':
+            os.rename(customer_file + f'.{fmt}', customer_file)
+            os.rename(loan_file + f'.{fmt}', loan_file)
+            return customer_file, loan_file
+        return customer_file + '.csv', loan_file + '.csv'
+
+    def test_formats_read_identically(self):
+        expected = None
+        for fmt in self.FORMATS:
+            with self.subTest(fmt=fmt):
+                customer_file, loan_file = self.write(fmt)
+                self.assertEqual(readers.detect_format(loan_file), fmt)
+                self.assertEqual(readers.count_rows(loan_file), 90)
+                chunks = list(readers.read_chunks(loan_file, 8, start=13, stop=50))
+                self.assertEqual([len(c) for c in chunks], [8, 8, 8, 8, 5])
+                loans, rejects = loan_frame(pd.concat(chunks, ignore_index=True), offset=13)
+                customers = customer_frame(pd.concat(readers.read_chunks(customer_file, 4), ignore_index=True))
+                self.assertTrue(rejects.empty)
+                if expected is None:
+                    expected = (loans, customers)
+                pd.testing.assert_frame_equal(loans, expected[0], check_dtype=False)
+                pd.testing.assert_frame_equal(customers, expected[1], check_dtype=False)
+
+    def test_ingests_csv(self):
+        customer_file, loan_file = self.write('csv')
+        ingest_customer_data(customer_file, chunk_size=8)
+        self.assertIn('Processed 90 loans, 0 errors', ingest_loan_data(loan_file, chunk_size=16))
+        self.assertEqual(Customer.objects.get(customer_id=1).phone_number, '9000000001')
+
+
+class BenchmarkCompareTestCase(TestCase):
+    def test_flags_slower_latency_and_lower_throughput(self):
+        baseline = {'endpoints': {'view_loan': {'rps': 100.0, 'p95_ms': 20.0, 'requests': 500}},
+                    'ingest': {'ingest_loan_data': {'rows_per_sec': 1000.0, 'seconds': 1.0}}}
+        current = {'endpoints': {'view_loan': {'rps': 95.0, 'p95_ms': 30.0, 'requests': 475}},
+                   'ingest': {'ingest_loan_data': {'rows_per_sec': 800.0, 'seconds': 1.25}}}
+
+        rows = {row['metric']: row for row in compare(current, baseline, tolerance=0.1)}
+
+        self.assertEqual(set(rows), {
+            'endpoints.view_loan.rps', 'endpoints.view_loan.p95_ms', 'ingest.ingest_loan_data.rows_per_sec'
+        })
+        self.assertFalse(rows['endpoints.view_loan.rps']['regressed'])
+        self.assertTrue(rows['endpoints.view_loan.p95_ms']['regressed'])
+        self.assertTrue(rows['ingest.ingest_loan_data.rows_per_sec']['regressed'])
+
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name='A', last_name='B', age=30, monthly_salary=100000,
+            phone_number='1', approved_limit=3600000
+        )
+
+    def test_records_queries_db_time_and_stages_per_url_name(self):
+        seconds = metrics.histogram('http_request_duration_seconds', '')
+        queries = metrics.histogram('http_request_db_queries', '')
+        stages = metrics.histogram('view_stage_duration_seconds', '')
+        key = (('view', 'create_loan'),)
+        before = (
+            seconds.count(view='create_loan', method='POST'),
+            stages.count(view='create_loan', stage='credit_aggregate'),
+            queries.values.get(key, (None, 0))[1],
+        )
+
+        with CaptureQueriesContext(connection) as captured:
+            response = APIClient().post('/create-loan/', {
+                "customer_id": self.customer.customer_id, "loan_amount": 100000, "interest_rate": 12, "tenure": 12
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(seconds.count(view='create_loan', method='POST'), before[0] + 1)
+        self.assertEqual(stages.count(view='create_loan', stage='credit_aggregate'), before[1] + 1)
+        # Histogram sum grows by this request's query count
+        self.assertEqual(queries.values[key][1] - before[2], len(captured))
+
+        body = self.client.get('/metrics/').content.decode()
+        self.assertIn('http_requests_total{method="POST",status="2xx",view="create_loan"}', body)
+        self.assertIn('view_stage_duration_seconds_count{stage="loan_write",view="create_loan"}', body)
+
+    def test_one_scrape_sums_every_worker(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        exited = subprocess.Popen(['true'])
+        exited.wait()
+        requests = {'kind': 'counter', 'documentation': '', 'values': [[[['view', 'w']], 3]]}
+        in_use = {'kind': 'gauge', 'documentation': '', 'values': [[[['alias', 'w']], 2]]}
+        # Another live worker, and one that has exited
+        for pid in (os.getppid(), exited.pid):
+            with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+                json.dump({'workers_test_total': requests, 'workers_test_in_use': in_use}, f)
+
+        with override_settings(METRICS_MULTIPROC_DIR=directory):
+            metrics.counter('workers_test_total', 'Test counter.').inc(view='w')
+            body = self.client.get('/metrics/').content.decode()
+        self.assertIn(f'{os.getpid()}.json', os.listdir(directory))
+        # Counters of exited workers still count; their gauges do not
+        self.assertIn('workers_test_total{view="w"} 7', body)
+        self.assertIn('workers_test_in_use{alias="w"} 2', body)
+        self.assertEqual(body.count('# TYPE workers_test_total counter'), 1)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.assertLogs('api.middleware', level='WARNING') as logs:
+            self.client.get(f'/view-loans/{self.customer.customer_id}/')
+        self.assertIn('(view_loans)', logs.output[0])
+        self.assertIn('FROM "api_loan"', logs.output[0])
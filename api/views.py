@@ -2,6 +2,10 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import date
@@ -12,19 +16,34 @@ from .models import Customer, Loan
 from .serializers import (
     RegisterSerializer, CustomerResponseSerializer,
     CheckEligibilityRequestSerializer, CreateLoanRequestSerializer,
-    LoanDetailSerializer, CustomerLoanSerializer
+    LoanDetailSerializer, LoanScheduleSerializer
 )
-from .utils import calculate_credit_score
+from . import amortization
+from .aggregates import get_credit_aggregate
+from .credit_cache import get_credit_snapshot, get_credit_snapshots
+from .credit_rules import evaluate_eligibility, score_from_aggregate
+from .pagination import active_loans, add_next_link, page_params, split_page, stream_json_array
+from .portfolio import portfolio_summary, queue_customers, schedule_refresh
+from .utils import approved_limits
+from credit_system.profiling import stage
+from credit_system.routers import pin_primary
 
 
 def calculate_emi(loan_amount, interest_rate, tenure):
     """Calculate EMI using compound interest formula."""
-    if loan_amount <= 0 or tenure <= 0:
-        return 0.0
-    r = interest_rate / 12 / 100
-    if r == 0:
-        return loan_amount / tenure
-    return loan_amount * r * (1 + r)**tenure / ((1 + r)**tenure - 1)
+    return float(amortization.emi(loan_amount, interest_rate, tenure))
+
+
+def eligibility_result(customer_id, data, approval, corrected_rate, emi):
+    """Response body shared by the single and batch eligibility endpoints."""
+    return {
+        "customer_id": customer_id,
+        "approval": approval,
+        "interest_rate": data['interest_rate'],
+        "corrected_interest_rate": corrected_rate if approval else None,
+        "tenure": data['tenure'],
+        "monthly_installment": round(emi, 2) if approval else 0
+    }
 
 
 class RegisterView(APIView):
@@ -34,7 +53,78 @@ class RegisterView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         customer = serializer.save()
-        return Response(CustomerResponseSerializer(customer).data, status=status.HTTP_201_CREATED)
+        response = Response(CustomerResponseSerializer(customer).data, status=status.HTTP_201_CREATED)
+        return pin_primary(response, customer.customer_id)
+
+
+class RegisterBulkView(APIView):
+    """
+    Register a list of customers in one transaction. Every item is validated
+    first, including phone numbers repeated within the list or already
+    registered; if any item fails nothing is created and the per-item
+    errors are returned. Otherwise approved limits are computed for the
+    whole list at once and the rows go in with bulk_create.
+    """
+    # pg_advisory lock namespace: concurrent batches with a phone number in common take turns
+    PHONE_LOCK = 7303
+
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list of customers."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.BULK_REGISTER_MAX:
+            return Response(
+                {"detail": f"At most {settings.BULK_REGISTER_MAX} customers per batch."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errors = {}
+        valid = []
+        for index, item in enumerate(request.data):
+            serializer = RegisterSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors[index] = serializer.errors
+
+        phones = [data['phone_number'] for _, data in valid]
+        with transaction.atomic():
+            with stage('phone_lookup'):
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT pg_advisory_xact_lock(%s, key)
+                        FROM (SELECT DISTINCT hashtext(phone) AS key FROM unnest(%s::text[]) AS phone ORDER BY key) AS keys
+                    """, [self.PHONE_LOCK, phones])
+                taken = set(Customer.objects.filter(phone_number__in=phones).values_list('phone_number', flat=True))
+
+            first = {}
+            for index, data in valid:
+                phone = data['phone_number']
+                if phone in taken:
+                    errors[index] = {"phone_number": ["A customer with this phone number already exists."]}
+                elif phone in first:
+                    errors[index] = {"phone_number": [f"Same phone number as item {first[phone]}."]}
+                else:
+                    first[phone] = index
+            if errors:
+                return Response(
+                    [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            limits = approved_limits([data['monthly_salary'] for _, data in valid]).astype('int64').tolist()
+            customers = [
+                Customer(**data, approved_limit=limit, current_debt=0)
+                for (_, data), limit in zip(valid, limits)
+            ]
+            with stage('customer_write'):
+                # bulk_create sets customer_id from RETURNING, in input order; it sends no
+                # post_save, so the portfolio queue is filled here
+                Customer.objects.bulk_create(customers, batch_size=settings.BULK_REGISTER_BATCH_SIZE)
+                with connection.cursor() as cursor:
+                    queue_customers(cursor, [customer.customer_id for customer in customers])
+
+        response = Response(CustomerResponseSerializer(customers, many=True).data, status=status.HTTP_201_CREATED)
+        return pin_primary(response)
 
 
 class CheckEligibilityView(APIView):
@@ -44,61 +134,78 @@ class CheckEligibilityView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = serializer.validated_data
-        customer = get_object_or_404(Customer, customer_id=data['customer_id'])
-
-        credit_score = calculate_credit_score(customer)
-
-        # Current EMI sum from active loans
-        active_loans = customer.loans.filter(end_date__gte=date.today())
-        current_emi_sum = sum(loan.monthly_repayment for loan in active_loans)
-
-        # Check EMI > 50% of salary
-        if current_emi_sum > 0.5 * customer.monthly_salary:
-            return Response({
-                "customer_id": customer.customer_id,
-                "approval": False,
-                "interest_rate": data['interest_rate'],
-                "corrected_interest_rate": None,
-                "tenure": data['tenure'],
-                "monthly_installment": 0
-            }, status=status.HTTP_200_OK)
-
-        # Determine approval and corrected rate
-        approval = True
-        corrected_rate = data['interest_rate']
-
-        if credit_score > 50:
-            pass  # Any rate allowed
-        elif credit_score > 30:
-            if data['interest_rate'] < 12:
-                corrected_rate = 12.0
-        elif credit_score > 10:
-            if data['interest_rate'] < 16:
-                corrected_rate = 16.0
-        else:
-            approval = False
-
-        if not approval:
-            return Response({
-                "customer_id": customer.customer_id,
-                "approval": False,
-                "interest_rate": data['interest_rate'],
-                "corrected_interest_rate": None,
-                "tenure": data['tenure'],
-                "monthly_installment": 0
-            }, status=status.HTTP_200_OK)
-
-        # Calculate EMI
-        emi = calculate_emi(data['loan_amount'], corrected_rate, data['tenure'])
-
-        return Response({
-            "customer_id": customer.customer_id,
-            "approval": True,
-            "interest_rate": data['interest_rate'],
-            "corrected_interest_rate": corrected_rate,
-            "tenure": data['tenure'],
-            "monthly_installment": round(emi, 2)
-        }, status=status.HTTP_200_OK)
+        with stage('customer_lookup'):
+            customer = get_object_or_404(Customer, customer_id=data['customer_id'])
+
+        # Score and current EMI sum of active loans, cached per customer and day
+        with stage('credit_snapshot'):
+            credit_score, current_emi_sum = get_credit_snapshot(customer)
+
+        with stage('eligibility_rules'):
+            approval, corrected_rate = evaluate_eligibility(
+                credit_score, current_emi_sum, customer.monthly_salary, data['interest_rate']
+            )
+            emi = calculate_emi(data['loan_amount'], corrected_rate, data['tenure']) if approval else 0
+        return Response(
+            eligibility_result(customer.customer_id, data, approval, corrected_rate, emi),
+            status=status.HTTP_200_OK
+        )
+
+
+class CheckEligibilityBatchView(APIView):
+    """
+    Eligibility for a list of applications. Customers and their credit
+    snapshots are fetched in a constant number of queries and all EMIs are
+    computed in one vectorized pass; invalid items fail on their own.
+    """
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list of applications."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.ELIGIBILITY_BATCH_MAX:
+            return Response(
+                {"detail": f"At most {settings.ELIGIBILITY_BATCH_MAX} applications per batch."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [None] * len(request.data)
+        valid = []
+        for index, item in enumerate(request.data):
+            serializer = CheckEligibilityRequestSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {"index": index, "errors": serializer.errors}
+
+        customer_ids = list({data['customer_id'] for _, data in valid})
+        with stage('customer_lookup'):
+            customers = Customer.objects.in_bulk(customer_ids)
+        with stage('credit_snapshot'):
+            snapshots = get_credit_snapshots(list(customers.values()))
+
+        approved = []
+        for index, data in valid:
+            customer = customers.get(data['customer_id'])
+            if customer is None:
+                results[index] = {"index": index, "errors": {"customer_id": ["Customer not found."]}}
+                continue
+            credit_score, current_emi_sum = snapshots[customer.customer_id]
+            approval, corrected_rate = evaluate_eligibility(
+                credit_score, current_emi_sum, customer.monthly_salary, data['interest_rate']
+            )
+            results[index] = eligibility_result(customer.customer_id, data, approval, corrected_rate, 0)
+            if approval:
+                approved.append((index, data, corrected_rate))
+
+        if approved:
+            emis = amortization.emi(
+                [data['loan_amount'] for _, data, _ in approved],
+                [rate for _, _, rate in approved],
+                [data['tenure'] for _, data, _ in approved],
+            )
+            for (index, _, _), emi in zip(approved, emis):
+                results[index]["monthly_installment"] = round(float(emi), 2)
+
+        return Response(results, status=status.HTTP_200_OK)
 
 
 class CreateLoanView(APIView):
@@ -108,94 +215,108 @@ class CreateLoanView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = serializer.validated_data
-        customer = get_object_or_404(Customer, customer_id=data['customer_id'])
-
-        # Reuse eligibility logic
-        eligibility_data = {
-            "customer_id": data['customer_id'],
-            "loan_amount": data['loan_amount'],
-            "interest_rate": data['interest_rate'],
-            "tenure": data['tenure']
-        }
-        eligibility_check = CheckEligibilityView()
-        eligibility_check.request = request
-        eligibility_response = eligibility_check.post(request).data
-
-        if not eligibility_response.get("approval", False):
-            return Response({
-                "loan_id": None,
-                "customer_id": customer.customer_id,
-                "loan_approved": False,
-                "message": "Loan not approved based on credit score or EMI limit",
-                "monthly_installment": 0
-            }, status=status.HTTP_200_OK)
-
-        # Create loan
-        corrected_rate = eligibility_response['corrected_interest_rate']
-        emi = eligibility_response['monthly_installment']
-        start_date = date.today()
-        # Approximate end date (30 days per month)
-        end_date = start_date + timezone.timedelta(days=30 * data['tenure'])
-
-        loan = Loan.objects.create(
-            customer=customer,
-            loan_amount=data['loan_amount'],
-            tenure=data['tenure'],
-            interest_rate=corrected_rate,
-            monthly_repayment=emi,
-            emIs_paid_on_time=0,
-            start_date=start_date,
-            end_date=end_date
-        )
 
-        # Update current debt
-        customer.current_debt += Decimal(str(data['loan_amount']))
-        customer.save()
-
-        return Response({
+        with transaction.atomic():
+            # The row lock serialises loans for one customer, so the EMI check,
+            # the loan insert and the debt update see each other's writes
+            with stage('customer_lock'):
+                customer = get_object_or_404(Customer.objects.select_for_update(), customer_id=data['customer_id'])
+
+            # Read the aggregate under the lock rather than the cache, which is
+            # only invalidated after a concurrent loan has committed
+            with stage('credit_aggregate'):
+                aggregate = get_credit_aggregate(customer.customer_id)
+            with stage('eligibility_rules'):
+                credit_score = score_from_aggregate(aggregate, customer.approved_limit)
+                approval, corrected_rate = evaluate_eligibility(
+                    credit_score, aggregate.active_emi_sum, customer.monthly_salary, data['interest_rate']
+                )
+
+            if not approval:
+                return Response({
+                    "loan_id": None,
+                    "customer_id": customer.customer_id,
+                    "loan_approved": False,
+                    "message": "Loan not approved based on credit score or EMI limit",
+                    "monthly_installment": 0
+                }, status=status.HTTP_200_OK)
+
+            # Create loan
+            emi = round(calculate_emi(data['loan_amount'], corrected_rate, data['tenure']), 2)
+            start_date = date.today()
+            # Approximate end date (30 days per month)
+            end_date = start_date + timezone.timedelta(days=30 * data['tenure'])
+
+            with stage('loan_write'):
+                loan = Loan.objects.create(
+                    customer=customer,
+                    loan_amount=data['loan_amount'],
+                    tenure=data['tenure'],
+                    interest_rate=corrected_rate,
+                    monthly_repayment=emi,
+                    emIs_paid_on_time=0,
+                    start_date=start_date,
+                    end_date=end_date
+                )
+                # The loan is queued for the portfolio rollups by post_save; apply it soon after commit
+                transaction.on_commit(schedule_refresh, robust=True)
+
+                # current_debt = SUM(monthly_repayment * remaining_emis); nothing is paid on a new loan
+                Customer.objects.filter(customer_id=customer.customer_id).update(
+                    current_debt=F('current_debt') + Decimal(str(emi)) * data['tenure']
+                )
+
+        response = Response({
             "loan_id": loan.loan_id,
             "customer_id": customer.customer_id,
             "loan_approved": True,
             "message": "Loan approved",
             "monthly_installment": emi
         }, status=status.HTTP_201_CREATED)
+        return pin_primary(response, customer.customer_id)
 
 
 class ViewLoanView(APIView):
     def get(self, request, loan_id):
-        loan = get_object_or_404(Loan, loan_id=loan_id, customer__isnull=False)
-        customer = loan.customer
+        loan = get_object_or_404(Loan.objects.select_related('customer'), loan_id=loan_id)
+        return Response(LoanDetailSerializer(loan).data, status=status.HTTP_200_OK)
 
-        return Response({
-            "loan_id": loan.loan_id,
-            "customer": {
-                "id": customer.customer_id,
-                "first_name": customer.first_name,
-                "last_name": customer.last_name,
-                "phone_number": customer.phone_number,
-                "age": customer.age
-            },
-            "loan_amount": loan.loan_amount,
-            "interest_rate": loan.interest_rate,
-            "monthly_installment": loan.monthly_repayment,
-            "tenure": loan.tenure
-        }, status=status.HTTP_200_OK)
+
+class ViewLoanScheduleView(APIView):
+    def get(self, request, loan_id):
+        loan = get_object_or_404(Loan, loan_id=loan_id)
+        return Response(LoanScheduleSerializer(loan).data, status=status.HTTP_200_OK)
 
 
 class ViewLoansByCustomerView(APIView):
+    """
+    Active loans of a customer, keyset-paginated on loan_id (?cursor=, ?page_size=),
+    or streamed as a single JSON array with ?stream=1.
+    """
     def get(self, request, customer_id):
-        customer = get_object_or_404(Customer, customer_id=customer_id)
-        active_loans = customer.loans.filter(end_date__gte=date.today())
-
-        response_data = []
-        for loan in active_loans:
-            repayments_left = loan.tenure - loan.emIs_paid_on_time
-            response_data.append({
-                "loan_id": loan.loan_id,
-                "loan_amount": loan.loan_amount,
-                "interest_rate": loan.interest_rate,
-                "monthly_installment": loan.monthly_repayment,
-                "repayments_left": repayments_left
-            })
-
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        cursor, page_size, stream = page_params(request.query_params)
+
+        if stream:
+            get_object_or_404(Customer, customer_id=customer_id)
+            # Fetched whole rather than in chunks when DB_POOL_MODE=pgbouncer disables server-side cursors
+            values = active_loans(customer_id, cursor).iterator(chunk_size=settings.VIEW_LOANS_STREAM_CHUNK)
+            return StreamingHttpResponse(stream_json_array(values), content_type='application/json')
+
+        values = list(active_loans(customer_id, cursor)[:page_size + 1])
+        if not values:
+            get_object_or_404(Customer, customer_id=customer_id)
+        rows, next_cursor = split_page(values, page_size)
+        return add_next_link(Response(rows, status=status.HTTP_200_OK), request, next_cursor, page_size)
+
+
+class PortfolioSummaryView(APIView):
+    """
+    Exposure, EMI load, repayment record and approval mix of the whole
+    portfolio, by age band, salary band and credit-score slab. Served from
+    the rollup tables as last refreshed, with as_of and stale_customers
+    saying how current they are; see portfolio.py.
+    """
+    def get(self, request):
+        with stage('portfolio_summary'):
+            summary = portfolio_summary()
+        return Response(summary, status=status.HTTP_200_OK)
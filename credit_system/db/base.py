@@ -0,0 +1,177 @@
+# credit_system/db/base.py
+"""
+PostgreSQL backend with connection metrics, per-request query profiling
+and an optional per-process pool.
+
+Django 4.2 has no built-in pool for psycopg2. With
+OPTIONS['pool'] = {'max_size': N, 'timeout': seconds} each process hands out
+at most N connections and close() returns them to the pool instead of
+disconnecting; callers wait up to timeout seconds for a free one. With
+CONN_HEALTH_CHECKS, a connection idle for more than check_idle seconds
+(default 30) is tested with SELECT 1 before it is handed out again; one
+returned more recently is trusted. Without the option this behaves like the
+stock backend, apart from the metrics.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.backends.postgresql import base, creation
+from psycopg2 import extensions
+
+from credit_system import metrics
+from credit_system.profiling import record_query
+
+CONNECT_SECONDS = metrics.histogram('db_connect_seconds', 'Time spent opening new database connections.')
+CONNECTIONS_OPENED = metrics.counter('db_connections_opened_total', 'Database connections opened.')
+POOL_WAIT_SECONDS = metrics.histogram('db_pool_wait_seconds', 'Time spent waiting for a pooled connection.')
+POOL_TIMEOUTS = metrics.counter('db_pool_timeouts_total', 'Checkouts that gave up waiting for a pooled connection.')
+POOL_IN_USE = metrics.gauge('db_pool_connections_in_use', 'Pooled connections currently checked out.')
+POOL_IDLE = metrics.gauge('db_pool_connections_idle', 'Open pooled connections waiting to be reused.')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    def __init__(self, alias, max_size, timeout=30, check_idle=30):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self._slots = threading.BoundedSemaphore(max_size)
+        # (connection, time.monotonic() when it was returned)
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def _report(self, in_use):
+        POOL_IN_USE.inc(in_use, alias=self.alias)
+        POOL_IDLE.set(len(self._idle), alias=self.alias)
+
+    def _take_idle(self, health_check):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, idle_since = self._idle.pop()
+            if connection.closed or connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.close()
+                continue
+            if health_check and time.monotonic() - idle_since > self.check_idle:
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                except base.Database.Error:
+                    connection.close()
+                    continue
+            return connection
+
+    def acquire(self, connect, health_check=False):
+        """Reuse an idle connection or open one with connect(), waiting for a free slot."""
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            POOL_TIMEOUTS.inc(alias=self.alias)
+            raise base.Database.OperationalError(
+                f"No pooled connection for '{self.alias}' within {self.timeout}s "
+                f"(max_size={self.max_size})"
+            )
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - started, alias=self.alias)
+        try:
+            connection = self._take_idle(health_check) or connect()
+        except BaseException:
+            self._slots.release()
+            raise
+        self._report(1)
+        return connection
+
+    def release(self, connection):
+        """Put a connection back, rolling back any open transaction; broken ones are dropped."""
+        try:
+            if not connection.closed:
+                status = connection.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    connection.close()
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            if not connection.closed:
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+            self._report(-1)
+
+    def close_idle(self):
+        """Disconnect every idle connection; checked-out ones are unaffected."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            connection.close()
+        self._report(0)
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would otherwise block DROP DATABASE
+        if self.connection.pool is not None:
+            self.connection.pool.close_idle()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Feeds the per-request profile; a no-op outside requests
+        self.execute_wrappers.append(record_query)
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options:
+            return None
+        # Keyed by pid, since a forked worker must never reuse its parent's
+        # sockets, and by target, since tests repoint NAME at the test database
+        settings_dict = self.settings_dict
+        key = (
+            os.getpid(), self.alias,
+            settings_dict['HOST'], settings_dict['PORT'], settings_dict['USER'], settings_dict['NAME'],
+        )
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(self.alias, **options)
+            return _pools[key]
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def _open_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        CONNECT_SECONDS.observe(time.perf_counter() - started, alias=self.alias)
+        CONNECTIONS_OPENED.inc(alias=self.alias)
+        return connection
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return self._open_connection(conn_params)
+        # Set by the stock get_new_connection, which a reused connection skips
+        self.isolation_level = base.IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', base.IsolationLevel.READ_COMMITTED)
+        )
+        return pool.acquire(
+            lambda: self._open_connection(conn_params),
+            health_check=self.settings_dict['CONN_HEALTH_CHECKS'],
+        )
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
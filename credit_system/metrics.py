@@ -0,0 +1,248 @@
+# credit_system/metrics.py
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Counters, gauges and histograms are kept per process. With
+PROMETHEUS_MULTIPROC_DIR set, as for prometheus_client's multiprocess mode,
+every process also writes a snapshot of its values to <dir>/<pid>.json at
+most every METRICS_FLUSH_SECONDS, and /metrics/ sums the snapshots of all
+processes, so one scrape of the gunicorn bind covers every worker. Counters
+and histograms of exited workers are kept; their gauges are dropped. The
+directory must be emptied when the server starts (gunicorn.conf.py does).
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = {}
+_lock = threading.Lock()
+_dirty = False
+_flusher_pid = None
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in key
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        _changed()
+
+    def value(self, **labels):
+        return self.values.get(_key(labels), 0)
+
+    def merge(self, key, value):
+        self.values[key] = self.values.get(key, 0) + value
+
+    def snapshot(self):
+        return {'values': [[list(key), value] for key, value in self.values.items()]}
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, key, value
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with _lock:
+            self.values[_key(labels)] = value
+        _changed()
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        with _lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value)
+        _changed()
+
+    def count(self, **labels):
+        counts, _ = self.values.get(_key(labels), ([0], 0.0))
+        return counts[-1]
+
+    def merge(self, key, value):
+        counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+        self.values[key] = ([a + b for a, b in zip(counts, value[0])], total + value[1])
+
+    def snapshot(self):
+        return {
+            'buckets': list(self.buckets[:-1]),
+            'values': [[list(key), list(value)] for key, value in self.values.items()],
+        }
+
+    def samples(self):
+        for key, (counts, total) in self.values.items():
+            for bound, count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket', key + (('le', _format_value(bound)),), count
+            yield f'{self.name}_sum', key, total
+            yield f'{self.name}_count', key, counts[-1]
+
+
+def _register(cls, name, documentation, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, documentation, **kwargs)
+    if type(metric) is not cls:
+        raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+    return metric
+
+
+def counter(name, documentation):
+    return _register(Counter, name, documentation)
+
+
+def gauge(name, documentation):
+    return _register(Gauge, name, documentation)
+
+
+def histogram(name, documentation, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, documentation, buckets=buckets)
+
+
+KINDS = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}
+
+
+def _changed():
+    """Mark the values dirty and, in multiprocess mode, make sure this process has a flush thread."""
+    global _dirty, _flusher_pid
+    if not settings.METRICS_MULTIPROC_DIR:
+        return
+    _dirty = True
+    # Checked per pid: a forked worker does not inherit its parent's thread
+    if _flusher_pid != os.getpid():
+        with _lock:
+            if _flusher_pid != os.getpid():
+                _flusher_pid = os.getpid()
+                threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+                atexit.register(flush)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(settings.METRICS_FLUSH_SECONDS)
+        if _dirty:
+            flush()
+
+
+def flush():
+    """Write this process's values to its snapshot file in PROMETHEUS_MULTIPROC_DIR."""
+    global _dirty
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    with _lock:
+        data = {
+            metric.name: {'kind': metric.kind, 'documentation': metric.documentation, **metric.snapshot()}
+            for metric in _registry.values()
+        }
+        _dirty = False
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    # Written aside and renamed, so a scrape never reads half a file
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _collect(directory):
+    """Metrics summed over the snapshot files of every process."""
+    flush()
+    merged = {}
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        alive = _alive(int(os.path.basename(path).split('.')[0]))
+        for name, snapshot in data.items():
+            if snapshot['kind'] == 'gauge' and not alive:
+                continue
+            metric = merged.get(name)
+            if metric is None:
+                cls = KINDS[snapshot['kind']]
+                options = {'buckets': snapshot['buckets']} if cls is Histogram else {}
+                metric = merged[name] = cls(name, snapshot['documentation'], **options)
+            for key, value in snapshot['values']:
+                metric.merge(tuple(tuple(pair) for pair in key), value)
+    return merged
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format, over all processes in multiprocess mode."""
+    directory = settings.METRICS_MULTIPROC_DIR
+    registry = _collect(directory) if directory else _registry
+    lines = []
+    with _lock:
+        metrics = sorted(registry.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, key, value in list(metric.samples()):
+                lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
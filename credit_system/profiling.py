@@ -0,0 +1,70 @@
+# credit_system/profiling.py
+"""
+Per-request profile: query count, time spent in the database, named stage
+timings and the SQL that ran.
+
+RequestMetricsMiddleware opens a profile in a context variable; the
+database backend's execute wrapper (record_query) and stage() add to it.
+Context variables follow sync_to_async, so async views are covered too.
+Outside a request (Celery tasks, shell) both are no-ops.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Statements kept per request for the slow-request log
+MAX_SQL = 200
+
+_profile = ContextVar('request_profile', default=None)
+
+
+class Profile:
+    __slots__ = ('queries', 'db_seconds', 'stages', 'sql')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.stages = {}
+        self.sql = []
+
+
+@contextmanager
+def profiled():
+    """Collect a Profile for the duration of the block."""
+    profile = Profile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection by credit_system.db."""
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        profile.queries += 1
+        profile.db_seconds += elapsed
+        if len(profile.sql) < MAX_SQL:
+            # The statement text only: parameters may hold customer data
+            profile.sql.append((elapsed, sql))
+
+
+@contextmanager
+def stage(name):
+    """Time a named step of a view; repeated stages accumulate."""
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.stages[name] = profile.stages.get(name, 0.0) + time.perf_counter() - started
@@ -0,0 +1,96 @@
+# credit_system/routers.py
+"""
+Primary/replica database routing.
+
+Reads go to the 'replica' alias only inside views wrapped with read_replica
+(or a use_replica() block) and only when that alias is configured. Writes,
+and reads made while the primary is inside a transaction, stay on 'default'.
+
+pin_primary() is called after a write: a cookie keeps that client, and a
+cache key keeps that customer, on the primary for REPLICA_PIN_SECONDS so a
+freshly created loan is visible despite replication lag.
+"""
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+PIN_COOKIE = 'pin_primary'
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def replica_alias():
+    """
+    Alias for read-only work: the replica if one is configured, else the primary.
+    A replica read inside a primary transaction would miss that transaction's
+    writes, so those stay on the primary too.
+    """
+    if REPLICA in settings.DATABASES and not connections[PRIMARY].in_atomic_block:
+        return REPLICA
+    return PRIMARY
+
+
+@contextmanager
+def use_replica(enabled=True):
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def _pin_key(customer_id):
+    return f'pin-primary:{customer_id}'
+
+
+def pin_primary(response, customer_id=None):
+    """Send the client's (and the customer's) next reads to the primary."""
+    seconds = settings.REPLICA_PIN_SECONDS
+    response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+    if customer_id is not None:
+        cache.set(_pin_key(customer_id), 1, seconds)
+    return response
+
+
+def read_replica(view):
+    """Serve a read-only view from the replica unless the request is pinned to the primary."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            pinned = PIN_COOKIE in request.COOKIES or (
+                'customer_id' in kwargs and await cache.aget(_pin_key(kwargs['customer_id'])) is not None
+            )
+            with use_replica(not pinned):
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        pinned = PIN_COOKIE in request.COOKIES or (
+            'customer_id' in kwargs and cache.get(_pin_key(kwargs['customer_id'])) is not None
+        )
+        with use_replica(not pinned):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return replica_alias() if _use_replica.get() else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
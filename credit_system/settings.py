@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its latency covers the rest of the stack
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,30 +75,147 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'credit_system.wsgi.application'
 
+# Requests slower than this are logged with their slowest SQL statements
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+SLOW_REQUEST_SQL = config('SLOW_REQUEST_SQL', default=10, cast=int)
+# Directory where every process writes its metrics so /metrics/ can sum all
+# gunicorn workers (credit_system/metrics.py); unset reports the serving process only
+METRICS_MULTIPROC_DIR = config('PROMETHEUS_MULTIPROC_DIR', default='')
+# Upper bound in seconds on how stale another worker's values are in a scrape
+METRICS_FLUSH_SECONDS = config('METRICS_FLUSH_SECONDS', default=1.0, cast=float)
+# Cold-start budget per process type, enforced by benchmark_startup --fail-over-budget
+STARTUP_BUDGET_MS = config('STARTUP_BUDGET_MS', default=2000, cast=int)
+
+# wsgi: sync gunicorn workers; asgi: uvicorn workers (see gunicorn.conf.py)
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
+# Route the read endpoints to the async views in api/async_views.py
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=SERVER_MODE == 'asgi', cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# How each process reuses PostgreSQL connections:
+#   none       - connect per request (Django's default)
+#   persistent - one health-checked connection per thread, kept DB_CONN_MAX_AGE seconds
+#   pool       - up to DB_POOL_SIZE connections per process (credit_system/db/base.py)
+#   pgbouncer  - persistent connections to PgBouncer in transaction pooling mode
+# Size DB_POOL_SIZE to the threads of one process (GUNICORN_THREADS for the web
+# service, 1 for prefork Celery workers); the backends used are then about
+# WEB_CONCURRENCY * DB_POOL_SIZE + CELERY_WORKER_CONCURRENCY.
+DB_POOL_MODE = config('DB_POOL_MODE', default='none')
+if DB_POOL_MODE not in ('none', 'persistent', 'pool', 'pgbouncer'):
+    raise ImproperlyConfigured(f"Unknown DB_POOL_MODE {DB_POOL_MODE!r}")
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=config('GUNICORN_THREADS', default=1, cast=int), cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+# Pooled connections idle longer than this many seconds get a SELECT 1 before reuse
+DB_POOL_CHECK_IDLE = config('DB_POOL_CHECK_IDLE', default=30, cast=float)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'credit_system.db',
         'NAME': config('POSTGRES_DB'),
         'USER': config('POSTGRES_USER'),
         'PASSWORD': config('POSTGRES_PASSWORD'),
         'HOST': config('POSTGRES_HOST'),
         'PORT': config('POSTGRES_PORT'),
+        # Pooled connections go back to the pool at the end of each request
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE if DB_POOL_MODE in ('persistent', 'pgbouncer') else 0,
+        'CONN_HEALTH_CHECKS': DB_POOL_MODE != 'none',
+        # Server-side cursors do not survive transaction pooling. Without them,
+        # QuerySet.iterator() and connection.chunked_cursor() fetch the whole
+        # result into the client: scoring.loan_factors (rescore_portfolio) and
+        # the ?stream=1 /view-loans/ responses then hold every row in memory.
+        # Celery workers can use DB_POOL_MODE=persistent against PostgreSQL
+        # directly to keep them streaming.
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'pgbouncer',
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=10, cast=int),
+            **({'pool': {'max_size': DB_POOL_SIZE, 'timeout': DB_POOL_TIMEOUT, 'check_idle': DB_POOL_CHECK_IDLE}}
+               if DB_POOL_MODE == 'pool' else {}),
+        },
     }
 }
+
+# Streaming replica for the read-only views and analytics tasks
+# (credit_system/routers.py); leave POSTGRES_REPLICA_HOST unset to read from the primary.
+# Tests mirror it onto the test database.
+POSTGRES_REPLICA_HOST = config('POSTGRES_REPLICA_HOST', default='')
+if POSTGRES_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': POSTGRES_REPLICA_HOST,
+        'PORT': config('POSTGRES_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['credit_system.routers.ReadReplicaRouter']
+# How long a client or customer reads from the primary after a write (replication lag budget)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
 # credit_system/settings.py
 # -------------------------------------------------
 # Celery (background tasks)
 # -------------------------------------------------
 # Celery
-CELERY_BROKER_URL = 
-CELERY_RESULT_BACKEND =
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://redis:6379/0')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://redis:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+# Prefork processes per worker; each holds at most one database connection
+CELERY_WORKER_CONCURRENCY = config('CELERY_WORKER_CONCURRENCY', default=4, cast=int)
+
+# Rows per COPY/upsert batch in the ingestion tasks
+INGEST_CHUNK_SIZE = config('INGEST_CHUNK_SIZE', default=10000, cast=int)
+# Row-range partitions used by ingest_loan_data_parallel (roughly one per worker)
+LOAN_INGEST_PARTITIONS = config('LOAN_INGEST_PARTITIONS', default=4, cast=int)
+# Seconds between progress updates (Celery task state and api_import_run) of an import
+IMPORT_PROGRESS_INTERVAL = config('IMPORT_PROGRESS_INTERVAL', default=2.0, cast=float)
+# Directory for per-run CSV files of rejected import rows and their reason codes
+IMPORT_REJECT_DIR = config('IMPORT_REJECT_DIR', default=str(BASE_DIR / 'rejects'))
+# Directory for the Parquet copy of an xlsx loan sheet split across workers; every worker must see it
+IMPORT_SPOOL_DIR = config('IMPORT_SPOOL_DIR', default=str(BASE_DIR / 'spool'))
+# Loan rows fetched per batch by rescore_portfolio
+SCORING_CHUNK_SIZE = config('SCORING_CHUNK_SIZE', default=200000, cast=int)
+
+# /view-loans/ keyset pagination and streaming
+VIEW_LOANS_PAGE_SIZE = config('VIEW_LOANS_PAGE_SIZE', default=100, cast=int)
+VIEW_LOANS_MAX_PAGE_SIZE = config('VIEW_LOANS_MAX_PAGE_SIZE', default=1000, cast=int)
+VIEW_LOANS_STREAM_CHUNK = config('VIEW_LOANS_STREAM_CHUNK', default=2000, cast=int)
+
+# Cache for per-customer credit scores; Redis in deployment, local memory otherwise
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+    } if REDIS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# Upper bound in seconds on how long a cached credit score may be served
+CREDIT_CACHE_TTL = config('CREDIT_CACHE_TTL', default=900, cast=int)
+# Seconds /portfolio/summary/ is served from cache; a refresh that applies changes clears it
+PORTFOLIO_CACHE_TTL = config('PORTFOLIO_CACHE_TTL', default=60, cast=int)
+# Seconds after a new loan before the portfolio rollups are refreshed; loans in between share the run
+PORTFOLIO_REFRESH_DELAY = config('PORTFOLIO_REFRESH_DELAY', default=30, cast=int)
+
+# Largest application list accepted by /check-eligibility/batch/
+ELIGIBILITY_BATCH_MAX = config('ELIGIBILITY_BATCH_MAX', default=1000, cast=int)
+# Largest customer list accepted by /register/bulk/, and rows per INSERT
+BULK_REGISTER_MAX = config('BULK_REGISTER_MAX', default=1000, cast=int)
+BULK_REGISTER_BATCH_SIZE = config('BULK_REGISTER_BATCH_SIZE', default=500, cast=int)
+
+# Render API responses with orjson (api.renderers.ORJSONRenderer) instead of
+# the stock JSON renderer
+FAST_JSON_RENDERER = config('FAST_JSON_RENDERER', default=False, cast=bool)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer' if FAST_JSON_RENDERER else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -1,10 +1,32 @@
+from django.conf import settings
 from django.urls import path
-from api.views import RegisterView, CheckEligibilityView, CreateLoanView, ViewLoanView, ViewLoansByCustomerView
+from api import async_views
+from credit_system import metrics
+from credit_system.routers import read_replica
+from api.views import (
+    RegisterView, RegisterBulkView, CheckEligibilityView, CheckEligibilityBatchView, CreateLoanView,
+    ViewLoanView, ViewLoanScheduleView, ViewLoansByCustomerView, PortfolioSummaryView
+)
 
+if settings.ASYNC_READ_VIEWS:
+    check_eligibility_view = async_views.check_eligibility
+    view_loan_view = async_views.view_loan
+    view_loans_view = async_views.view_loans
+else:
+    check_eligibility_view = CheckEligibilityView.as_view()
+    view_loan_view = ViewLoanView.as_view()
+    view_loans_view = ViewLoansByCustomerView.as_view()
+
+# Read-only endpoints are served from the replica when one is configured
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('check-eligibility/', CheckEligibilityView.as_view(), name='check_eligibility'),
+    path('register/bulk/', RegisterBulkView.as_view(), name='register_bulk'),
+    path('check-eligibility/', read_replica(check_eligibility_view), name='check_eligibility'),
+    path('check-eligibility/batch/', read_replica(CheckEligibilityBatchView.as_view()), name='check_eligibility_batch'),
     path('create-loan/', CreateLoanView.as_view(), name='create_loan'),
-    path('view-loan/<int:loan_id>/', ViewLoanView.as_view(), name='view_loan'),
-    path('view-loans/<int:customer_id>/', ViewLoansByCustomerView.as_view(), name='view_loans'),
+    path('view-loan/<int:loan_id>/', read_replica(view_loan_view), name='view_loan'),
+    path('view-loan/<int:loan_id>/schedule/', read_replica(ViewLoanScheduleView.as_view()), name='view_loan_schedule'),
+    path('view-loans/<int:customer_id>/', read_replica(view_loans_view), name='view_loans'),
+    path('portfolio/summary/', read_replica(PortfolioSummaryView.as_view()), name='portfolio_summary'),
+    path('metrics/', metrics.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,27 @@
+# gunicorn.conf.py
+# SERVER_MODE=wsgi: sync workers on credit_system.wsgi (default)
+# SERVER_MODE=asgi: uvicorn workers on credit_system.asgi with the async read views
+# (every module-level name here is read as a gunicorn setting)
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Threads per sync worker (gthread when > 1); DB_POOL_SIZE defaults to this
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+if server_mode == 'asgi':
+    wsgi_app = 'credit_system.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'credit_system.wsgi:application'
+
+
+def on_starting(server):
+    # Metrics snapshots of a previous run's workers would be summed into this one's
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))